@@ -0,0 +1,57 @@
+# Measures the request throughput of the '/api' endpoint through the Flask test client, including the routing, the
+# token check, the dispatch and the serialization of the response:
+#
+#   * version - Custom API that doesn't do any work
+#   * list_tasks - Answered in-process from the cached DagBag
+#   * list_tasks_cli - Executed with the (fake) airflow CLI since 'tree' can't be answered in-process
+#
+# Usage: python benchmarks/bench_api.py [--requests 200]
+import argparse
+import time
+
+from common import get_latency_stats, load_plugin, report, set_fake_airflow_output
+
+CALLS = [
+    ("version", "api=version"),
+    ("list_tasks", "api=list_tasks&dag_id=benchmark_dag_0"),
+    ("list_tasks_cli", "api=list_tasks&dag_id=benchmark_dag_0&tree=on"),
+]
+
+
+def run(requests=200, quick=False):
+    plugin, app = load_plugin()
+    set_fake_airflow_output(stdout_bytes=1024)
+    client = app.test_client()
+    if quick:
+        requests = max(1, requests // 10)
+
+    results = []
+    for name, query in CALLS:
+        url = "/admin/rest_api/api?" + query
+        response = client.get(url)  # warming up the DagBag cache and the process
+        assert response.status_code == 200, response.get_data(as_text=True)
+        # the CLI calls are a lot slower so fewer of them are done
+        call_requests = requests if not name.endswith("_cli") else max(1, requests // 10)
+        durations = []
+        start_time = time.time()
+        for _ in range(call_requests):
+            call_start_time = time.time()
+            client.get(url)
+            durations.append(time.time() - call_start_time)
+        total_seconds = time.time() - start_time
+        result = {"name": "api_" + name, "requests": call_requests, "seconds": round(total_seconds, 6),
+                  "requests_per_second": round(call_requests / total_seconds, 3)}
+        result.update(get_latency_stats(durations))
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests per API")
+    args = parser.parse_args()
+    report("api", run(requests=args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Measures how the throughput and the latency of the '/api' endpoint change with the number of parallel requests, the
+# way the threads of a web server worker would send them. Each thread has its own Flask test client.
+#
+#   * list_tasks_cli - Executed with the (fake) airflow CLI, which takes --command-seconds to run
+#   * list_tasks - Answered in-process from the cached DagBag
+#
+# Usage: python benchmarks/bench_concurrency.py [--threads 1,2,4,8,16] [--requests-per-thread 20]
+import argparse
+import threading
+import time
+
+from common import get_latency_stats, load_plugin, report, set_fake_airflow_output
+
+CALLS = [
+    ("list_tasks_cli", "api=list_tasks&dag_id=benchmark_dag_0&tree=on"),
+    ("list_tasks", "api=list_tasks&dag_id=benchmark_dag_0"),
+]
+
+
+def run(threads="1,2,4,8,16", requests_per_thread=20, command_seconds=0.05, quick=False):
+    plugin, app = load_plugin()
+    set_fake_airflow_output(stdout_bytes=4096, sleep=command_seconds)
+    if quick:
+        threads = "1,4"
+        requests_per_thread = max(1, requests_per_thread // 4)
+
+    results = []
+    for name, query in CALLS:
+        url = "/admin/rest_api/api?" + query
+        app.test_client().get(url)  # warming up
+        for thread_count in [int(thread_count) for thread_count in threads.split(",")]:
+            durations = []
+            errors = []
+            lock = threading.Lock()
+
+            def send_requests():
+                client = app.test_client()
+                for _ in range(requests_per_thread):
+                    call_start_time = time.time()
+                    response = client.get(url)
+                    with lock:
+                        durations.append(time.time() - call_start_time)
+                        if response.status_code != 200:
+                            errors.append(response.status_code)
+
+            workers = [threading.Thread(target=send_requests) for _ in range(thread_count)]
+            start_time = time.time()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            total_seconds = time.time() - start_time
+            result = {"name": name + "_threads_" + str(thread_count), "threads": thread_count, "requests": len(durations),
+                      "errors": len(errors), "seconds": round(total_seconds, 6), "requests_per_second": round(len(durations) / total_seconds, 3)}
+            result.update(get_latency_stats(durations))
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", default="1,2,4,8,16", help="Comma separated numbers of parallel threads")
+    parser.add_argument("--requests-per-thread", type=int, default=20, help="Number of requests sent by each thread")
+    parser.add_argument("--command-seconds", type=float, default=0.05, help="Seconds the fake airflow command takes to run")
+    args = parser.parse_args()
+    report("concurrency", run(threads=args.threads, requests_per_thread=args.requests_per_thread, command_seconds=args.command_seconds))
+
+
+if __name__ == "__main__":
+    main()
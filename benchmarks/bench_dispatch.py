@@ -0,0 +1,86 @@
+# Measures the overhead the REST API Plugin adds to every API call before anything gets executed: finding the API,
+# validating the arguments and assembling the airflow CLI command. The compiled API registry is compared against the
+# linear scan of the apis_metadata and the per call command assembly the plugin used to do.
+#
+# Usage: python benchmarks/bench_dispatch.py
+from common import load_plugin, measure, report
+
+
+# The dispatch as it was done before the registry: scan all the apis_metadata for the API and walk its arguments twice
+# to assemble the command
+def get_legacy_api_metadata(apis_metadata, api):
+    api_metadata = None
+    for test_api_metadata in apis_metadata:
+        if test_api_metadata["name"] == api:
+            api_metadata = test_api_metadata
+    return api_metadata
+
+
+def build_legacy_cli_command(api_metadata, arguments):
+    largest_end_argument_value = 0
+    for argument in api_metadata.get("arguments", []):
+        if argument.get("cli_end_position") is not None and argument["cli_end_position"] > largest_end_argument_value:
+            largest_end_argument_value = argument["cli_end_position"]
+    airflow_cmd_split = ["airflow", api_metadata["name"]]
+    end_arguments = [0] * largest_end_argument_value
+    for argument in api_metadata["arguments"]:
+        argument_value = arguments.get(argument["name"])
+        if argument_value is not None:
+            if "cli_end_position" in argument:
+                end_arguments[argument["cli_end_position"] - 1] = argument_value
+            else:
+                airflow_cmd_split.append("--" + argument["name"])
+                if argument["form_input_type"] != "checkbox":
+                    airflow_cmd_split.extend(argument_value.split(" "))
+    for fixed_argument in api_metadata.get("fixed_arguments", []):
+        if fixed_argument.get("fixed_value") is not None:
+            airflow_cmd_split.append("--" + fixed_argument["name"])
+            if fixed_argument["fixed_value"]:
+                airflow_cmd_split.extend(fixed_argument["fixed_value"].split(" "))
+    airflow_cmd_split.extend(end_arguments)
+    return airflow_cmd_split
+
+
+def run(quick=False):
+    plugin, app = load_plugin()
+    scale = 10 if quick else 1
+
+    # the last API in the list is the worst case for the linear scan
+    last_api = plugin.apis_metadata[-1]["name"]
+    backfill_arguments = {"dag_id": "benchmark_dag_0", "task_regex": "task_.*", "start_date": "2017-01-01",
+                          "end_date": "2017-01-02", "mark_success": "on", "pool": "default_pool"}
+    backfill_metadata = get_legacy_api_metadata(plugin.apis_metadata, "backfill")
+    backfill_api = plugin.api_registry.get("backfill")
+
+    results = [
+        measure("lookup_legacy_scan", lambda: get_legacy_api_metadata(plugin.apis_metadata, last_api), number=100000 // scale),
+        measure("lookup_registry", lambda: plugin.api_registry.get(last_api), number=100000 // scale),
+        measure("build_cli_command_legacy", lambda: build_legacy_cli_command(backfill_metadata, backfill_arguments), number=100000 // scale),
+        measure("build_cli_command_registry", lambda: (backfill_api.get_missing_required_arguments(backfill_arguments),
+                                                       backfill_api.build_cli_command(backfill_arguments)), number=100000 // scale),
+    ]
+
+    # full dispatch of a custom API that doesn't do any work, including the response serialization
+    view = plugin.rest_api_view
+    with app.test_request_context("/admin/rest_api/api?api=rest_api_plugin_version"):
+        results.append(measure("execute_api_rest_api_plugin_version", lambda: view.execute_api(
+            plugin.REST_API_Response_Util.get_base_response(), "rest_api_plugin_version", {}), number=5000 // scale))
+
+    # dispatch of an API that validates a dag_id against the (cached) DagBag, up to the execution of the command
+    with app.test_request_context("/admin/rest_api/api?api=backfill"):
+        def build_backfill_command():
+            compiled_api = plugin.api_registry.get("backfill")
+            compiled_api.get_missing_required_arguments(backfill_arguments)
+            view.get_dagbag()
+            return compiled_api.build_cli_command(backfill_arguments)
+        results.append(measure("dispatch_backfill_until_execution", build_backfill_command, number=20000 // scale))
+
+    return results
+
+
+def main():
+    report("dispatch", run())
+
+
+if __name__ == "__main__":
+    main()
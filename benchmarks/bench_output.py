@@ -0,0 +1,69 @@
+# Measures how the output of the CLI commands is handled for outputs of 1KB up to 100MB:
+#
+#   * collect_process_output - Starting the (fake) airflow command and collecting its stdout and stderr
+#   * filter_loading_messages - Removing the loading messages from the collected stdout
+#
+# Usage: python benchmarks/bench_output.py [--sizes 1KB,64KB,1MB,10MB,100MB] [--repeat 3]
+import argparse
+import subprocess
+import time
+
+from common import load_plugin, parse_size, report, set_fake_airflow_output
+
+DEFAULT_SIZES = "1KB,64KB,1MB,10MB,100MB"
+
+
+def measure_best(function, repeat):
+    best_seconds = None
+    for _ in range(repeat):
+        start_time = time.time()
+        function()
+        seconds = time.time() - start_time
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+    return best_seconds
+
+
+def get_result(name, size, seconds, repeat):
+    return {"name": name + "_" + size, "bytes": parse_size(size), "repeat": repeat, "seconds": round(seconds, 6),
+            "mb_per_second": round(parse_size(size) / 1048576.0 / seconds, 3) if seconds > 0 else None}
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, quick=False):
+    plugin, app = load_plugin()
+    REST_API = plugin.REST_API
+    if quick:
+        sizes = ",".join([size for size in sizes.split(",") if parse_size(size) <= 1048576])
+        repeat = 1
+
+    results = []
+    for size in sizes.split(","):
+        size = size.strip()
+        # 10% of the output goes to stderr like the warnings of a real command
+        set_fake_airflow_output(stdout_bytes=parse_size(size) * 9 // 10, stderr_bytes=parse_size(size) // 10)
+        outputs = []
+
+        def collect_process_output():
+            process = subprocess.Popen(["airflow", "list_dags"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            outputs.append(REST_API.collect_process_output(process))
+
+        results.append(get_result("collect_process_output", size, measure_best(collect_process_output, repeat), repeat))
+
+        # filter_loading_messages changes the output it's given so each run gets its own copy
+        output = outputs[-1]
+        del outputs[:]
+        copies = [dict(output) for _ in range(repeat)]
+        results.append(get_result("filter_loading_messages", size, measure_best(lambda: REST_API.filter_loading_messages(copies.pop()), repeat), repeat))
+        del copies[:]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated output sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per size. The best one is reported.")
+    args = parser.parse_args()
+    report("output", run(sizes=args.sizes, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
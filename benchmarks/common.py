@@ -0,0 +1,139 @@
+# Shared setup of the REST API Plugin benchmarks. Loads the plugin against the stub airflow package in benchmarks/stubs
+# inside a temporary AIRFLOW_HOME, with the fake 'airflow' executable in benchmarks/bin first on the PATH, so that the
+# benchmarks don't need an Airflow installation, a metadata database or a network.
+#
+# Requires: flask, flask-admin, sqlalchemy, python-dateutil (and futures on Python 2)
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_FILE = os.path.join(BENCHMARKS_FOLDER, "..", "plugins", "rest_api_plugin.py")
+TEMPLATES_FOLDER = os.path.join(BENCHMARKS_FOLDER, "..", "plugins", "templates")
+
+BENCHMARK_DAG = """
+from airflow.models import DAG, BaseOperator
+
+dag = DAG("benchmark_dag_{index}")
+for task_index in range({task_count}):
+    BaseOperator(task_id="task_" + str(task_index), dag=dag)
+"""
+
+# the plugin and the Flask app, loaded once per process since the plugin keeps process-wide state
+_loaded = {}
+
+
+# Load the Python file as a module of the given name, like imp.load_source() does. The imp module is deprecated (and
+# removed from Python 3.12) so it's only used on Python 2.
+def load_source(name, file_path):
+    if sys.version_info[0] < 3:
+        import imp
+        return imp.load_source(name, file_path)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+# Create the temporary AIRFLOW_HOME with a DAGs folder of dag_count DAGs and load the plugin. Returns (plugin module, app).
+# The config is a dict of [rest_api_plugin] options. Only the first call of a process creates them.
+def load_plugin(dag_count=10, task_count=10, config=None):
+    if _loaded:
+        return _loaded["plugin"], _loaded["app"]
+
+    home = tempfile.mkdtemp(prefix="rest_api_plugin_benchmark_")
+    os.environ["REST_API_BENCHMARK_HOME"] = home
+    os.environ["PATH"] = os.path.join(BENCHMARKS_FOLDER, "bin") + os.pathsep + os.environ.get("PATH", "")
+    for option, value in (config or {}).items():
+        os.environ["AIRFLOW__REST_API_PLUGIN__" + option.upper()] = str(value)
+    dags_folder = os.path.join(home, "dags")
+    os.makedirs(dags_folder)
+    os.makedirs(os.path.join(home, "logs"))
+    for index in range(dag_count):
+        with open(os.path.join(dags_folder, "benchmark_dag_" + str(index) + ".py"), "w") as dag_file:
+            dag_file.write(BENCHMARK_DAG.format(index=index, task_count=task_count))
+
+    # the web server logs at INFO, so the plugin's logging is part of the cost. It's written to /dev/null.
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.StreamHandler(open(os.devnull, "w"))]
+    root_logger.setLevel(logging.INFO)
+
+    sys.path.insert(0, os.path.join(BENCHMARKS_FOLDER, "stubs"))
+    from flask import Flask
+    from flask_admin import Admin
+    plugin = load_source("rest_api_plugin", PLUGIN_FILE)
+    app = Flask("rest_api_plugin_benchmark", template_folder=TEMPLATES_FOLDER)
+    app.register_blueprint(plugin.rest_api_bp)
+    Admin(app, url="/admin").add_view(plugin.rest_api_view)
+    _loaded["plugin"] = plugin
+    _loaded["app"] = app
+    return plugin, app
+
+
+# Set the environment variables of the fake 'airflow' executable (see benchmarks/bin/airflow)
+def set_fake_airflow_output(stdout_bytes=1024, stderr_bytes=0, loading_lines=3, line_length=100, sleep=0):
+    os.environ["FAKE_AIRFLOW_STDOUT_BYTES"] = str(stdout_bytes)
+    os.environ["FAKE_AIRFLOW_STDERR_BYTES"] = str(stderr_bytes)
+    os.environ["FAKE_AIRFLOW_LOADING_LINES"] = str(loading_lines)
+    os.environ["FAKE_AIRFLOW_LINE_LENGTH"] = str(line_length)
+    os.environ["FAKE_AIRFLOW_SLEEP"] = str(sleep)
+
+
+# Time the function and return the result row of the benchmark with the best per call time out of the repeats
+def measure(name, function, number=10000, repeat=5, **extra):
+    best_time = min(timeit.repeat(function, number=number, repeat=repeat))
+    result = {"name": name, "number": number, "repeat": repeat, "per_call_us": round(best_time / number * 1000000, 3)}
+    result.update(extra)
+    return result
+
+
+# Get the latency percentiles (in milliseconds) of a list of durations in seconds
+def get_latency_stats(durations):
+    durations = sorted(durations)
+    if not durations:
+        return {}
+
+    def percentile(fraction):
+        return round(durations[min(len(durations) - 1, int(fraction * len(durations)))] * 1000, 3)
+
+    return {"p50_ms": percentile(0.5), "p95_ms": percentile(0.95), "p99_ms": percentile(0.99), "max_ms": round(durations[-1] * 1000, 3)}
+
+
+# Parse a size like 1KB, 10MB or 1024 into a number of bytes
+def parse_size(size):
+    size = size.strip().upper()
+    for suffix, multiplier in [("KB", 1024), ("MB", 1024 * 1024), ("GB", 1024 * 1024 * 1024), ("B", 1)]:
+        if size.endswith(suffix):
+            return int(float(size[:-len(suffix)]) * multiplier)
+    return int(size)
+
+
+# Get the results of a benchmark as a dict along with what they were measured with
+def get_report(benchmark, results, **extra):
+    plugin = _loaded.get("plugin")
+    report = {
+        "benchmark": benchmark,
+        "rest_api_plugin_version": plugin.rest_api_plugin_version if plugin is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results
+    }
+    report.update(extra)
+    return report
+
+
+# Print the results of a benchmark as JSON so that runs can be saved and compared (see compare.py)
+def report(benchmark, results, **extra):
+    print(json.dumps(get_report(benchmark, results, **extra), indent=4))
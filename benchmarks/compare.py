@@ -0,0 +1,60 @@
+# Compares two results files of run_all.py (or single benchmark outputs) and reports the changes of every result that
+# is in both. Exits with 1 if any result got worse by more than the threshold, so it can be used in CI.
+#
+# Usage: python benchmarks/compare.py baseline.json new.json [--threshold 10]
+import argparse
+import json
+import sys
+
+# metric of a result used for the comparison, in order of preference, and whether higher values are better
+METRICS = [
+    ("per_call_us", False),
+    ("requests_per_second", True),
+    ("mb_per_second", True),
+    ("seconds", False),
+]
+
+
+def load_results(file_path):
+    with open(file_path, "r") as results_file:
+        document = json.load(results_file)
+    reports = document.get("benchmarks", [document])
+    results = {}
+    for benchmark_report in reports:
+        for result in benchmark_report.get("results", []):
+            results[(benchmark_report["benchmark"], result["name"])] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares two results files of the REST API Plugin benchmarks")
+    parser.add_argument("baseline", help="Results of the baseline")
+    parser.add_argument("new", help="Results to compare with the baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percentage a result can get worse by before it's reported as a regression")
+    args = parser.parse_args()
+
+    baseline_results = load_results(args.baseline)
+    new_results = load_results(args.new)
+    regressions = []
+    print("%-14s %-45s %-20s %14s %14s %9s" % ("benchmark", "name", "metric", "baseline", "new", "change"))
+    for key in sorted(set(baseline_results.keys()) & set(new_results.keys())):
+        baseline_result = baseline_results[key]
+        new_result = new_results[key]
+        for metric, higher_is_better in METRICS:
+            if baseline_result.get(metric) and new_result.get(metric) is not None:
+                change = (new_result[metric] - baseline_result[metric]) * 100.0 / baseline_result[metric]
+                worse_by = -change if higher_is_better else change
+                flag = ""
+                if worse_by > args.threshold:
+                    flag = " REGRESSION"
+                    regressions.append(key)
+                print("%-14s %-45s %-20s %14s %14s %+8.1f%%%s" % (key[0], key[1], metric, baseline_result[metric], new_result[metric], change, flag))
+                break
+
+    print("")
+    print(str(len(regressions)) + " regression(s) over " + str(args.threshold) + "%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
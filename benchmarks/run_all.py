@@ -0,0 +1,48 @@
+# Runs all the benchmarks of the REST API Plugin and writes their results as one JSON document, to be compared with the
+# results of another version of the plugin with compare.py.
+#
+# Usage: python benchmarks/run_all.py [--output results.json] [--quick] [--sizes 1KB,64KB,1MB,10MB,100MB]
+import argparse
+import json
+import sys
+
+import bench_api
+import bench_concurrency
+import bench_dispatch
+import bench_output
+from common import get_report
+
+BENCHMARKS = [
+    ("dispatch", lambda args: bench_dispatch.run(quick=args.quick)),
+    ("api", lambda args: bench_api.run(quick=args.quick)),
+    ("output", lambda args: bench_output.run(sizes=args.sizes, quick=args.quick)),
+    ("concurrency", lambda args: bench_concurrency.run(quick=args.quick)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs all the benchmarks of the REST API Plugin")
+    parser.add_argument("--output", help="File to write the results to (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and outputs of up to 1MB, for a quick check")
+    parser.add_argument("--sizes", default=bench_output.DEFAULT_SIZES, help="Comma separated output sizes of the output benchmark")
+    parser.add_argument("--only", help="Comma separated names of the benchmarks to run (" + ", ".join([name for name, _ in BENCHMARKS]) + ")")
+    args = parser.parse_args()
+
+    reports = []
+    for name, run in BENCHMARKS:
+        if args.only and name not in args.only.split(","):
+            continue
+        sys.stderr.write("Running the '" + name + "' benchmark\n")
+        reports.append(get_report(name, run(args)))
+
+    results = json.dumps({"benchmarks": reports}, indent=4)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(results + "\n")
+        sys.stderr.write("Results written to '" + args.output + "'\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
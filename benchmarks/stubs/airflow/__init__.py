@@ -0,0 +1,3 @@
+# Minimal stand-in for the airflow package so the REST API Plugin can be loaded and benchmarked without an Airflow
+# installation, a metadata database or a network. Only what the plugin uses is provided.
+__version__ = "1.8.2+benchmark-stub"
@@ -0,0 +1,29 @@
+import argparse
+
+from airflow.models import DagBag
+
+
+def list_tasks(args):
+    dag = DagBag(None).dags[args.dag_id]
+    print("\n".join(sorted([task.task_id for task in dag.tasks])))
+
+
+def version(args):
+    import airflow
+    print(airflow.__version__)
+
+
+class CLIFactory(object):
+
+    @staticmethod
+    def get_parser():
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers()
+        list_tasks_parser = subparsers.add_parser("list_tasks")
+        list_tasks_parser.add_argument("dag_id")
+        list_tasks_parser.add_argument("--tree", action="store_true")
+        list_tasks_parser.add_argument("--subdir")
+        list_tasks_parser.set_defaults(func=list_tasks)
+        version_parser = subparsers.add_parser("version")
+        version_parser.set_defaults(func=version)
+        return parser
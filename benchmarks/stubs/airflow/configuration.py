@@ -0,0 +1,34 @@
+import os
+
+# Folders default to the ones set up by the benchmark (see benchmarks/common.py). Any option can be overridden with an
+# AIRFLOW__{SECTION}__{KEY} environment variable, the same way as with Airflow.
+_home = os.environ.get("REST_API_BENCHMARK_HOME", "/tmp/rest_api_plugin_benchmark")
+_options = {
+    ("webserver", "base_url"): "http://localhost:8080",
+    ("core", "base_log_folder"): os.path.join(_home, "logs"),
+    ("core", "dags_folder"): os.path.join(_home, "dags"),
+}
+for _name, _value in os.environ.items():
+    if _name.startswith("AIRFLOW__") and _name.count("__") >= 2:
+        _, _section, _key = _name.split("__", 2)
+        _options[(_section.lower(), _key.lower())] = _value
+
+
+def has_option(section, key):
+    return (section.lower(), key.lower()) in _options
+
+
+def get(section, key):
+    return _options[(section.lower(), key.lower())]
+
+
+def getboolean(section, key):
+    return str(get(section, key)).strip().lower() in ["true", "t", "1"]
+
+
+def getint(section, key):
+    return int(get(section, key))
+
+
+def getfloat(section, key):
+    return float(get(section, key))
@@ -0,0 +1,215 @@
+import json
+import os
+import sys
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, PickleType, String, Text
+from sqlalchemy.ext.declarative import declarative_base
+
+from airflow import configuration, settings
+
+Base = declarative_base()
+
+
+# Same as imp.load_source(), which is gone from Python 3.12
+def _load_source(name, file_path):
+    if sys.version_info[0] < 3:
+        import imp
+        return imp.load_source(name, file_path)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+class DAG(object):
+
+    def __init__(self, dag_id, **kwargs):
+        self.dag_id = dag_id
+        self.tasks = []
+        self.fileloc = None
+        self.full_filepath = None
+
+    @property
+    def task_ids(self):
+        return [task.task_id for task in self.tasks]
+
+    def get_task(self, task_id):
+        for task in self.tasks:
+            if task.task_id == task_id:
+                return task
+        raise KeyError(task_id)
+
+
+class BaseOperator(object):
+
+    def __init__(self, task_id, dag, retries=0):
+        self.task_id = task_id
+        self.dag = dag
+        self.retries = retries
+        self.upstream_list = []
+        self.downstream_list = []
+        dag.tasks.append(self)
+
+    def set_downstream(self, task):
+        self.downstream_list.append(task)
+        task.upstream_list.append(self)
+
+    def get_flat_relatives(self, upstream=False):
+        relatives = []
+        tasks = list(self.upstream_list if upstream else self.downstream_list)
+        while tasks:
+            task = tasks.pop(0)
+            if task not in relatives:
+                relatives.append(task)
+                tasks.extend(task.upstream_list if upstream else task.downstream_list)
+        return relatives
+
+
+class SubDagOperator(BaseOperator):
+
+    def __init__(self, task_id, dag, subdag, **kwargs):
+        BaseOperator.__init__(self, task_id, dag, **kwargs)
+        self.subdag = subdag
+
+
+class DagBag(object):
+
+    def __init__(self, dag_folder=None, **kwargs):
+        self.dag_folder = dag_folder or configuration.get("core", "dags_folder")
+        self.dags = {}
+        self.import_errors = {}
+        self.file_last_changed = {}
+        for root, dirs, files in os.walk(self.dag_folder):
+            for file_name in files:
+                if file_name.endswith(".py"):
+                    self.process_file(os.path.join(root, file_name))
+
+    def process_file(self, filepath, only_if_updated=True, safe_mode=True):
+        try:
+            module = _load_source("unusual_prefix_" + str(abs(hash(filepath))), filepath)
+        except Exception as e:
+            self.import_errors[filepath] = str(e)
+            return []
+        found_dags = []
+        for value in list(module.__dict__.values()):
+            if isinstance(value, DAG):
+                value.fileloc = filepath
+                value.full_filepath = filepath
+                self.dags[value.dag_id] = value
+                found_dags.append(value)
+        self.file_last_changed[filepath] = os.path.getmtime(filepath)
+        return found_dags
+
+    def get_dag(self, dag_id):
+        return self.dags.get(dag_id)
+
+
+class DagModel(Base):
+    __tablename__ = "dag"
+    dag_id = Column(String(250), primary_key=True)
+    is_paused = Column(Boolean, default=False)
+    is_subdag = Column(Boolean, default=False)
+    is_active = Column(Boolean, default=True)
+    last_expired = Column(DateTime)
+    fileloc = Column(String(2000))
+
+    @classmethod
+    def get_current(cls, dag_id):
+        session = settings.Session()
+        try:
+            return session.query(cls).filter(cls.dag_id == dag_id).first()
+        finally:
+            session.close()
+
+
+class DagRun(Base):
+    __tablename__ = "dag_run"
+    id = Column(Integer, primary_key=True)
+    dag_id = Column(String(250))
+    execution_date = Column(DateTime)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    state = Column(String(50))
+    run_id = Column(String(250))
+    external_trigger = Column(Boolean, default=True)
+    conf = Column(PickleType)
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class TaskInstance(Base):
+    __tablename__ = "task_instance"
+    task_id = Column(String(250), primary_key=True)
+    dag_id = Column(String(250), primary_key=True)
+    execution_date = Column(DateTime, primary_key=True)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    duration = Column(Float)
+    state = Column(String(20))
+    try_number = Column(Integer, default=0)
+    max_tries = Column(Integer, default=-1)
+    job_id = Column(Integer)
+
+
+class Job(Base):
+    __tablename__ = "job"
+    id = Column(Integer, primary_key=True)
+    state = Column(String(20))
+
+
+class Pool(Base):
+    __tablename__ = "slot_pool"
+    id = Column(Integer, primary_key=True)
+    pool = Column(String(50), unique=True)
+    slots = Column(Integer, default=0)
+    description = Column(Text)
+
+    def __repr__(self):
+        return self.pool
+
+
+class Variable(Base):
+    __tablename__ = "variable"
+    id = Column(Integer, primary_key=True)
+    key = Column(String(250), unique=True)
+    val = Column(Text)
+    is_encrypted = Column(Boolean, default=False)
+
+    @classmethod
+    def get(cls, key, default_var=None, deserialize_json=False):
+        session = settings.Session()
+        try:
+            variable = session.query(cls).filter(cls.key == key).first()
+        finally:
+            session.close()
+        if variable is None:
+            if default_var is not None:
+                return default_var
+            raise ValueError("Variable {} does not exist".format(key))
+        return json.loads(variable.val) if deserialize_json else variable.val
+
+
+class Connection(Base):
+    __tablename__ = "connection"
+    id = Column(Integer, primary_key=True)
+    conn_id = Column(String(250))
+    conn_type = Column(String(500))
+    host = Column(String(500))
+    schema = Column(String(500))
+    login = Column(String(500))
+    password = Column(String(500))
+    port = Column(Integer)
+    extra = Column(Text)
+    is_encrypted = Column(Boolean, default=False)
+    is_extra_encrypted = Column(Boolean, default=False)
+
+
+Base.metadata.create_all(settings.engine)
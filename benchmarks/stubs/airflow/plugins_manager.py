@@ -0,0 +1,2 @@
+class AirflowPlugin(object):
+    name = None
@@ -0,0 +1,7 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# In-memory metadata database shared by all the threads of the process
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+Session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
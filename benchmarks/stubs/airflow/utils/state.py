@@ -0,0 +1,12 @@
+class State(object):
+    NONE = None
+    REMOVED = "removed"
+    SCHEDULED = "scheduled"
+    RUNNING = "running"
+    SUCCESS = "success"
+    SHUTDOWN = "shutdown"
+    FAILED = "failed"
+    UP_FOR_RETRY = "up_for_retry"
+    UPSTREAM_FAILED = "upstream_failed"
+    SKIPPED = "skipped"
+    QUEUED = "queued"
@@ -0,0 +1,7 @@
+class _CsrfProtect(object):
+
+    def exempt(self, view):
+        return view
+
+
+csrf = _CsrfProtect()
@@ -1,20 +1,62 @@
 __author__ = 'robertsanders'
 __version__ = "1.0.3"
 
-from airflow.models import DagBag, DagModel
+from airflow.models import Connection, DagBag, DagModel, DagRun, TaskInstance, Pool, Variable
+from sqlalchemy import and_, column, exists, func, or_, select, table
+from sqlalchemy.exc import IntegrityError
 from airflow.plugins_manager import AirflowPlugin
-from airflow import configuration
+from airflow import configuration, settings
+from airflow.utils.state import State
 from airflow.www.app import csrf
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, json, stream_with_context, copy_current_request_context
 from flask_admin import BaseView, expose
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import airflow
+import dateutil.parser
+import ast
+import base64
+import bisect
+import codecs
+import collections
+import contextlib
+import hashlib
+import itertools
 import logging
+import math
+import resource
+import shutil
+import signal
 import subprocess
 import os
+import re
 import socket
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+try:
+    string_types = basestring
+except NameError:  # Python 3
+    string_types = str
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 """
 CLIs this REST API exposes are Defined here: http://airflow.incubator.apache.org/cli.html
@@ -37,8 +79,80 @@ airflow_base_log_folder = configuration.get('core', 'BASE_LOG_FOLDER')
 airflow_dags_folder = configuration.get('core', 'DAGS_FOLDER')
 log_loading = configuration.getboolean("rest_api_plugin", "LOG_LOADING") if configuration.has_option("rest_api_plugin", "LOG_LOADING") else False
 filter_loading_messages_in_cli_response = configuration.getboolean("rest_api_plugin", "FILTER_LOADING_MESSAGES_IN_CLI_RESPONSE") if configuration.has_option("rest_api_plugin", "FILTER_LOADING_MESSAGES_IN_CLI_RESPONSE") else True
+output_line_filters = configuration.get("rest_api_plugin", "OUTPUT_LINE_FILTERS") if configuration.has_option("rest_api_plugin", "OUTPUT_LINE_FILTERS") else ""
+output_line_filter_redaction = configuration.get("rest_api_plugin", "OUTPUT_LINE_FILTER_REDACTION") if configuration.has_option("rest_api_plugin", "OUTPUT_LINE_FILTER_REDACTION") else "***"
 airflow_rest_api_plugin_http_token_header_name = configuration.get("rest_api_plugin", "REST_API_PLUGIN_HTTP_TOKEN_HEADER_NAME") if configuration.has_option("rest_api_plugin", "REST_API_PLUGIN_HTTP_TOKEN_HEADER_NAME") else "rest_api_plugin_http_token"
 airflow_expected_http_token = configuration.get("rest_api_plugin", "REST_API_PLUGIN_EXPECTED_HTTP_TOKEN") if configuration.has_option("rest_api_plugin", "REST_API_PLUGIN_EXPECTED_HTTP_TOKEN") else None
+process_output_max_queued_lines = configuration.getint("rest_api_plugin", "PROCESS_OUTPUT_MAX_QUEUED_LINES") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_MAX_QUEUED_LINES") else 1000
+process_output_max_line_chunk_size = configuration.getint("rest_api_plugin", "PROCESS_OUTPUT_MAX_LINE_CHUNK_SIZE") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_MAX_LINE_CHUNK_SIZE") else 65536
+job_executor_max_workers = configuration.getint("rest_api_plugin", "JOB_EXECUTOR_MAX_WORKERS") if configuration.has_option("rest_api_plugin", "JOB_EXECUTOR_MAX_WORKERS") else 4
+job_history_size = configuration.getint("rest_api_plugin", "JOB_HISTORY_SIZE") if configuration.has_option("rest_api_plugin", "JOB_HISTORY_SIZE") else 100
+job_output_folder = configuration.get("rest_api_plugin", "JOB_OUTPUT_FOLDER") if configuration.has_option("rest_api_plugin", "JOB_OUTPUT_FOLDER") else os.path.join(airflow_base_log_folder, "rest_api_plugin_jobs")
+job_output_max_read_size = configuration.getint("rest_api_plugin", "JOB_OUTPUT_MAX_READ_SIZE") if configuration.has_option("rest_api_plugin", "JOB_OUTPUT_MAX_READ_SIZE") else 1048576
+process_output_max_memory_size = configuration.getint("rest_api_plugin", "PROCESS_OUTPUT_MAX_MEMORY_SIZE") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_MAX_MEMORY_SIZE") else 1048576
+process_output_folder = configuration.get("rest_api_plugin", "PROCESS_OUTPUT_FOLDER") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_FOLDER") else os.path.join(airflow_base_log_folder, "rest_api_plugin_outputs")
+process_output_history_size = configuration.getint("rest_api_plugin", "PROCESS_OUTPUT_HISTORY_SIZE") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_HISTORY_SIZE") else 100
+process_output_max_read_size = configuration.getint("rest_api_plugin", "PROCESS_OUTPUT_MAX_READ_SIZE") if configuration.has_option("rest_api_plugin", "PROCESS_OUTPUT_MAX_READ_SIZE") else 1048576
+cli_worker_pool_enabled = configuration.getboolean("rest_api_plugin", "CLI_WORKER_POOL_ENABLED") if configuration.has_option("rest_api_plugin", "CLI_WORKER_POOL_ENABLED") else False
+cli_worker_pool_size = configuration.getint("rest_api_plugin", "CLI_WORKER_POOL_SIZE") if configuration.has_option("rest_api_plugin", "CLI_WORKER_POOL_SIZE") else 2
+cli_worker_max_jobs = configuration.getint("rest_api_plugin", "CLI_WORKER_MAX_JOBS") if configuration.has_option("rest_api_plugin", "CLI_WORKER_MAX_JOBS") else 100
+cli_worker_max_memory_mb = configuration.getint("rest_api_plugin", "CLI_WORKER_MAX_MEMORY_MB") if configuration.has_option("rest_api_plugin", "CLI_WORKER_MAX_MEMORY_MB") else 1024
+cli_worker_acquire_timeout = configuration.getfloat("rest_api_plugin", "CLI_WORKER_ACQUIRE_TIMEOUT") if configuration.has_option("rest_api_plugin", "CLI_WORKER_ACQUIRE_TIMEOUT") else 5
+cli_worker_execute_timeout = configuration.getfloat("rest_api_plugin", "CLI_WORKER_EXECUTE_TIMEOUT") if configuration.has_option("rest_api_plugin", "CLI_WORKER_EXECUTE_TIMEOUT") else 3600
+batch_max_parallelism = configuration.getint("rest_api_plugin", "BATCH_MAX_PARALLELISM") if configuration.has_option("rest_api_plugin", "BATCH_MAX_PARALLELISM") else 8
+batch_max_items = configuration.getint("rest_api_plugin", "BATCH_MAX_ITEMS") if configuration.has_option("rest_api_plugin", "BATCH_MAX_ITEMS") else 500
+bulk_state_max_keys = configuration.getint("rest_api_plugin", "BULK_STATE_MAX_KEYS") if configuration.has_option("rest_api_plugin", "BULK_STATE_MAX_KEYS") else 10000
+variables_import_max_items = configuration.getint("rest_api_plugin", "VARIABLES_IMPORT_MAX_ITEMS") if configuration.has_option("rest_api_plugin", "VARIABLES_IMPORT_MAX_ITEMS") else 10000
+variables_export_batch_size = configuration.getint("rest_api_plugin", "VARIABLES_EXPORT_BATCH_SIZE") if configuration.has_option("rest_api_plugin", "VARIABLES_EXPORT_BATCH_SIZE") else 1000
+connections_query_max_limit = configuration.getint("rest_api_plugin", "CONNECTIONS_QUERY_MAX_LIMIT") if configuration.has_option("rest_api_plugin", "CONNECTIONS_QUERY_MAX_LIMIT") else 1000
+connections_bulk_max_items = configuration.getint("rest_api_plugin", "CONNECTIONS_BULK_MAX_ITEMS") if configuration.has_option("rest_api_plugin", "CONNECTIONS_BULK_MAX_ITEMS") else 10000
+task_log_filename_template = configuration.get("rest_api_plugin", "TASK_LOG_FILENAME_TEMPLATE") if configuration.has_option("rest_api_plugin", "TASK_LOG_FILENAME_TEMPLATE") else "{dag_id}/{task_id}/{execution_date}/{try_number}.log"
+task_log_max_read_size = configuration.getint("rest_api_plugin", "TASK_LOG_MAX_READ_SIZE") if configuration.has_option("rest_api_plugin", "TASK_LOG_MAX_READ_SIZE") else 1048576
+task_log_follow_poll_interval = configuration.getfloat("rest_api_plugin", "TASK_LOG_FOLLOW_POLL_INTERVAL") if configuration.has_option("rest_api_plugin", "TASK_LOG_FOLLOW_POLL_INTERVAL") else 0.5
+task_log_follow_max_timeout = configuration.getfloat("rest_api_plugin", "TASK_LOG_FOLLOW_MAX_TIMEOUT") if configuration.has_option("rest_api_plugin", "TASK_LOG_FOLLOW_MAX_TIMEOUT") else 60
+trigger_dags_max_items = configuration.getint("rest_api_plugin", "TRIGGER_DAGS_MAX_ITEMS") if configuration.has_option("rest_api_plugin", "TRIGGER_DAGS_MAX_ITEMS") else 10000
+watch_state_poll_interval = configuration.getfloat("rest_api_plugin", "WATCH_STATE_POLL_INTERVAL") if configuration.has_option("rest_api_plugin", "WATCH_STATE_POLL_INTERVAL") else 1
+watch_state_max_timeout = configuration.getfloat("rest_api_plugin", "WATCH_STATE_MAX_TIMEOUT") if configuration.has_option("rest_api_plugin", "WATCH_STATE_MAX_TIMEOUT") else 60
+watch_state_max_watchers = configuration.getint("rest_api_plugin", "WATCH_STATE_MAX_WATCHERS") if configuration.has_option("rest_api_plugin", "WATCH_STATE_MAX_WATCHERS") else 1000
+deploy_dag_parse_timeout = configuration.getfloat("rest_api_plugin", "DEPLOY_DAG_PARSE_TIMEOUT") if configuration.has_option("rest_api_plugin", "DEPLOY_DAG_PARSE_TIMEOUT") else 30
+deploy_dag_bundle_max_files = configuration.getint("rest_api_plugin", "DEPLOY_DAG_BUNDLE_MAX_FILES") if configuration.has_option("rest_api_plugin", "DEPLOY_DAG_BUNDLE_MAX_FILES") else 1000
+deploy_dag_bundle_max_size = configuration.getint("rest_api_plugin", "DEPLOY_DAG_BUNDLE_MAX_SIZE") if configuration.has_option("rest_api_plugin", "DEPLOY_DAG_BUNDLE_MAX_SIZE") else 104857600
+dagbag_cache_enabled = configuration.getboolean("rest_api_plugin", "DAGBAG_CACHE_ENABLED") if configuration.has_option("rest_api_plugin", "DAGBAG_CACHE_ENABLED") else True
+in_process_read_apis_enabled = configuration.getboolean("rest_api_plugin", "IN_PROCESS_READ_APIS_ENABLED") if configuration.has_option("rest_api_plugin", "IN_PROCESS_READ_APIS_ENABLED") else True
+dagbag_cache_refresh_interval = configuration.getfloat("rest_api_plugin", "DAGBAG_CACHE_REFRESH_INTERVAL") if configuration.has_option("rest_api_plugin", "DAGBAG_CACHE_REFRESH_INTERVAL") else 0
+response_cache_enabled = configuration.getboolean("rest_api_plugin", "RESPONSE_CACHE_ENABLED") if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_ENABLED") else False
+response_cache_backend = configuration.get("rest_api_plugin", "RESPONSE_CACHE_BACKEND").strip().lower() if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_BACKEND") else "memory"
+response_cache_max_size = configuration.getint("rest_api_plugin", "RESPONSE_CACHE_MAX_SIZE") if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_MAX_SIZE") else 67108864
+response_cache_folder = configuration.get("rest_api_plugin", "RESPONSE_CACHE_FOLDER") if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_FOLDER") else os.path.join(airflow_base_log_folder, "rest_api_plugin_cache")
+response_cache_dag_check_interval = configuration.getfloat("rest_api_plugin", "RESPONSE_CACHE_DAG_CHECK_INTERVAL") if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_DAG_CHECK_INTERVAL") else 5
+response_cache_ttls_config = configuration.get("rest_api_plugin", "RESPONSE_CACHE_TTLS") if configuration.has_option("rest_api_plugin", "RESPONSE_CACHE_TTLS") else ""
+request_coalescing_enabled = configuration.getboolean("rest_api_plugin", "REQUEST_COALESCING_ENABLED") if configuration.has_option("rest_api_plugin", "REQUEST_COALESCING_ENABLED") else True
+request_coalescing_across_processes = configuration.getboolean("rest_api_plugin", "REQUEST_COALESCING_ACROSS_PROCESSES") if configuration.has_option("rest_api_plugin", "REQUEST_COALESCING_ACROSS_PROCESSES") else False
+request_coalescing_folder = configuration.get("rest_api_plugin", "REQUEST_COALESCING_FOLDER") if configuration.has_option("rest_api_plugin", "REQUEST_COALESCING_FOLDER") else os.path.join(airflow_base_log_folder, "rest_api_plugin_coalescing")
+request_coalescing_wait_timeout = configuration.getfloat("rest_api_plugin", "REQUEST_COALESCING_WAIT_TIMEOUT") if configuration.has_option("rest_api_plugin", "REQUEST_COALESCING_WAIT_TIMEOUT") else 300
+admission_control_enabled = configuration.getboolean("rest_api_plugin", "ADMISSION_CONTROL_ENABLED") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_ENABLED") else False
+admission_control_max_weight = configuration.getint("rest_api_plugin", "ADMISSION_CONTROL_MAX_WEIGHT") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_MAX_WEIGHT") else 16
+admission_control_client_max_weight = configuration.getint("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_MAX_WEIGHT") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_MAX_WEIGHT") else 8
+admission_control_client_rate_limit = configuration.getfloat("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_RATE_LIMIT") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_RATE_LIMIT") else 0
+admission_control_client_burst = configuration.getint("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_BURST") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_CLIENT_BURST") else 10
+admission_control_queue_size = configuration.getint("rest_api_plugin", "ADMISSION_CONTROL_QUEUE_SIZE") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_QUEUE_SIZE") else 32
+admission_control_queue_timeout = configuration.getfloat("rest_api_plugin", "ADMISSION_CONTROL_QUEUE_TIMEOUT") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_QUEUE_TIMEOUT") else 10
+admission_control_weights_config = configuration.get("rest_api_plugin", "ADMISSION_CONTROL_WEIGHTS") if configuration.has_option("rest_api_plugin", "ADMISSION_CONTROL_WEIGHTS") else ""
+metrics_enabled = configuration.getboolean("rest_api_plugin", "METRICS_ENABLED") if configuration.has_option("rest_api_plugin", "METRICS_ENABLED") else True
+metrics_require_http_token = configuration.getboolean("rest_api_plugin", "METRICS_REQUIRE_HTTP_TOKEN") if configuration.has_option("rest_api_plugin", "METRICS_REQUIRE_HTTP_TOKEN") else True
+metrics_histogram_buckets = [float(bucket) for bucket in (configuration.get("rest_api_plugin", "METRICS_HISTOGRAM_BUCKETS") if configuration.has_option("rest_api_plugin", "METRICS_HISTOGRAM_BUCKETS") else "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,300").split(",")]
+
+# Parsing the per API TTLs (in the form: api_name=seconds,api_name=seconds) that override the cache_ttl of the APIs
+response_cache_ttls = {}
+for api_ttl in response_cache_ttls_config.split(","):
+    if "=" in api_ttl:
+        response_cache_ttls[api_ttl.split("=")[0].strip().lower()] = float(api_ttl.split("=")[1])
+
+# Parsing the per API weights (in the form: api_name=weight,api_name=weight) that override the admission_weight of the APIs
+admission_control_weights = {}
+for api_weight in admission_control_weights_config.split(","):
+    if "=" in api_weight:
+        admission_control_weights[api_weight.split("=")[0].strip().lower()] = int(api_weight.split("=")[1])
 
 # Using UTF-8 Encoding so that response messages don't have any characters in them that can't be handled
 os.environ['PYTHONIOENCODING'] = 'utf-8'
@@ -55,6 +169,66 @@ if log_loading:
     logging.info("\tairflow_rest_api_plugin_http_token_header_name: " + str(airflow_rest_api_plugin_http_token_header_name))
     logging.info("\tairflow_expected_http_token: OMITTED_FOR_SECURITY")
     logging.info("\tfilter_loading_messages_in_cli_response: " + str(filter_loading_messages_in_cli_response))
+    logging.info("\toutput_line_filters: " + str(output_line_filters))
+    logging.info("\toutput_line_filter_redaction: " + str(output_line_filter_redaction))
+    logging.info("\tprocess_output_max_queued_lines: " + str(process_output_max_queued_lines))
+    logging.info("\tprocess_output_max_line_chunk_size: " + str(process_output_max_line_chunk_size))
+    logging.info("\tjob_executor_max_workers: " + str(job_executor_max_workers))
+    logging.info("\tjob_history_size: " + str(job_history_size))
+    logging.info("\tjob_output_folder: " + str(job_output_folder))
+    logging.info("\tjob_output_max_read_size: " + str(job_output_max_read_size))
+    logging.info("\tprocess_output_max_memory_size: " + str(process_output_max_memory_size))
+    logging.info("\tprocess_output_folder: " + str(process_output_folder))
+    logging.info("\tprocess_output_history_size: " + str(process_output_history_size))
+    logging.info("\tprocess_output_max_read_size: " + str(process_output_max_read_size))
+    logging.info("\tcli_worker_pool_enabled: " + str(cli_worker_pool_enabled))
+    logging.info("\tcli_worker_pool_size: " + str(cli_worker_pool_size))
+    logging.info("\tcli_worker_max_jobs: " + str(cli_worker_max_jobs))
+    logging.info("\tcli_worker_max_memory_mb: " + str(cli_worker_max_memory_mb))
+    logging.info("\tcli_worker_acquire_timeout: " + str(cli_worker_acquire_timeout))
+    logging.info("\tcli_worker_execute_timeout: " + str(cli_worker_execute_timeout))
+    logging.info("\tbatch_max_parallelism: " + str(batch_max_parallelism))
+    logging.info("\tbatch_max_items: " + str(batch_max_items))
+    logging.info("\tbulk_state_max_keys: " + str(bulk_state_max_keys))
+    logging.info("\tconnections_query_max_limit: " + str(connections_query_max_limit))
+    logging.info("\tconnections_bulk_max_items: " + str(connections_bulk_max_items))
+    logging.info("\ttrigger_dags_max_items: " + str(trigger_dags_max_items))
+    logging.info("\ttask_log_filename_template: " + str(task_log_filename_template))
+    logging.info("\ttask_log_max_read_size: " + str(task_log_max_read_size))
+    logging.info("\ttask_log_follow_poll_interval: " + str(task_log_follow_poll_interval))
+    logging.info("\ttask_log_follow_max_timeout: " + str(task_log_follow_max_timeout))
+    logging.info("\tvariables_import_max_items: " + str(variables_import_max_items))
+    logging.info("\tvariables_export_batch_size: " + str(variables_export_batch_size))
+    logging.info("\twatch_state_poll_interval: " + str(watch_state_poll_interval))
+    logging.info("\twatch_state_max_timeout: " + str(watch_state_max_timeout))
+    logging.info("\twatch_state_max_watchers: " + str(watch_state_max_watchers))
+    logging.info("\tdeploy_dag_parse_timeout: " + str(deploy_dag_parse_timeout))
+    logging.info("\tdeploy_dag_bundle_max_files: " + str(deploy_dag_bundle_max_files))
+    logging.info("\tdeploy_dag_bundle_max_size: " + str(deploy_dag_bundle_max_size))
+    logging.info("\tdagbag_cache_enabled: " + str(dagbag_cache_enabled))
+    logging.info("\tdagbag_cache_refresh_interval: " + str(dagbag_cache_refresh_interval))
+    logging.info("\tin_process_read_apis_enabled: " + str(in_process_read_apis_enabled))
+    logging.info("\tresponse_cache_enabled: " + str(response_cache_enabled))
+    logging.info("\tresponse_cache_backend: " + str(response_cache_backend))
+    logging.info("\tresponse_cache_max_size: " + str(response_cache_max_size))
+    logging.info("\tresponse_cache_folder: " + str(response_cache_folder))
+    logging.info("\tresponse_cache_ttls: " + str(response_cache_ttls))
+    logging.info("\tresponse_cache_dag_check_interval: " + str(response_cache_dag_check_interval))
+    logging.info("\trequest_coalescing_enabled: " + str(request_coalescing_enabled))
+    logging.info("\trequest_coalescing_across_processes: " + str(request_coalescing_across_processes))
+    logging.info("\trequest_coalescing_folder: " + str(request_coalescing_folder))
+    logging.info("\trequest_coalescing_wait_timeout: " + str(request_coalescing_wait_timeout))
+    logging.info("\tadmission_control_enabled: " + str(admission_control_enabled))
+    logging.info("\tadmission_control_max_weight: " + str(admission_control_max_weight))
+    logging.info("\tadmission_control_client_max_weight: " + str(admission_control_client_max_weight))
+    logging.info("\tadmission_control_client_rate_limit: " + str(admission_control_client_rate_limit))
+    logging.info("\tadmission_control_client_burst: " + str(admission_control_client_burst))
+    logging.info("\tadmission_control_queue_size: " + str(admission_control_queue_size))
+    logging.info("\tadmission_control_queue_timeout: " + str(admission_control_queue_timeout))
+    logging.info("\tadmission_control_weights: " + str(admission_control_weights))
+    logging.info("\tmetrics_enabled: " + str(metrics_enabled))
+    logging.info("\tmetrics_require_http_token: " + str(metrics_require_http_token))
+    logging.info("\tmetrics_histogram_buckets: " + str(metrics_histogram_buckets))
 
 """
 Metadata that defines a single API:
@@ -64,6 +238,13 @@ Metadata that defines a single API:
     "airflow_version": "{string}",          # Version the API was available in to allow people to better determine if the API is available. (to be displayed on the Admin page)
     "http_method": "{string}",              # HTTP method to use when calling the function. (Default: GET) (Optional)
     "background_mode": {boolean},           # Whether to run the process in the background if its a CLI API (Optional)
+    "batch_enabled": {boolean},             # Whether the API can be called as an item of a batch. APIs with the POST http_method can never be. (Default: True) (Optional)
+    "cache_ttl": {int},                     # Seconds the output of the CLI API can be served from the response cache when it's enabled. Can be overridden with the RESPONSE_CACHE_TTLS config. (Default: 0, not cached) (Optional)
+    "cache_mutating_arguments": [],         # Names of the arguments that make the call change something. Such calls are never cached and they invalidate the cached responses of the API. (Optional)
+    "cache_depends_on_dags": {boolean},     # Whether the cached responses of the API are invalidated when the DAG files change or a DAG is deployed/refreshed (Optional)
+    "validate_dag_id": {boolean},           # Whether the dag_id argument is checked against the DagBag before the API is executed. (Default: True) (Optional)
+    "coalesce": {boolean},                  # Whether identical calls of the CLI API running at the same time share a single execution. Calls with cache_mutating_arguments never do. (Default: False) (Optional)
+    "admission_weight": {int},              # Share of the admission control limits a call of the API takes while it runs. 0 lets the calls through without limits. Can be overridden with the ADMISSION_CONTROL_WEIGHTS config. (Default: 1) (Optional)
     "arguments": [                          # List of arguments that can be provided to the API
         {
             "name": "{string}",             # Name of the argument
@@ -100,6 +281,7 @@ apis_metadata = [
         "description": "Displays the version of Airflow you're using",
         "airflow_version": "1.0.0 or greater",
         "http_method": "GET",
+        "admission_weight": 0,
         "arguments": []
     },
     {
@@ -107,6 +289,7 @@ apis_metadata = [
         "description": "Displays the version of this REST API Plugin you're using",
         "airflow_version": "None - Custom API",
         "http_method": "GET",
+        "admission_weight": 0,
         "arguments": []
     },
     {
@@ -114,6 +297,9 @@ apis_metadata = [
         "description": "Render a task instance's template(s)",
         "airflow_version": "1.7.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 300,
+        "cache_depends_on_dags": True,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -126,6 +312,9 @@ apis_metadata = [
         "description": "CRUD operations on variables",
         "airflow_version": "1.7.1 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 30,
+        "cache_mutating_arguments": ["set", "import", "export", "delete"],
         "arguments": [
             {"name": "set", "description": "Set a variable. Expected input in the form: KEY VALUE.", "form_input_type": "text", "required": False},
             {"name": "get", "description": "Get value of a variable", "form_input_type": "text", "required": False},
@@ -136,11 +325,37 @@ apis_metadata = [
             {"name": "delete", "description": "Delete a variable", "form_input_type": "text", "required": False}
         ]
     },
+    {
+        "name": "variables_import",
+        "description": "Create or update many variables at once in one transaction",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "post_body_description": "JSON object of {\"{KEY}\": {VALUE}} (Content-Type: application/json) or the same object in the 'variables' form field - REQUIRED",
+        "arguments": [
+            {"name": "prefix", "description": "Only import the variables whose key starts with this prefix", "form_input_type": "text", "required": False}
+        ],
+        "post_arguments": [
+            {"name": "variables", "description": "JSON object of the variables to import", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "variables_export",
+        "description": "Export the variables as a streamed JSON object",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "batch_enabled": False,
+        "arguments": [
+            {"name": "prefix", "description": "Only export the variables whose key starts with this prefix", "form_input_type": "text", "required": False}
+        ]
+    },
     {
         "name": "connections",
         "description": "List/Add/Delete connections",
         "airflow_version": "1.8.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 30,
+        "cache_mutating_arguments": ["add", "delete"],
         "arguments": [
             {"name": "list", "description": "List all connections", "form_input_type": "checkbox", "required": False},
             {"name": "add", "description": "Add a connection", "form_input_type": "checkbox", "required": False},
@@ -150,6 +365,30 @@ apis_metadata = [
             {"name": "conn_extra", "description": "Connection 'Extra' field, optional when adding a connection", "form_input_type": "text", "required": False}
         ]
     },
+    {
+        "name": "connections_query",
+        "description": "List the connections page by page with their fields as JSON",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "arguments": [
+            {"name": "prefix", "description": "Only list the connections whose conn_id starts with this prefix", "form_input_type": "text", "required": False},
+            {"name": "conn_type", "description": "Only list the connections of this type or of one of these comma separated types", "form_input_type": "text", "required": False},
+            {"name": "fields", "description": "Comma separated list of the fields to return (Default: every field but extra)", "form_input_type": "text", "required": False},
+            {"name": "limit", "description": "Maximum number of connections to return (Default: 100)", "form_input_type": "text", "required": False},
+            {"name": "cursor", "description": "The next_cursor of the previous page", "form_input_type": "text", "required": False}
+        ]
+    },
+    {
+        "name": "connections_bulk",
+        "description": "Add and delete many connections at once in one transaction",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "post_body_description": "JSON object with an 'add' list of {\"conn_id\": \"{CONN_ID}\", \"conn_uri\": \"{CONN_URI}\", \"conn_extra\": {EXTRA}} objects (or conn_type, host, login, password, schema and port instead of conn_uri) and a 'delete' list of conn_ids (Content-Type: application/json) or the same object in the 'connections' form field - REQUIRED",
+        "arguments": [],
+        "post_arguments": [
+            {"name": "connections", "description": "JSON object of the connections to add and delete", "form_input_type": "text", "required": True}
+        ]
+    },
     {
         "name": "pause",
         "description": "Pauses a DAG",
@@ -175,6 +414,7 @@ apis_metadata = [
         "description": "Returns the unmet dependencies for a task instance from the perspective of the scheduler. In other words, why a task instance doesn't get scheduled and then queued by the scheduler, and then run by an executor).",
         "airflow_version": "1.8.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -182,9 +422,9 @@ apis_metadata = [
             {"name": "subdir", "description": "File location or directory from which to look for the dag", "form_input_type": "text", "required": False}
         ]
     },
-    {   # todo: should print out the run id
+    {
         "name": "trigger_dag",
-        "description": "Trigger a DAG run",
+        "description": "Trigger a DAG run (use trigger_dags to get the run_id of the created DAG run back)",
         "airflow_version": "1.6.0 or greater",
         "http_method": "GET",
         "arguments": [
@@ -200,6 +440,7 @@ apis_metadata = [
         "description": "Test a task instance. This will run a task without checking for dependencies or recording it's state in the database.",
         "airflow_version": "0.1 or greater",
         "http_method": "GET",
+        "admission_weight": 2,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -214,6 +455,7 @@ apis_metadata = [
         "description": "Get the status of a dag run",
         "airflow_version": "1.8.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "execution_date", "description": "The execution date of the DAG (Example: 2017-01-02T03:04:05)", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -225,6 +467,7 @@ apis_metadata = [
         "description": "Run a single task instance",
         "airflow_version": "1.0.0 or greater",
         "http_method": "GET",
+        "admission_weight": 2,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -247,6 +490,9 @@ apis_metadata = [
         "description": "List the tasks within a DAG",
         "airflow_version": "0.1 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 60,
+        "cache_depends_on_dags": True,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "tree", "description": "Tree view", "form_input_type": "checkbox", "required": False},
@@ -258,6 +504,7 @@ apis_metadata = [
         "description": "Run subsections of a DAG for a specified date range",
         "airflow_version": "0.1 or greater",
         "http_method": "GET",
+        "admission_weight": 4,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_regex", "description": "The regex to filter specific task_ids to backfill (optional)", "form_input_type": "text", "required": False},
@@ -279,6 +526,9 @@ apis_metadata = [
         "description": "List all the DAGs",
         "airflow_version": "0.1 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 60,
+        "cache_depends_on_dags": True,
         "arguments": [
             {"name": "subdir", "description": "File location or directory from which to look for the dag", "form_input_type": "text", "required": False},
             {"name": "report", "description": "Show DagBag loading report", "form_input_type": "checkbox", "required": False}
@@ -359,6 +609,7 @@ apis_metadata = [
         "description": "Get the status of a task instance",
         "airflow_version": "1.0.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True, "cli_end_position": 2},
@@ -371,6 +622,9 @@ apis_metadata = [
         "description": "CRUD operations on pools",
         "airflow_version": "1.8.0 or greater",
         "http_method": "GET",
+        "coalesce": True,
+        "cache_ttl": 30,
+        "cache_mutating_arguments": ["set", "delete"],
         "arguments": [
             {"name": "set", "description": "Set pool slot count and description, respectively. Expected input in the form: NAME SLOT_COUNT POOL_DESCRIPTION.", "form_input_type": "text", "required": False},
             {"name": "get", "description": "Get pool info", "form_input_type": "text", "required": False},
@@ -390,6 +644,7 @@ apis_metadata = [
         "description": "Clear a set of task instance, as if they never ran",
         "airflow_version": "0.1 or greater",
         "http_method": "GET",
+        "admission_weight": 2,
         "arguments": [
             {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True, "cli_end_position": 1},
             {"name": "task_regex", "description": "The regex to filter specific task_ids to backfill (optional)", "form_input_type": "text", "required": False},
@@ -406,6 +661,27 @@ apis_metadata = [
             {"name": "no_confirm", "description": "Do not request confirmation", "fixed_value": ""}
         ],
     },
+    {
+        "name": "clear_dags",
+        "description": "Clear the task instances of many DAGs at once, as if they never ran. The task instances are cleared directly in the metadata database in one transaction.",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "validate_dag_id": False,
+        "admission_weight": 2,
+        "arguments": [
+            {"name": "dag_id", "description": "The id of the dag or a comma separated list of dag ids", "form_input_type": "text", "required": False},
+            {"name": "dag_regex", "description": "The regex to filter the dag_ids to clear", "form_input_type": "text", "required": False},
+            {"name": "task_regex", "description": "The regex to filter specific task_ids to clear", "form_input_type": "text", "required": False},
+            {"name": "start_date", "description": "Override start_date YYYY-MM-DD", "form_input_type": "text", "required": False},
+            {"name": "end_date", "description": "Override end_date YYYY-MM-DD", "form_input_type": "text", "required": False},
+            {"name": "upstream", "description": "Include upstream tasks", "form_input_type": "checkbox", "required": False},
+            {"name": "downstream", "description": "Include downstream tasks", "form_input_type": "checkbox", "required": False},
+            {"name": "only_failed", "description": "Only failed jobs", "form_input_type": "checkbox", "required": False},
+            {"name": "only_running", "description": "Only running jobs", "form_input_type": "checkbox", "required": False},
+            {"name": "exclude_subdags", "description": "Exclude subdags", "form_input_type": "checkbox", "required": False},
+            {"name": "dry_run", "description": "Only count the task instances that would be cleared", "form_input_type": "checkbox", "required": False}
+        ]
+    },
     {
         "name": "deploy_dag",
         "description": "Deploy a new DAG File to the DAGs directory",
@@ -421,18 +697,293 @@ apis_metadata = [
             {"name": "unpause", "description": "The DAG will be forced to be unpaused when created and override the 'dags_are_paused_at_creation' config.", "form_input_type": "checkbox", "required": False}
         ]
     },
+    {
+        "name": "deploy_dag_bundle",
+        "description": "Deploy a tar or zip archive of DAG Files to the DAGs directory in one call",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "post_body_description": "dag_bundle - POST Body Element - REQUIRED",
+        "form_enctype": "multipart/form-data",
+        "arguments": [],
+        "post_arguments": [
+            {"name": "dag_bundle", "description": "Archive (.tar, .tar.gz, .tgz, .tar.bz2 or .zip) of Python files to upload and deploy", "form_input_type": "file", "required": True},
+            {"name": "subdir", "description": "Folder inside the DAGs directory to deploy the archive to (Default: the DAGs directory)", "form_input_type": "text", "required": False},
+            {"name": "prune", "description": "Whether to remove the Python files of the subdir that aren't in the archive. Requires subdir.", "form_input_type": "checkbox", "required": False},
+            {"name": "pause", "description": "The DAGs of the added files will be forced to be paused when created and override the 'dags_are_paused_at_creation' config.", "form_input_type": "checkbox", "required": False},
+            {"name": "unpause", "description": "The DAGs of the added files will be forced to be unpaused when created and override the 'dags_are_paused_at_creation' config.", "form_input_type": "checkbox", "required": False}
+        ]
+    },
+    {
+        "name": "dagbag_cache_stats",
+        "description": "Displays the hit/miss and reload time counters of the DagBag cache used by the REST API Plugin",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": []
+    },
+    {
+        "name": "admission_control_stats",
+        "description": "Displays the queue depth, wait time and rejection counters of the admission control of the REST API Plugin",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": []
+    },
+    {
+        "name": "job_status",
+        "description": "Get the status, exit code and duration of a job that was started with async=true or by a background API",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": [
+            {"name": "job_id", "description": "The id of the job", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "job_output",
+        "description": "Get the output (stdout and stderr) of a job starting at a byte offset",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": [
+            {"name": "job_id", "description": "The id of the job", "form_input_type": "text", "required": True},
+            {"name": "offset", "description": "Byte offset to start reading the output from (Default: 0)", "form_input_type": "text", "required": False},
+            {"name": "length", "description": "Maximum number of bytes to read (Default and maximum: job_output_max_read_size)", "form_input_type": "text", "required": False}
+        ]
+    },
+    {
+        "name": "job_cancel",
+        "description": "Cancel a queued job or terminate a running one",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": [
+            {"name": "job_id", "description": "The id of the job", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "list_jobs",
+        "description": "List the jobs known to this host, most recent first",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": [
+            {"name": "status", "description": "Only list jobs in this status (QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED)", "form_input_type": "text", "required": False}
+        ]
+    },
+    {
+        "name": "cli_output",
+        "description": "Get a range of the whole output of a CLI API call whose output was truncated because it was too large. Provide either offset and length (bytes) or start_line and line_count.",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "admission_weight": 0,
+        "arguments": [
+            {"name": "output_id", "description": "The output_id of the truncated output", "form_input_type": "text", "required": True},
+            {"name": "output_stream", "description": "stdout or stderr (Default: stdout)", "form_input_type": "text", "required": False},
+            {"name": "offset", "description": "Byte offset to start reading from (Default: 0)", "form_input_type": "text", "required": False},
+            {"name": "length", "description": "Maximum number of bytes to read (Default and maximum: process_output_max_read_size)", "form_input_type": "text", "required": False},
+            {"name": "start_line", "description": "Line number (starting at 0) to start reading from", "form_input_type": "text", "required": False},
+            {"name": "line_count", "description": "Maximum number of lines to read (at most process_output_max_read_size bytes are returned)", "form_input_type": "text", "required": False}
+        ]
+    },
+    {
+        "name": "task_log",
+        "description": "Get a byte range or the last lines of the log of a task instance, or wait for new lines with follow",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "validate_dag_id": False,
+        "batch_enabled": False,
+        "arguments": [
+            {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True},
+            {"name": "task_id", "description": "The id of the task", "form_input_type": "text", "required": True},
+            {"name": "execution_date", "description": "The execution date of the DAG (Example: 2017-01-02T03:04:05)", "form_input_type": "text", "required": True},
+            {"name": "try_number", "description": "The try of the task instance (Default: the latest one)", "form_input_type": "text", "required": False},
+            {"name": "offset", "description": "Byte offset to start reading from (Default: 0)", "form_input_type": "text", "required": False},
+            {"name": "length", "description": "Maximum number of bytes to read (Default and maximum: task_log_max_read_size)", "form_input_type": "text", "required": False},
+            {"name": "tail_lines", "description": "Read the last lines of the log instead of a byte range", "form_input_type": "text", "required": False},
+            {"name": "follow", "description": "Wait until the log has bytes after the offset or the timeout passes", "form_input_type": "checkbox", "required": False},
+            {"name": "timeout", "description": "Maximum number of seconds to wait with follow (Default and maximum: task_log_follow_max_timeout)", "form_input_type": "text", "required": False},
+            {"name": "gzip", "description": "Compress the response with gzip when the client accepts it", "form_input_type": "checkbox", "required": False}
+        ]
+    },
+    {
+        "name": "batch",
+        "description": "Execute many API calls in one request. The calls are executed concurrently and their responses are returned in the same order.",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "admission_weight": 0,
+        "batch_enabled": False,
+        "post_body_description": "JSON list of {\"api\": \"{API_NAME}\", \"arguments\": {\"{ARGUMENT_NAME}\": \"{ARGUMENT_VALUE}\"}} objects (Content-Type: application/json) or the same list in the 'items' form field - REQUIRED",
+        "arguments": [
+            {"name": "max_parallelism", "description": "Maximum number of calls executed at the same time (Default and maximum: batch_max_parallelism)", "form_input_type": "text", "required": False}
+        ],
+        "post_arguments": [
+            {"name": "items", "description": "JSON list of the API calls to execute", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "bulk_state",
+        "description": "Get the states of many task instances or dag runs with a single query. The states are returned as columns.",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "post_body_description": "JSON object with either a list of 'keys' or a 'dag_id' with an optional date range, and optional 'states' (Content-Type: application/json) or the same object in the 'query' form field - REQUIRED",
+        "arguments": [],
+        "post_arguments": [
+            {"name": "query", "description": "JSON object describing the task instances or dag runs to get the states of", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "trigger_dags",
+        "description": "Trigger many DAG runs at once. The DAG runs are created directly in the metadata database in one transaction and their run_ids are returned.",
+        "airflow_version": "None - Custom API",
+        "http_method": "POST",
+        "post_body_description": "JSON list of {\"dag_id\": \"{DAG_ID}\", \"run_id\": \"{RUN_ID}\", \"conf\": {CONF}, \"exec_date\": \"{EXECUTION_DATE}\"} objects (only dag_id is required) or a single object (Content-Type: application/json) or the same list in the 'items' form field - REQUIRED",
+        "arguments": [],
+        "post_arguments": [
+            {"name": "items", "description": "JSON list of the DAG runs to create", "form_input_type": "text", "required": True}
+        ]
+    },
+    {
+        "name": "watch_state",
+        "description": "Wait until the state of a dag run (or of some of its task instances) is different from the last known state or the timeout passes",
+        "airflow_version": "None - Custom API",
+        "http_method": "GET",
+        "batch_enabled": False,
+        "arguments": [
+            {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True},
+            {"name": "execution_date", "description": "The execution date of the DAG (Example: 2017-01-02T03:04:05)", "form_input_type": "text", "required": True},
+            {"name": "task_ids", "description": "Comma separated list of task ids to watch the task instances of instead of the dag run", "form_input_type": "text", "required": False},
+            {"name": "state", "description": "Last known state (none for no state). With task_ids, either one state for all of them or a comma separated list of states in the same order. Without it, the current state is returned right away.", "form_input_type": "text", "required": False},
+            {"name": "timeout", "description": "Maximum number of seconds to wait (Default and maximum: watch_state_max_timeout)", "form_input_type": "text", "required": False}
+        ]
+    },
     {
         "name": "refresh_dag",
-        "description": "Refresh a DAG in the Web Server",
+        "description": "Refresh DAGs in the Web Server by re-parsing only the files they're defined in",
         "airflow_version": "None - Custom API",
         "http_method": "GET",
+        "validate_dag_id": False,
         "arguments": [
-            {"name": "dag_id", "description": "The id of the dag", "form_input_type": "text", "required": True}
+            {"name": "dag_id", "description": "The id of the dag or a comma separated list of dag ids", "form_input_type": "text", "required": False},
+            {"name": "file_path", "description": "Path of a DAG file relative to the DAGs folder or a comma separated list of them", "form_input_type": "text", "required": False}
         ]
     }
 ]
 
 
+# An API from the apis_metadata compiled into the pieces needed to validate and execute it, so that a request doesn't
+# need to walk the metadata again
+class REST_API_Compiled_API(object):
+
+    def __init__(self, api_metadata, handler=None):
+        self.name = api_metadata["name"]
+        self.metadata = api_metadata
+        self.handler = handler  # function(rest_api_view, base_response, arguments) of custom APIs. None for CLI APIs.
+        self.background_mode = bool(api_metadata.get("background_mode", False))
+        arguments = api_metadata.get("arguments", [])
+        self.required_arguments = [argument["name"] for argument in arguments if argument.get("required")]
+        self.has_dag_id_argument = any([argument["name"] == "dag_id" for argument in arguments]) and api_metadata.get("validate_dag_id", True)
+
+        # (slot index, argument name) of the arguments that go at the end of the CLI command, and the number of slots
+        end_arguments = [argument for argument in arguments if argument.get("cli_end_position") is not None]
+        self.end_argument_slots = [(argument["cli_end_position"] - 1, argument["name"]) for argument in end_arguments]
+        self.end_argument_slot_count = max([argument["cli_end_position"] for argument in end_arguments] or [0])
+
+        # (flag, argument name, whether the value is passed on) of the arguments passed to the CLI command as --{name} flags
+        self.flag_arguments = [("--" + argument["name"], argument["name"], argument.get("form_input_type") != "checkbox") for argument in arguments if argument.get("cli_end_position") is None]
+
+        # the fixed arguments that always go into the CLI command
+        self.fixed_arguments_split = []
+        for fixed_argument in api_metadata.get("fixed_arguments", []):
+            fixed_argument_value = fixed_argument.get("fixed_value")
+            if fixed_argument_value is not None:
+                self.fixed_arguments_split.append("--" + fixed_argument["name"])
+                if fixed_argument_value:
+                    self.fixed_arguments_split.extend(fixed_argument_value.split(" "))
+
+        # how the output of the API is cached by the response cache
+        self.argument_names = [argument["name"] for argument in arguments]
+        self.checkbox_argument_names = set([argument["name"] for argument in arguments if argument.get("form_input_type") == "checkbox"])
+        self.cache_ttl = response_cache_ttls.get(self.name, api_metadata.get("cache_ttl", 0))
+        self.cache_mutating_arguments = api_metadata.get("cache_mutating_arguments", [])
+        self.cache_depends_on_dags = bool(api_metadata.get("cache_depends_on_dags", False))
+
+        # whether identical calls running at the same time share a single execution (see REST_API_Request_Coalescer)
+        self.coalesce = bool(api_metadata.get("coalesce", False))
+
+        # share of the admission control limits a call takes while it runs
+        self.admission_weight = admission_control_weights.get(self.name, api_metadata.get("admission_weight", 1))
+
+    # Get the names of the required arguments that weren't provided
+    def get_missing_required_arguments(self, arguments):
+        return [argument_name for argument_name in self.required_arguments if REST_API.is_arg_not_provided(arguments.get(argument_name))]
+
+    # Assemble the airflow CLI command as a list from the arguments
+    def build_cli_command(self, arguments):
+        airflow_cmd_split = ["airflow", self.name]
+        for flag, argument_name, takes_value in self.flag_arguments:
+            argument_value = arguments.get(argument_name)
+            if argument_value is not None:
+                airflow_cmd_split.append(flag)
+                if takes_value:
+                    airflow_cmd_split.extend(argument_value.split(" "))
+        airflow_cmd_split.extend(self.fixed_arguments_split)
+        end_arguments = [None] * self.end_argument_slot_count
+        for slot_index, argument_name in self.end_argument_slots:
+            end_arguments[slot_index] = arguments.get(argument_name)
+        airflow_cmd_split.extend([argument_value for argument_value in end_arguments if argument_value is not None])
+        return airflow_cmd_split
+
+    # Whether the call changes something (like 'pool --set') so it must not be served from the response cache
+    def is_mutating_call(self, arguments):
+        return any([arguments.get(argument_name) is not None for argument_name in self.cache_mutating_arguments])
+
+    # Get the key of the call in the response cache. Only the arguments that end up in the CLI command are part of it and
+    # the value of checkbox arguments doesn't matter, so calls producing the same command share the same key.
+    def get_cache_key(self, arguments):
+        key_arguments = []
+        for argument_name in self.argument_names:
+            argument_value = arguments.get(argument_name)
+            if argument_value is not None:
+                key_arguments.append([argument_name, True if argument_name in self.checkbox_argument_names else argument_value])
+        return self.name + " " + json.dumps(key_arguments)
+
+
+# Index of the compiled APIs by name. Filled up from the apis_metadata when the plugin is loaded and the handlers of the
+# custom APIs are registered once the REST_API view is defined. Other plugins can add their own APIs with register_api().
+class REST_API_Registry(object):
+
+    def __init__(self, apis_metadata):
+        self.apis = {}
+        for api_metadata in apis_metadata:
+            self.apis[api_metadata["name"]] = REST_API_Compiled_API(api_metadata)
+
+    # Get the compiled API or None if there is no such API
+    def get(self, api):
+        return self.apis.get(api)
+
+    # Add (or replace) an API. Leave the handler out for CLI APIs.
+    def register(self, api_metadata, handler=None):
+        self.apis[api_metadata["name"]] = REST_API_Compiled_API(api_metadata, handler)
+
+    # Set the handler of an API that is already registered
+    def set_handler(self, api, handler):
+        self.apis[api].handler = handler
+
+
+# Compiling the apis_metadata when the plugin is loaded
+api_registry = REST_API_Registry(apis_metadata)
+
+
+# Add a new API to the REST API Plugin. The api_metadata follows the API Object definition described above the
+# apis_metadata. The handler is a function(rest_api_view, base_response, arguments) that returns the response of the API
+# (see REST_API_Response_Util). Leave the handler out to execute the API as an airflow CLI command.
+def register_api(api_metadata, handler=None):
+    apis_metadata[:] = [existing_api_metadata for existing_api_metadata in apis_metadata if existing_api_metadata["name"] != api_metadata["name"]]
+    apis_metadata.append(api_metadata)
+    api_registry.register(api_metadata, handler)
+
+
 # Function used to secure the REST ENDPOINT
 def http_token_secure(func):
     def secure_check(arg):
@@ -475,14 +1026,30 @@ class REST_API_Response_Util():
             final_response["http_response_code"] = http_response_code
         if warning:
             final_response["warning"] = warning
-        return jsonify(final_response)
+        timings = final_response.pop("timings", None)
+        if isinstance(timings, REST_API_Timings) and timings.include_in_response:
+            # the response is only serialized once, so its timings don't include the serialization (only the metrics do)
+            final_response["timings"] = timings.to_dict()
+        start_time = time.time()
+        response = jsonify(final_response)
+        if isinstance(timings, REST_API_Timings):
+            timings.record("serialization", time.time() - start_time)
+        return response
 
     # Set the Base Response as a 200 HTTP Response object
     @staticmethod
     def get_200_response(base_response, output=None, airflow_cmd=None, warning=None):
-        logging.info("Returning a 200 Response Code with response '" + str(output) + "'")
+        logging.info("Returning a 200 Response Code with response '" + REST_API_Response_Util.get_log_excerpt(output) + "'")
         return REST_API_Response_Util._get_final_response(base_response=base_response, output=output, airflow_cmd=airflow_cmd, warning=warning)
 
+    # Get the start of the output to log so that large outputs don't end up in the logs as a whole
+    @staticmethod
+    def get_log_excerpt(output, max_length=1000):
+        output = str(output)
+        if len(output) > max_length:
+            return output[:max_length] + "... (" + str(len(output) - max_length) + " more characters)"
+        return output
+
     # Set the Base Response and an Error
     @staticmethod
     def _get_error_response(base_response, error_code, output=None):
@@ -501,6 +1068,25 @@ class REST_API_Response_Util():
         logging.warning("Returning a 403 Response Code with response '" + str(output) + "'")
         return REST_API_Response_Util._get_error_response(base_response, 403, output)
 
+    # Set the Base Response as a 429 HTTP Response object telling the client to retry after a number of seconds
+    @staticmethod
+    def get_429_error_response(base_response, output=None, retry_after=1):
+        logging.warning("Returning a 429 Response Code with response '" + str(output) + "'")
+        response, error_code = REST_API_Response_Util._get_error_response(base_response, 429, output)
+        response.headers["Retry-After"] = str(retry_after)
+        return response, error_code
+
+    # Compress the body of the response with gzip if the client accepts it
+    @staticmethod
+    def get_gzip_response(response):
+        if "gzip" not in request.headers.get("Accept-Encoding", "").lower():
+            return response
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        response.set_data(compressor.compress(response.get_data()) + compressor.flush())
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
     # Set the Base Response as a 500 HTTP Response object
     @staticmethod
     def get_500_error_response(base_response, output=None):
@@ -508,288 +1094,3789 @@ class REST_API_Response_Util():
         return REST_API_Response_Util._get_error_response(base_response, 500, output)
 
 
-# REST_API View which extends the flask_admin BaseView
-class REST_API(BaseView):
+# Registry of the metrics of the REST API Plugin exposed in the Prometheus text format by the '/metrics' endpoint.
+# Counters and gauges hold a value and histograms hold the observations in buckets, per set of labels. Collectors are
+# functions called when the metrics are rendered that return (name, type, help, labels, value) tuples of values that
+# are kept somewhere else (like the counters of the caches). The metrics are per web server process.
+class REST_API_Metrics(object):
+
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+
+    def __init__(self, enabled, buckets):
+        self.enabled = enabled
+        self.buckets = sorted(buckets)
+        self.lock = threading.Lock()
+        self.metrics = collections.OrderedDict()  # name -> {"type", "help", "values": labels key -> value or histogram}
+        self.collectors = []
+
+    # Declare a metric so it can be updated
+    def define(self, name, metric_type, help_text):
+        self.metrics[name] = {"type": metric_type, "help": help_text, "values": collections.OrderedDict()}
+
+    # Add a function returning a list of (name, type, help, labels, value) tuples to be rendered along with the metrics
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    # Increment a counter or a gauge (use a negative value to decrement a gauge)
+    def inc(self, name, labels=None, value=1):
+        if not self.enabled:
+            return
+        labels_key = self._get_labels_key(labels)
+        with self.lock:
+            values = self.metrics[name]["values"]
+            values[labels_key] = values.get(labels_key, 0) + value
+
+    # Add an observation (in seconds) to a histogram
+    def observe(self, name, labels, value):
+        if not self.enabled:
+            return
+        labels_key = self._get_labels_key(labels)
+        with self.lock:
+            values = self.metrics[name]["values"]
+            histogram = values.get(labels_key)
+            if histogram is None:
+                histogram = values[labels_key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            # only the first bucket the value fits in is incremented. They're made cumulative when rendered.
+            histogram["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    # Get the metrics in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, metric in self.metrics.items():
+                lines.append("# HELP " + name + " " + metric["help"])
+                lines.append("# TYPE " + name + " " + metric["type"])
+                for labels_key, value in metric["values"].items():
+                    if metric["type"] == self.HISTOGRAM:
+                        cumulative_count = 0
+                        for bucket, bucket_count in zip(self.buckets + [float("inf")], value["buckets"]):
+                            cumulative_count += bucket_count
+                            bucket_labels_key = labels_key + (("le", "+Inf" if bucket == float("inf") else repr(bucket)),)
+                            lines.append(name + "_bucket" + self._format_labels(bucket_labels_key) + " " + str(cumulative_count))
+                        lines.append(name + "_sum" + self._format_labels(labels_key) + " " + repr(value["sum"]))
+                        lines.append(name + "_count" + self._format_labels(labels_key) + " " + str(value["count"]))
+                    else:
+                        lines.append(name + self._format_labels(labels_key) + " " + self._format_value(value))
+
+        collected_metrics = collections.OrderedDict()
+        for collector in self.collectors:
+            try:
+                for name, metric_type, help_text, labels, value in collector():
+                    collected_metrics.setdefault((name, metric_type, help_text), []).append((self._get_labels_key(labels), value))
+            except Exception as e:
+                logging.error("Failed to collect metrics: " + str(e))
+        for (name, metric_type, help_text), values in collected_metrics.items():
+            lines.append("# HELP " + name + " " + help_text)
+            lines.append("# TYPE " + name + " " + metric_type)
+            for labels_key, value in values:
+                lines.append(name + self._format_labels(labels_key) + " " + self._format_value(value))
+        return "\n".join(lines) + "\n"
 
-    # Checks a string object to see if it is none or empty so we can determine if an argument (passed to the rest api) is provided
     @staticmethod
-    def is_arg_not_provided(arg):
-        return arg is None or arg == ""
+    def _get_labels_key(labels):
+        return tuple(sorted((labels or {}).items()))
 
-    # Get the DagBag which has a list of all the current Dags
     @staticmethod
-    def get_dagbag():
-        return DagBag()
+    def _format_labels(labels_key):
+        if not labels_key:
+            return ""
+        escaped_labels = []
+        for label_name, label_value in labels_key:
+            label_value = str(label_value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+            escaped_labels.append(label_name + "=\"" + label_value + "\"")
+        return "{" + ",".join(escaped_labels) + "}"
 
-    # '/' Endpoint where the Admin page is which allows you to view the APIs available and trigger them
-    @expose('/')
-    def index(self):
-        logging.info("REST_API.index() called")
+    @staticmethod
+    def _format_value(value):
+        return repr(float(value)) if isinstance(value, float) else str(value)
 
-        # get the information that we want to display on the page regarding the dags that are available
-        dagbag = self.get_dagbag()
-        dags = []
-        for dag_id in dagbag.dags:
-            orm_dag = DagModel.get_current(dag_id)
-            dags.append({
-                "dag_id": dag_id,
-                "is_active": (not orm_dag.is_paused) if orm_dag is not None else False
-            })
 
-        return self.render("rest_api_plugin/index.html",
-                           dags=dags,
-                           airflow_webserver_base_url=airflow_webserver_base_url,
-                           rest_api_endpoint=rest_api_endpoint,
-                           apis_metadata=apis_metadata,
-                           airflow_version=airflow_version,
-                           rest_api_plugin_version=rest_api_plugin_version
-                           )
+# Timings of the phases of a single API call (validation, dagbag, execution, filtering and serialization). The time of
+# a phase doesn't include the phases measured while it was running, so the phases add up to the total time of the call.
+# The timings are passed along with the base response and every phase is also recorded in the metrics.
+class REST_API_Timings(object):
 
-    # '/api' REST Endpoint where API requests should all come in
-    @csrf.exempt  # Exempt the CSRF token
-    @expose('/api', methods=["GET", "POST"])
-    @http_token_secure  # On each request,
-    def api(self):
-        base_response = REST_API_Response_Util.get_base_response()
+    def __init__(self, api, include_in_response=False):
+        self.api = api
+        self.include_in_response = include_in_response  # whether the 'timings' are added to the response
+        self.start_time = time.time()
+        self.phases = collections.OrderedDict()
+        self.running_phases = []  # [phase, start time, time spent in nested phases] of the phases being measured
 
-        # Get the api that you want to execute
-        api = request.args.get('api')
-        if api is not None:
-            api = api.strip().lower()
-        logging.info("REST_API.api() called (api: " + str(api) + ")")
+    # Record the time spent in a phase. nested_seconds is the part of it that was already recorded by nested phases.
+    def record(self, phase, seconds, nested_seconds=0.0):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds - nested_seconds
+        metrics.observe("rest_api_phase_duration_seconds", {"api": self.api, "phase": phase}, seconds - nested_seconds)
+        if self.running_phases:
+            self.running_phases[-1][2] += seconds
 
-        # Validate that the API is provided
-        if self.is_arg_not_provided(api):
-            logging.warning("api argument not provided")
-            return REST_API_Response_Util.get_400_error_response(base_response, "API should be provided")
-
-        # Get the api_metadata from the api object list that correcsponds to the api we want to run to get the metadata.
-        api_metadata = None
-        for test_api_metadata in apis_metadata:
-            if test_api_metadata["name"] == api:
-                api_metadata = test_api_metadata
-        if api_metadata is None:
-            logging.info("api '" + str(api) + "' was not found in the apis list in the REST API Plugin")
-            return REST_API_Response_Util.get_400_error_response(base_response, "API '" + str(api) + "' was not found")
-
-        # check if all the required arguments are provided
-        missing_required_arguments = []
-        dag_id = None
-        for argument in api_metadata["arguments"]:
-            argument_name = argument["name"]
-            argument_value = request.args.get(argument_name)
-            if argument["required"]:
-                if self.is_arg_not_provided(argument_value):
-                    missing_required_arguments.append(argument_name)
-            if argument_name == "dag_id" and argument_value is not None:
-                dag_id = argument_value.strip()
-        if len(missing_required_arguments) > 0:
-            logging.warning("Missing required arguments: " + str(missing_required_arguments))
-            return REST_API_Response_Util.get_400_error_response(base_response, "The argument(s) " + str(missing_required_arguments) + " are required")
+    # Get the timings (in seconds) as they are shown in the response. The response is serialized while some phases are
+    # still running (like the execution of custom APIs) so they're included up to now.
+    def to_dict(self):
+        now = time.time()
+        phases = collections.OrderedDict(self.phases)
+        for phase, start_time, nested_seconds in self.running_phases:
+            phases[phase] = phases.get(phase, 0.0) + now - start_time - nested_seconds
+        timings = collections.OrderedDict([(phase, round(seconds, 6)) for phase, seconds in phases.items()])
+        timings["total"] = round(now - self.start_time, 6)
+        return timings
 
-        # Check to make sure that the DAG you're referring to, already exists.
-        dag_bag = self.get_dagbag()
-        if dag_id is not None and dag_id not in dag_bag.dags:
-            logging.info("DAG_ID '" + str(dag_id) + "' was not found in the DagBag list '" + str(dag_bag.dags) + "'")
-            return REST_API_Response_Util.get_400_error_response(base_response, "The DAG ID '" + str(dag_id) + "' does not exist")
-
-        # Deciding which function to use based off the API object that was requested. Some functions are custom and need to be manually routed to.
-        if api == "version":
-            final_response = self.version(base_response)
-        elif api == "rest_api_plugin_version":
-            final_response = self.rest_api_plugin_version(base_response)
-        elif api == "deploy_dag":
-            final_response = self.deploy_dag(base_response)
-        elif api == "refresh_dag":
-            final_response = self.refresh_dag(base_response)
-        else:
-            final_response = self.execute_cli(base_response, api_metadata)
+    # Measure the code run within the 'with' block as a phase of the call the base response belongs to
+    @staticmethod
+    @contextlib.contextmanager
+    def measure(base_response, phase):
+        timings = base_response.get("timings")
+        if not isinstance(timings, REST_API_Timings):
+            yield
+            return
+        running_phase = [phase, time.time(), 0.0]
+        timings.running_phases.append(running_phase)
+        try:
+            yield
+        finally:
+            timings.running_phases.pop()
+            timings.record(phase, time.time() - running_phase[1], running_phase[2])
 
-        return final_response
 
-    # General execution of a CLI command
-    # A command will be assembled and then passed to the OS as a commandline function and the results will be returned
-    def execute_cli(self, base_response, api_metadata):
-        logging.info("Executing cli function")
+# Process-wide cache of the DagBag so that every request doesn't have to parse the entire DAGS_FOLDER.
+# The first call fills up the DagBag as normal. Later calls only stat the files in the DAGS_FOLDER and re-parse the ones
+# whose mtime or size changed since they were last seen (or were explicitly invalidated) and drop the DAGs of removed files.
+class REST_API_DagBag_Cache(object):
 
-        # getting the largest cli_end_position in the api_metadata object so that the cli function can be assembled
-        largest_end_argument_value = 0
-        for argument in api_metadata.get("arguments", []):
-            if argument.get("cli_end_position") is not None and argument["cli_end_position"] > largest_end_argument_value:
-                largest_end_argument_value = argument["cli_end_position"]
-
-        # starting to create the airflow_cmd function
-        airflow_cmd_split = ["airflow", api_metadata["name"]]
-
-        # appending arguments to the airflow_cmd_split array and setting arguments aside in the end_arguments array to be appended onto the end of airflow_cmd_split
-        end_arguments = [0] * largest_end_argument_value
-        for argument in api_metadata["arguments"]:
-            argument_name = argument["name"]
-            argument_value = request.args.get(argument_name)
-            logging.info("argument_name: " + str(argument_name) + ", argument_value: " + str(argument_value))
-            if argument_value is not None:
-                # if the argument should be appended onto the end, find the position and add it to the end_arguments array
-                if "cli_end_position" in argument:
-                    logging.info("argument['cli_end_position']: " + str(argument['cli_end_position']))
-                    end_arguments[argument["cli_end_position"]-1] = argument_value
-                else:
-                    airflow_cmd_split.extend(["--" + argument_name])
-                    if argument["form_input_type"] is not "checkbox":
-                        airflow_cmd_split.extend(argument_value.split(" "))
+    def __init__(self, dag_folder, refresh_interval=0, version_check_interval=0):
+        self.dag_folder = dag_folder
+        self.refresh_interval = refresh_interval  # seconds to trust the cached DagBag before re-scanning the folder (0 = scan on every call)
+        self.version_check_interval = version_check_interval  # minimum seconds between two scans of get_dag_folder_version()
+        self.lock = threading.RLock()
+        self.dagbag = None
+        self.file_signatures = {}  # filepath -> (mtime, size) of the files the current DagBag was filled from
+        self.file_dags = {}  # filepath -> DAGs that were loaded from the file
+        self.stale_files = set()
+        self.last_scan_time = 0
+        self.dag_folder_version = None
+        self.last_version_time = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "full_loads": 0,
+            "files_reparsed": 0,
+            "files_removed": 0,
+            "invalidations": 0,
+            "last_reload_seconds": 0.0,
+            "total_reload_seconds": 0.0
+        }
+
+    # Get the cached DagBag, refreshing the files that changed since the last call
+    def get_dagbag(self):
+        with self.lock:
+            if self.dagbag is None:
+                self._full_load()
+            elif self.refresh_interval and not self.stale_files and time.time() - self.last_scan_time < self.refresh_interval:
+                self.stats["hits"] += 1
             else:
-                logging.warning("argument_value is null")
+                self._incremental_refresh()
+            return self.dagbag
 
-        # appending fixed arguments that should always be provided to the APIs
-        for fixed_argument in api_metadata.get("fixed_arguments", []):
-            fixed_argument_name = fixed_argument["name"]
-            fixed_argument_value = fixed_argument.get("fixed_value")
-            logging.info("fixed_argument_name: " + str(fixed_argument_name) + ", fixed_argument_value: " + str(fixed_argument_value))
-            if fixed_argument_value is not None:
-                airflow_cmd_split.extend(["--" + fixed_argument_name])
-                if fixed_argument_value:
-                    airflow_cmd_split.extend(fixed_argument_value.split(" "))
+    # Mark a file so it will be re-parsed on the next call. If no file is provided, the whole DagBag will be reloaded.
+    def invalidate(self, filepath=None):
+        with self.lock:
+            self.stats["invalidations"] += 1
+            self.dag_folder_version = None
+            if filepath is None:
+                logging.info("Invalidating the whole DagBag cache")
+                self.dagbag = None
+                self.file_signatures = {}
+                self.file_dags = {}
+                self.stale_files = set()
+            else:
+                logging.info("Invalidating the DagBag cache for file '" + str(filepath) + "'")
+                self.stale_files.add(os.path.abspath(filepath))
 
-        # appending the end_arguments to the very end
-        airflow_cmd_split.extend(end_arguments)
+    # Mark the file the DAG was loaded from so it will be re-parsed on the next call
+    def invalidate_dag(self, dag_id):
+        with self.lock:
+            dag = self.dagbag.dags.get(dag_id) if self.dagbag is not None else None
+            filepath = self._get_dag_filepath(dag) if dag is not None else None
+        self.invalidate(filepath)
 
-        run_api_in_background_mode = "background_mode" in api_metadata and api_metadata["background_mode"]
+    # Get a copy of the counters along with the current size of the cache
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["loaded"] = self.dagbag is not None
+            stats["dag_count"] = len(self.dagbag.dags) if self.dagbag is not None else 0
+            stats["tracked_files"] = len(self.file_signatures)
+            stats["stale_files"] = len(self.stale_files)
+            stats["dag_folder"] = self.dag_folder
+            stats["refresh_interval"] = self.refresh_interval
+            return stats
 
-        # handling the case where the process should be ran in the background
-        if run_api_in_background_mode:
-            # if a log file is provided, then that should be used to dump the output of the call
-            if request.args.get("log-file") is None:
-                airflow_cmd_split.append(">> " + str(airflow_base_log_folder) + "/" + api_metadata["name"] + ".log")
-            # appending a '&' character to run the process in the background
-            airflow_cmd_split.append("&")
+    # Re-parse the given files right away and update the cached DagBag in place. Files that don't exist anymore have their
+    # DAGs removed. Returns a dict per file with the DAGs found in it, the time it took to parse it and its import error.
+    def refresh_files(self, filepaths):
+        with self.lock:
+            if self.dagbag is None:
+                self._full_load()
+            start_time = time.time()
+            results = []
+            for filepath in filepaths:
+                filepath = os.path.abspath(filepath)
+                file_start_time = time.time()
+                self._forget_file(filepath)
+                self.stale_files.discard(filepath)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    self.file_signatures.pop(filepath, None)
+                    dags = []
+                else:
+                    self.file_signatures[filepath] = (stat.st_mtime, stat.st_size)
+                    dags = self._process_file(filepath)
+                results.append({
+                    "file_path": filepath,
+                    "dags": dags,
+                    "parse_seconds": time.time() - file_start_time,
+                    "import_error": self.dagbag.import_errors.get(filepath)
+                })
+            self.dag_folder_version = None
+            self.stats["files_reparsed"] += len(results)
+            self._record_reload_time(start_time)
+            return results
 
-        # joining all the individual arguments and components into a single string
-        airflow_cmd = " ".join(airflow_cmd_split)
+    # Get the file the DAG was loaded from or None if the cached DagBag doesn't have the DAG
+    def get_dag_filepath(self, dag_id):
+        with self.lock:
+            dag = self.dagbag.dags.get(dag_id) if self.dagbag is not None else None
+            return self._get_dag_filepath(dag) if dag is not None else None
 
-        logging.info("airflow_cmd array: " + str(airflow_cmd_split))
-        logging.info("airflow_cmd: " + str(airflow_cmd))
+    # Get a version of the DAG files that changes whenever one is added, removed or modified. Unlike get_dagbag(), this
+    # doesn't parse anything. The folder is scanned at most once every refresh_interval or version_check_interval seconds
+    # (whichever is longer) unless the cache was invalidated, so that the cached lookups don't each walk the folder.
+    def get_dag_folder_version(self):
+        with self.lock:
+            check_interval = max(self.refresh_interval, self.version_check_interval)
+            if self.dag_folder_version is None or not check_interval or time.time() - self.last_version_time >= check_interval:
+                self.last_version_time = time.time()
+                file_signatures = sorted(self._scan_dag_folder().items())
+                self.dag_folder_version = hashlib.sha1(str(file_signatures).encode("utf-8")).hexdigest()
+            return self.dag_folder_version
 
-        # execute the airflow command a certain way if its meant to be ran in the background
-        if run_api_in_background_mode:
-            output = self.execute_cli_command_background_mode(airflow_cmd)
-        else:
-            output = self.execute_cli_command(airflow_cmd_split)
+    def _full_load(self):
+        logging.info("Filling up the cached DagBag from '" + str(self.dag_folder) + "'")
+        start_time = time.time()
+        # the signatures are taken before parsing so that a file changing during the load is picked up by the next call
+        file_signatures = self._scan_dag_folder()
+        self.dagbag = DagBag()
+        self.file_signatures = file_signatures
+        self.file_dags = {}
+        for dag in self.dagbag.dags.values():
+            self.file_dags.setdefault(self._get_dag_filepath(dag), []).append(dag)
+        self.stale_files = set()
+        self.last_scan_time = start_time
+        self.stats["misses"] += 1
+        self.stats["full_loads"] += 1
+        self._record_reload_time(start_time)
 
-        # if desired, filter out the loading messages to reduce the noise in the output
-        if filter_loading_messages_in_cli_response:
-            logging.info("Filtering Loading Messages from the CLI Response")
-            output = self.filter_loading_messages(output)
+    def _incremental_refresh(self):
+        start_time = time.time()
+        file_signatures = self._scan_dag_folder()
+        changed_files = [filepath for filepath, signature in file_signatures.items() if filepath in self.stale_files or self.file_signatures.get(filepath) != signature]
+        removed_files = [filepath for filepath in self.file_signatures if filepath not in file_signatures]
+        self.last_scan_time = start_time
+        self.stale_files = set()
+        if not changed_files and not removed_files:
+            self.stats["hits"] += 1
+            return
 
-        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output, airflow_cmd=airflow_cmd)
+        logging.info("Refreshing the cached DagBag (changed files: " + str(changed_files) + ", removed files: " + str(removed_files) + ")")
+        for filepath in removed_files + changed_files:
+            self._forget_file(filepath)
+        for filepath in changed_files:
+            self._process_file(filepath)
+        self.file_signatures = file_signatures
+        self.stats["misses"] += 1
+        self.stats["files_reparsed"] += len(changed_files)
+        self.stats["files_removed"] += len(removed_files)
+        self._record_reload_time(start_time)
 
-    # Custom function for the version API
-    def version(self, base_response):
-        logging.info("Executing custom 'version' function")
-        return REST_API_Response_Util.get_200_response(base_response, airflow_version)
+    def _record_reload_time(self, start_time):
+        reload_seconds = time.time() - start_time
+        metrics.observe("rest_api_dagbag_reload_seconds", None, reload_seconds)
+        self.stats["last_reload_seconds"] = reload_seconds
+        self.stats["total_reload_seconds"] += reload_seconds
 
-    # Custom function for the rest_api_plugin_version API
-    def rest_api_plugin_version(self, base_response):
-        logging.info("Executing custom 'rest_api_plugin_version' function")
-        return REST_API_Response_Util.get_200_response(base_response, rest_api_plugin_version)
+    # Parse the file into the cached DagBag and index the DAGs found in it. Returns the DAGs.
+    def _process_file(self, filepath):
+        try:
+            dags = self.dagbag.process_file(filepath, only_if_updated=False) or []
+        except Exception as e:
+            logging.error("Failed to process the DAG file '" + str(filepath) + "': " + str(e))
+            dags = []
+        self.file_dags[filepath] = list(dags)
+        return dags
 
-    # Custom Function for the deploy_dag API
-    def deploy_dag(self, base_response):
-        logging.info("Executing custom 'deploy_dag' function")
+    # Remove the DAGs (and import errors) that were loaded from the file. Only the DAGs still in the DagBag are removed so
+    # that a DAG with the same id that was since loaded from another file is kept.
+    def _forget_file(self, filepath):
+        for dag in self.file_dags.pop(filepath, []):
+            if self.dagbag.dags.get(dag.dag_id) is dag:
+                del self.dagbag.dags[dag.dag_id]
+        self.dagbag.import_errors.pop(filepath, None)
+        self.dagbag.file_last_changed.pop(filepath, None)
 
-        if 'dag_file' not in request.files or request.files['dag_file'].filename == '':  # check if the post request has the file part
-            logging.warning("The dag_file argument wasn't provided")
-            return REST_API_Response_Util.get_400_error_response(base_response, "dag_file should be provided")
-        dag_file = request.files['dag_file']
+    @staticmethod
+    def _get_dag_filepath(dag):
+        return os.path.abspath(getattr(dag, "full_filepath", None) or dag.fileloc)
 
-        force = True if request.form.get('force') is not None else False
-        logging.info("deploy_dag force upload: " + str(force))
+    # Get the (mtime, size) of all the files the DagBag would load from the DAGS_FOLDER, following the same rules as
+    # DagBag.collect_dags() (*.py files and zip files, skipping anything matching a pattern in an .airflowignore file)
+    def _scan_dag_folder(self):
+        file_signatures = {}
+        dag_folder = os.path.abspath(self.dag_folder)
+        if os.path.isfile(dag_folder):
+            stat = os.stat(dag_folder)
+            file_signatures[dag_folder] = (stat.st_mtime, stat.st_size)
+            return file_signatures
+        patterns = []
+        for root, dirs, files in os.walk(dag_folder, followlinks=True):
+            if ".airflowignore" in files:
+                with open(os.path.join(root, ".airflowignore"), "r") as ignore_file:
+                    patterns += [pattern for pattern in ignore_file.read().split("\n") if pattern]
+            for file_name in files:
+                filepath = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue  # the file was removed while scanning
+                if not os.path.isfile(filepath):
+                    continue
+                if not file_name.endswith(".py") and not zipfile.is_zipfile(filepath):
+                    continue
+                if any([re.findall(pattern, filepath) for pattern in patterns]):
+                    continue
+                file_signatures[filepath] = (stat.st_mtime, stat.st_size)
+        return file_signatures
 
-        pause = True if request.form.get('pause') is not None else False
-        logging.info("deploy_dag in pause state: " + str(pause))
 
-        unpause = True if request.form.get('unpause') is not None else False
-        logging.info("deploy_dag in unpause state: " + str(unpause))
+# Cache of the output of idempotent CLI APIs (like list_dags or 'pool --get') so that clients asking the same thing over
+# and over don't spawn the same command each time. Entries are keyed by the API and its arguments (see
+# REST_API_Compiled_API.get_cache_key), expire after the cache_ttl of the API and are evicted least recently used first
+# once the total size of the cached outputs goes over max_size bytes. Entries of the APIs that depend on the DAGs are
+# dropped when the DAG files change. Calls that change something invalidate the entries of their API.
+#
+# The 'memory' backend keeps the entries in the webserver process. The 'disk' backend keeps them as files in a folder
+# so that all the gunicorn workers (and webservers on the same host) share them, including their invalidation.
+class REST_API_Response_Cache(object):
 
-        # make sure that the dag_file is a python script
-        if dag_file and dag_file.filename.endswith(".py"):
-            save_file_path = os.path.join(airflow_dags_folder, dag_file.filename)
+    MEMORY_BACKEND = "memory"
+    DISK_BACKEND = "disk"
 
-            # Check if the file already exists.
-            if os.path.isfile(save_file_path) and not force:
-                logging.warning("File to upload already exists")
-                return REST_API_Response_Util.get_400_error_response(base_response, "The file '" + save_file_path + "' already exists on host '" + hostname + "'.")
+    def __init__(self, backend, max_size, folder):
+        if backend not in [self.MEMORY_BACKEND, self.DISK_BACKEND]:
+            logging.warning("Unknown response cache backend '" + str(backend) + "'. Using the '" + self.MEMORY_BACKEND + "' backend.")
+            backend = self.MEMORY_BACKEND
+        self.backend = backend
+        self.max_size = max_size
+        self.folder = folder
+        self.lock = threading.RLock()
+        self.entries = collections.OrderedDict()  # cache key -> entry of the memory backend, the least recently used first
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0, "invalidations": 0}
 
-            logging.info("Saving file to '" + save_file_path + "'")
-            dag_file.save(save_file_path)
+    # Get the cached output of the call or None if there is no valid entry for it
+    def get(self, compiled_api, cache_key):
+        dag_folder_version = dagbag_cache.get_dag_folder_version() if compiled_api.cache_depends_on_dags else None
+        if self.backend == self.DISK_BACKEND:
+            entry = self._disk_get(compiled_api.name, cache_key)
+        else:
+            with self.lock:
+                entry = self.entries.get(cache_key)
+                if entry is not None:
+                    self.entries.pop(cache_key)
+                    self.entries[cache_key] = entry  # moving it to the end as the most recently used
+        valid = entry is not None and entry["expires"] > time.time() and entry["dag_folder_version"] == dag_folder_version
+        with self.lock:
+            self.stats["hits" if valid else "misses"] += 1
+        if entry is not None and not valid:
+            self._remove(compiled_api.name, cache_key)
+        return entry["output"] if valid else None
 
+    # Cache the output of the call for the cache_ttl of the API
+    def put(self, compiled_api, cache_key, output):
+        entry = {
+            "key": cache_key,
+            "expires": time.time() + compiled_api.cache_ttl,
+            "dag_folder_version": dagbag_cache.get_dag_folder_version() if compiled_api.cache_depends_on_dags else None,
+            "output": output
+        }
+        serialized_entry = json.dumps(entry)
+        if len(serialized_entry) > self.max_size:
+            logging.info("The output of '" + cache_key + "' is too large to be cached")
+            return
+        with self.lock:
+            self.stats["puts"] += 1
+        if self.backend == self.DISK_BACKEND:
+            self._disk_put(compiled_api.name, cache_key, serialized_entry)
         else:
-            logging.warning("deploy_dag file is not a python file. It does not end with a .py.")
-            return REST_API_Response_Util.get_400_error_response(base_response, "dag_file is not a *.py file")
+            with self.lock:
+                self._remove(compiled_api.name, cache_key)
+                entry["size"] = len(serialized_entry)
+                self.entries[cache_key] = entry
+                self.size += entry["size"]
+                while self.size > self.max_size:
+                    evicted_entry = self.entries.popitem(last=False)[1]
+                    self.size -= evicted_entry["size"]
+                    self.stats["evictions"] += 1
 
-        warning = None
-        # if both the pause and unpause options are provided then skip the pausing and unpausing phase
-        if not (pause and unpause):
-            if pause or unpause:
-                try:
-                    # import the DAG file that was uploaded so that we can get the DAG_ID to execute the command to pause or unpause it
-                    import imp
-                    dag_file = imp.load_source('module.name', save_file_path)
-                    dag_id = dag_file.dag.dag_id
-
-                    # run the pause or unpause cli command
-                    airflow_cmd_split = []
-                    if pause:
-                        airflow_cmd_split = ["airflow", "pause", dag_id]
-                    if unpause:
-                        airflow_cmd_split = ["airflow", "unpause", dag_id]
-                    cli_output = self.execute_cli_command(airflow_cmd_split)
-                except Exception as e:
-                    warning = "Failed to set the state (pause, unpause) of the DAG: " + str(e)
-                    logging.warning(warning)
+    # Drop the entries of the API. If no API is provided, the whole cache is dropped.
+    def invalidate(self, api=None):
+        logging.info("Invalidating the response cache" + (" of the '" + api + "' API" if api is not None else ""))
+        with self.lock:
+            self.stats["invalidations"] += 1
+            if self.backend == self.DISK_BACKEND:
+                for file_name in self._list_entry_files():
+                    if api is None or file_name.startswith(api + "-"):
+                        self._remove_file(os.path.join(self.folder, file_name))
+            else:
+                for cache_key in list(self.entries.keys()):
+                    if api is None or cache_key.startswith(api + " "):
+                        self._remove(api, cache_key)
+
+    # Drop the entries of the APIs that depend on the DAGs. To be called when a DAG is deployed or refreshed.
+    def invalidate_dags(self):
+        for compiled_api in list(api_registry.apis.values()):
+            if compiled_api.cache_depends_on_dags:
+                self.invalidate(compiled_api.name)
+
+    # Get a copy of the counters along with the current size of the cache
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["backend"] = self.backend
+            stats["max_size"] = self.max_size
+            if self.backend == self.DISK_BACKEND:
+                file_sizes = [self._get_file_size(os.path.join(self.folder, file_name)) for file_name in self._list_entry_files()]
+                stats["entries"] = len(file_sizes)
+                stats["size"] = sum(file_sizes)
+            else:
+                stats["entries"] = len(self.entries)
+                stats["size"] = self.size
+            return stats
+
+    def _remove(self, api, cache_key):
+        if self.backend == self.DISK_BACKEND:
+            self._remove_file(self._get_entry_file_path(api, cache_key))
+        else:
+            with self.lock:
+                entry = self.entries.pop(cache_key, None)
+                if entry is not None:
+                    self.size -= entry["size"]
+
+    def _get_entry_file_path(self, api, cache_key):
+        return os.path.join(self.folder, api + "-" + hashlib.sha1(cache_key.encode("utf-8")).hexdigest() + ".json")
+
+    def _list_entry_files(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return [file_name for file_name in os.listdir(self.folder) if file_name.endswith(".json")]
+
+    def _disk_get(self, api, cache_key):
+        entry_file_path = self._get_entry_file_path(api, cache_key)
+        try:
+            with open(entry_file_path, "r") as entry_file:
+                entry = json.loads(entry_file.read())
+            os.utime(entry_file_path, None)  # the modification time is used to find the least recently used entries
+        except (IOError, OSError, ValueError):
+            return None
+        return entry if entry.get("key") == cache_key else None
+
+    def _disk_put(self, api, cache_key, serialized_entry):
+        if not os.path.isdir(self.folder):
+            try:
+                os.makedirs(self.folder)
+            except OSError:
+                pass  # created by another process in the meantime
+        entry_file_path = self._get_entry_file_path(api, cache_key)
+        tmp_file_path = entry_file_path + "." + uuid.uuid4().hex + ".tmp"
+        # the outputs can contain things like connection URIs so only the owner is allowed to read the entries
+        entry_file = os.fdopen(os.open(tmp_file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w")
+        with entry_file:
+            entry_file.write(serialized_entry)
+        os.rename(tmp_file_path, entry_file_path)
+
+        # evicting the least recently used entries once the cached outputs go over the max size
+        entry_files = []
+        for file_name in self._list_entry_files():
+            try:
+                stat = os.stat(os.path.join(self.folder, file_name))
+            except OSError:
+                continue
+            entry_files.append((stat.st_mtime, stat.st_size, file_name))
+        total_size = sum([entry_file_size for _, entry_file_size, _ in entry_files])
+        for _, entry_file_size, file_name in sorted(entry_files):
+            if total_size <= self.max_size:
+                break
+            self._remove_file(os.path.join(self.folder, file_name))
+            total_size -= entry_file_size
+            with self.lock:
+                self.stats["evictions"] += 1
+
+    @staticmethod
+    def _remove_file(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass  # already removed by another process
+
+    @staticmethod
+    def _get_file_size(file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+
+# Single-flight coalescing of identical calls of the idempotent CLI APIs (like dag_state or list_dags that many clients
+# poll at the same time). The first call of a key (see REST_API_Compiled_API.get_cache_key) executes it and the identical
+# calls that come in while it runs wait for it and get its output instead of starting their own airflow process.
+#
+# With across_processes, the calls are also coalesced across the gunicorn workers (and web servers) of the host through
+# a lock file per key in the folder: the process executing a key holds an flock on it and writes the output to a result
+# file, which the processes waiting on the lock read once it's released. A result is only used if it was produced after
+# the waiting call came in. Waiting calls run on their own after wait_timeout seconds.
+class REST_API_Request_Coalescer(object):
+
+    def __init__(self, enabled, across_processes, folder, wait_timeout):
+        self.enabled = enabled
+        self.across_processes = across_processes and fcntl is not None
+        if across_processes and fcntl is None:
+            logging.warning("Coalescing calls across processes requires the fcntl module. Calls are only coalesced within the process.")
+        self.folder = folder
+        self.wait_timeout = wait_timeout
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> {"event", "output", "error"} of the calls being executed by this process
+        self.last_prune_time = 0
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0,
+            "coalesced_across_processes": 0,
+            "wait_timeouts": 0
+        }
+
+    # Execute the function for the key or wait for the identical call being executed to share its output.
+    # Returns (output, whether it was shared).
+    def execute(self, key, function):
+        if not self.enabled:
+            return function(), False
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = {"event": threading.Event(), "output": None, "error": None}
+                self.calls[key] = call
+
+        if not is_leader:
+            if call["event"].wait(self.wait_timeout):
+                with self.lock:
+                    self.stats["coalesced"] += 1
+                if call["error"] is not None:
+                    raise call["error"]
+                return call["output"], True
+            with self.lock:
+                self.stats["wait_timeouts"] += 1
+            return function(), False
+
+        shared = False
+        try:
+            if self.across_processes:
+                call["output"], shared = self._execute_across_processes(key, function)
+            else:
+                call["output"] = function()
+            return call["output"], shared
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                if not shared and call["error"] is None:
+                    self.stats["executions"] += 1
+            call["event"].set()
+
+    # Get a copy of the counters along with the number of calls being executed
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self.calls)
+            return stats
+
+    def _execute_across_processes(self, key, function):
+        start_time = time.time()
+        file_name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        if not os.path.isdir(self.folder):
+            try:
+                os.makedirs(self.folder)
+            except OSError:
+                pass  # created by another process
+        lock_path = os.path.join(self.folder, file_name + ".lock")
+        lock_file = open(lock_path, "a")
+        try:
+            is_locked = self._try_lock(lock_file)
+            if not is_locked:
+                # another process is executing the same call: wait for it to be done and use its output
+                deadline = start_time + self.wait_timeout
+                sleep_seconds = 0.005
+                while not is_locked and time.time() < deadline:
+                    time.sleep(sleep_seconds)
+                    sleep_seconds = min(sleep_seconds * 2, 0.1)
+                    is_locked = self._try_lock(lock_file)
+                if is_locked:
+                    output = self._read_result(os.path.join(self.folder, file_name + ".json"), start_time)
+                    if output is not None:
+                        with self.lock:
+                            self.stats["coalesced_across_processes"] += 1
+                        return output, True
+                else:
+                    with self.lock:
+                        self.stats["wait_timeouts"] += 1
+            output = function()
+            if is_locked:
+                self._write_result(os.path.join(self.folder, file_name + ".json"), output)
+            return output, False
+        finally:
+            lock_file.close()  # releases the lock
+
+    @staticmethod
+    def _try_lock(lock_file):
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except (IOError, OSError):
+            return False
+
+    # Get the output of a result file if it was written after the given time, None otherwise
+    @staticmethod
+    def _read_result(result_path, start_time):
+        try:
+            with open(result_path, "r") as result_file:
+                result = json.load(result_file)
+        except (IOError, OSError, ValueError):
+            return None
+        return result["output"] if result.get("end_time", 0) >= start_time else None
+
+    def _write_result(self, result_path, output):
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.folder)
+            with os.fdopen(file_descriptor, "w") as result_file:
+                json.dump({"end_time": time.time(), "output": output}, result_file)
+            os.chmod(temporary_path, 0o600)
+            os.rename(temporary_path, result_path)
+        except (IOError, OSError) as e:
+            logging.warning("Failed to write the coalesced output to '" + str(result_path) + "': " + str(e))
+        self._prune()
+
+    # Remove the result and temporary files that weren't used for a while, at most once a minute. The lock files are
+    # kept: a leader can hold one for longer than any age, and removing it would let another process lock a new file of
+    # the same name and execute the same call alongside. They're empty and there's one per distinct call.
+    def _prune(self):
+        now = time.time()
+        if now - self.last_prune_time < 60:
+            return
+        self.last_prune_time = now
+        max_age = max(60, self.wait_timeout)
+        for file_name in os.listdir(self.folder):
+            if not file_name.endswith((".json", ".tmp")):
+                continue
+            file_path = os.path.join(self.folder, file_name)
+            try:
+                if now - os.path.getmtime(file_path) > max_age:
+                    os.remove(file_path)
+            except OSError:
+                pass  # removed by another process
+
+
+# Admission control of the API calls so that a burst of expensive calls (like backfill, test, run or clear, each running
+# an airflow process) can't take up all the web server processes and starve the UI. Each call takes the weight of its
+# API while it runs. The total weight running in the web server process is limited to max_weight and the weight running
+# for a single client (see REST_API.get_client_id) to client_max_weight. Clients
+# can also be limited to client_rate_limit calls per second (with bursts of client_burst calls). Calls over the limits
+# wait in a queue of queue_size calls for up to queue_timeout seconds and are then rejected. A call that's heavier than
+# a limit is let through when nothing else is running against that limit. Calls of APIs with a weight of 0 are never
+# limited. The limits are per web server process.
+class REST_API_Admission_Controller(object):
+
+    QUEUE_FULL = "queue_full"
+    TIMEOUT = "timeout"
+
+    def __init__(self, enabled, max_weight, client_max_weight, client_rate_limit, client_burst, queue_size, queue_timeout):
+        self.enabled = enabled
+        self.max_weight = max_weight
+        self.client_max_weight = client_max_weight
+        self.client_rate_limit = client_rate_limit  # calls per second per client (0 = no limit)
+        self.client_burst = max(1, client_burst)
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.running_weight = 0
+        self.client_running_weights = {}  # client -> weight running for the client
+        self.client_allowances = {}  # client -> (calls the client can still make right away, time it was computed)
+        self.queue_depth = 0
+        self.average_duration = 1.0  # moving average of how long an admitted call runs for, to suggest when to retry
+        self.stats = {
+            "admitted": 0,
+            "admitted_after_waiting": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    # Wait until the call can run. Returns (ticket, None, None) when the call is admitted, where the ticket should be
+    # released once the call is done, or (None, reason, retry_after seconds) when it's rejected.
+    def admit(self, client, weight):
+        if not self.enabled or weight <= 0:
+            return REST_API_Admission_Ticket(self, client, 0), None, None
+        start_time = time.time()
+        with self.condition:
+            wait_seconds = self._get_wait_seconds(client, weight)
+            if wait_seconds > 0:
+                if self.queue_depth >= self.queue_size:
+                    self.stats["rejected_queue_full"] += 1
+                    return None, self.QUEUE_FULL, self._get_retry_after(client)
+                self.queue_depth += 1
+                self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+                metrics.inc("rest_api_admission_queue_depth", None)
+                try:
+                    deadline = start_time + self.queue_timeout
+                    while wait_seconds > 0:
+                        remaining_seconds = deadline - time.time()
+                        if remaining_seconds <= 0:
+                            self.stats["rejected_timeout"] += 1
+                            return None, self.TIMEOUT, self._get_retry_after(client)
+                        # a released call wakes the waiting calls up, waiting for an allowance doesn't
+                        self.condition.wait(min(remaining_seconds, wait_seconds) if wait_seconds != float("inf") else remaining_seconds)
+                        wait_seconds = self._get_wait_seconds(client, weight)
+                finally:
+                    self.queue_depth -= 1
+                    metrics.inc("rest_api_admission_queue_depth", None, -1)
+                self.stats["admitted_after_waiting"] += 1
+            if self.client_rate_limit:
+                self.client_allowances[client] = (self._get_allowance(client) - 1, time.time())
+            self.running_weight += weight
+            self.client_running_weights[client] = self.client_running_weights.get(client, 0) + weight
+            wait_time = time.time() - start_time
+            self.stats["admitted"] += 1
+            self.stats["total_wait_seconds"] += wait_time
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait_time)
+        metrics.observe("rest_api_admission_wait_seconds", None, wait_time)
+        return REST_API_Admission_Ticket(self, client, weight), None, None
+
+    # Give the weight of an admitted call back and wake the waiting calls up
+    def release(self, client, weight, duration):
+        with self.condition:
+            self.running_weight -= weight
+            self.client_running_weights[client] -= weight
+            if self.client_running_weights[client] <= 0:
+                del self.client_running_weights[client]
+            self.average_duration = 0.9 * self.average_duration + 0.1 * duration
+            self.condition.notify_all()
+
+    # Get a copy of the counters along with the current state of the limits
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats["enabled"] = self.enabled
+            stats["queue_depth"] = self.queue_depth
+            stats["running_weight"] = self.running_weight
+            stats["running_clients"] = len(self.client_running_weights)
+            stats["average_wait_seconds"] = self.stats["total_wait_seconds"] / self.stats["admitted"] if self.stats["admitted"] else 0.0
+            stats["max_weight"] = self.max_weight
+            stats["client_max_weight"] = self.client_max_weight
+            stats["client_rate_limit"] = self.client_rate_limit
+            stats["client_burst"] = self.client_burst
+            stats["queue_size"] = self.queue_size
+            stats["queue_timeout"] = self.queue_timeout
+            return stats
+
+    # Get the number of seconds the call has to wait before it can run (inf when it waits for a call to finish)
+    def _get_wait_seconds(self, client, weight):
+        client_running_weight = self.client_running_weights.get(client, 0)
+        if self.running_weight and self.running_weight + weight > self.max_weight:
+            return float("inf")
+        if client_running_weight and client_running_weight + weight > self.client_max_weight:
+            return float("inf")
+        if self.client_rate_limit:
+            allowance = self._get_allowance(client)
+            if allowance < 1:
+                return (1 - allowance) / self.client_rate_limit
+        return 0
+
+    # Get the number of calls the client can make right away, refilled at client_rate_limit calls per second
+    def _get_allowance(self, client):
+        now = time.time()
+        allowance, last_time = self.client_allowances.get(client, (self.client_burst, now))
+        allowance = min(self.client_burst, allowance + (now - last_time) * self.client_rate_limit)
+        self.client_allowances[client] = (allowance, now)
+        if len(self.client_allowances) > 10000:
+            # forgetting the clients that have their whole allowance back so that the dict doesn't grow forever
+            for known_client, (known_allowance, known_time) in list(self.client_allowances.items()):
+                if known_client != client and known_allowance + (now - known_time) * self.client_rate_limit >= self.client_burst:
+                    del self.client_allowances[known_client]
+        return allowance
+
+    # Get the number of seconds a rejected client should wait before retrying
+    def _get_retry_after(self, client):
+        retry_after = self.average_duration
+        if self.client_rate_limit and client in self.client_allowances:
+            retry_after = max(retry_after, (1 - self._get_allowance(client)) / self.client_rate_limit)
+        return max(1, int(math.ceil(retry_after)))
+
+
+# The weight an admitted call took from the admission control. Released once the call is done.
+class REST_API_Admission_Ticket(object):
+
+    def __init__(self, admission_controller, client, weight):
+        self.admission_controller = admission_controller
+        self.client = client
+        self.weight = weight
+        self.start_time = time.time()
+        self.released = False
+        self.handed_over = False
+
+    # Hand the ticket over to what keeps running after the call returns (like a job), which releases it once it's done
+    def hand_over(self):
+        self.handed_over = True
+        return self
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        if self.weight:
+            self.admission_controller.release(self.client, self.weight, time.time() - self.start_time)
+
+
+# Utilities for the DAG files deployed through the REST API. The uploaded DAG files are never imported inside the web
+# server: the DAG ids are read from the source code and only when that isn't possible the file is imported in a separate
+# process. Files are written atomically (to a temporary file in the same folder that's then renamed) and files whose
+# content didn't change aren't written at all so that the DagBag doesn't re-parse them.
+class REST_API_DAG_File_Util(object):
+
+    # Makes sure bundles deployed at the same time by different threads don't interleave
+    deploy_lock = threading.Lock()
+
+    # Prefix of the line the process importing a DAG file prints the DAG ids on
+    dag_ids_output_prefix = "REST_API_PLUGIN_DAG_IDS "
+
+    # Script run in a separate process to import a DAG file and print the ids of the DAGs it defines
+    dag_ids_script = "\n".join([
+        "import imp, json, sys",
+        "from airflow.models import DAG",
+        "module = imp.load_source('rest_api_plugin_deployed_dag', sys.argv[1])",
+        "dag_ids = sorted(set([value.dag_id for value in vars(module).values() if isinstance(value, DAG)]))",
+        "sys.stdout.write('\\n" + dag_ids_output_prefix + "' + json.dumps(dag_ids) + '\\n')"
+    ])
+
+    # Get the ids of the DAGs defined in a DAG file, without importing it in the web server process
+    @staticmethod
+    def get_dag_ids(file_path, timeout=None):
+        with open(file_path, "rb") as dag_file:
+            source = dag_file.read()
+        dag_ids = REST_API_DAG_File_Util.get_dag_ids_from_source(source, file_path)
+        if dag_ids is None:
+            logging.info("The DAG ids of '" + str(file_path) + "' can't be read from the source code. Importing it in a separate process.")
+            dag_ids = REST_API_DAG_File_Util.get_dag_ids_in_subprocess(file_path, timeout)
+        return dag_ids
+
+    # Get the ids of the DAGs created with a string literal as dag_id (DAG("dag_id", ...) or DAG(dag_id="dag_id", ...)) in
+    # the source code. Returns None when there are DAGs whose id can't be known without running the code.
+    @staticmethod
+    def get_dag_ids_from_source(source, file_path="<unknown>"):
+        # the DagBag skips the files that mention neither 'DAG' nor 'airflow' (safe mode), so they define no DAGs
+        if b"DAG" not in source or b"airflow" not in source:
+            return []
+        try:
+            tree = ast.parse(source, file_path)
+        except SyntaxError:
+            return None  # let the import report the error
+        dag_ids = []
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            function_name = node.func.id if isinstance(node.func, ast.Name) else (node.func.attr if isinstance(node.func, ast.Attribute) else None)
+            if function_name != "DAG":
+                continue
+            dag_id_node = node.args[0] if node.args else None
+            for keyword in node.keywords:
+                if keyword.arg == "dag_id":
+                    dag_id_node = keyword.value
+            dag_id = REST_API_DAG_File_Util._get_string_literal(dag_id_node)
+            if dag_id is None:
+                return None
+            if dag_id not in dag_ids:
+                dag_ids.append(dag_id)
+        return dag_ids if dag_ids else None
+
+    @staticmethod
+    def _get_string_literal(node):
+        if hasattr(ast, "Constant") and isinstance(node, ast.Constant):
+            return node.value if isinstance(node.value, string_types) else None
+        if hasattr(ast, "Str") and isinstance(node, ast.Str):  # Python < 3.8
+            return node.s
+        return None
+
+    # Import a DAG file in a separate process and get the ids of the DAGs it defines. The process is killed after timeout seconds.
+    @staticmethod
+    def get_dag_ids_in_subprocess(file_path, timeout=None):
+        process = subprocess.Popen([sys.executable, "-c", REST_API_DAG_File_Util.dag_ids_script, file_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        timer = threading.Timer(timeout, process.kill) if timeout else None
+        if timer is not None:
+            timer.daemon = True
+            timer.start()
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        for line in reversed(stdout.decode("utf-8", "replace").splitlines()):
+            if line.startswith(REST_API_DAG_File_Util.dag_ids_output_prefix):
+                return json.loads(line[len(REST_API_DAG_File_Util.dag_ids_output_prefix):])
+        if process.returncode < 0:
+            raise Exception("Importing the DAG file '" + str(file_path) + "' took longer than " + str(timeout) + " seconds")
+        error_lines = stderr.decode("utf-8", "replace").strip().splitlines()
+        raise Exception("Failed to import the DAG file '" + str(file_path) + "': " + (error_lines[-1] if error_lines else "exit code " + str(process.returncode)))
+
+    # Get the sha256 hex digest of a file or None if it doesn't exist
+    @staticmethod
+    def get_file_sha256(file_path):
+        if not os.path.isfile(file_path):
+            return None
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as existing_file:
+            for chunk in iter(lambda: existing_file.read(65536), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    # Write the content of a file-like object to a temporary file in the folder of file_path, hashing it along the way.
+    # Returns (temporary file path, sha256 hex digest). The temporary file name doesn't end with .py so the DagBag ignores it.
+    # The folders that had to be created are added to created_folders when it's provided.
+    @staticmethod
+    def write_temporary_file(source, file_path, created_folders=None):
+        folder = os.path.dirname(file_path)
+        if not os.path.isdir(folder):
+            missing_folder = folder
+            while missing_folder and not os.path.isdir(missing_folder):
+                if created_folders is not None:
+                    created_folders.append(missing_folder)
+                missing_folder = os.path.dirname(missing_folder)
+            os.makedirs(folder)
+        file_descriptor, temporary_file_path = tempfile.mkstemp(prefix="." + os.path.basename(file_path) + ".", suffix=".tmp", dir=folder)
+        sha256 = hashlib.sha256()
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                for chunk in iter(lambda: source.read(65536), b""):
+                    sha256.update(chunk)
+                    temporary_file.write(chunk)
+            os.chmod(temporary_file_path, 0o644)
+        except Exception:
+            REST_API_DAG_File_Util.remove_file(temporary_file_path)
+            raise
+        return temporary_file_path, sha256.hexdigest()
+
+    # Atomically write the content of a file-like object to file_path unless the file already has that content.
+    # Returns (sha256 hex digest, whether the file was written).
+    @staticmethod
+    def write_file(source, file_path):
+        temporary_file_path, sha256 = REST_API_DAG_File_Util.write_temporary_file(source, file_path)
+        if sha256 == REST_API_DAG_File_Util.get_file_sha256(file_path):
+            REST_API_DAG_File_Util.remove_file(temporary_file_path)
+            return sha256, False
+        try:
+            os.rename(temporary_file_path, file_path)
+        except Exception:
+            REST_API_DAG_File_Util.remove_file(temporary_file_path)
+            raise
+        return sha256, True
+
+    @staticmethod
+    def remove_file(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    # Remove the folders that are empty, the deepest ones first
+    @staticmethod
+    def remove_empty_folders(folders):
+        for folder in sorted(set(folders), key=len, reverse=True):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass  # not empty
+
+    # Get the (relative path, size, open function) of the files in a tar or zip archive of DAG files. Raises a ValueError
+    # if the archive holds anything other than plain *.py files with relative paths or goes over the given limits.
+    # The archive should be closed with the returned close function once the members have been read.
+    @staticmethod
+    def get_bundle_members(archive_path, max_files, max_size):
+        members = []
+        if zipfile.is_zipfile(archive_path):
+            archive = zipfile.ZipFile(archive_path)
+            for info in archive.infolist():
+                if info.filename.endswith("/"):
+                    continue  # folder
+                is_symlink = (info.external_attr >> 16) & 0o170000 == 0o120000
+                members.append((info.filename, info.file_size, None if is_symlink else (lambda info=info: archive.open(info))))
+        elif tarfile.is_tarfile(archive_path):
+            archive = tarfile.open(archive_path, "r:*")
+            for info in archive:
+                if info.isdir():
+                    continue
+                members.append((info.name, info.size, (lambda info=info: archive.extractfile(info)) if info.isfile() else None))
+        else:
+            raise ValueError("dag_bundle is not a tar or zip archive")
+        try:
+            return REST_API_DAG_File_Util._validate_bundle_members(members, max_files, max_size), archive.close
+        except Exception:
+            archive.close()
+            raise
+
+    @staticmethod
+    def _validate_bundle_members(members, max_files, max_size):
+        bundle_members = []
+        invalid_members = []
+        relative_paths = set()
+        for name, size, open_member in members:
+            relative_path = REST_API_DAG_File_Util.get_relative_path(name)
+            if open_member is None or relative_path is None or not relative_path.endswith(".py") or relative_path in relative_paths:
+                invalid_members.append(name)
+                continue
+            relative_paths.add(relative_path)
+            bundle_members.append((relative_path, size, open_member))
+        if invalid_members:
+            raise ValueError("dag_bundle should only contain *.py files with unique relative paths. Invalid members: " + ", ".join(invalid_members[:20]))
+        if len(bundle_members) > max_files:
+            raise ValueError("dag_bundle contains " + str(len(bundle_members)) + " files, more than the maximum of " + str(max_files))
+        if sum([size for _, size, _ in bundle_members]) > max_size:
+            raise ValueError("dag_bundle contains more than the maximum of " + str(max_size) + " bytes once extracted")
+        return bundle_members
+
+    # Write the files of a DAG bundle to the target folder. Every changed file is first written to a temporary file next to
+    # its destination and they're all renamed into place once the whole bundle was written. With prune, the *.py files of
+    # the target folder that aren't in the bundle are moved to a hidden backup first. When writing, renaming or pruning a
+    # file fails, the files already renamed or pruned are put back (the replaced files from a hard link to them), and the
+    # temporary files and the folders created for the bundle are removed, so a failure leaves the folder as it was. Files
+    # with the same content aren't written. Returns the relative paths of the added, updated, unchanged and removed files.
+    @staticmethod
+    def deploy_bundle(bundle_members, target_folder, prune=False):
+        result = {"added": [], "updated": [], "unchanged": [], "removed": []}
+        staged_files = []  # (temporary file path, file path)
+        created_folders = []
+        with REST_API_DAG_File_Util.deploy_lock:
+            try:
+                for relative_path, _, open_member in bundle_members:
+                    file_path = os.path.join(target_folder, *relative_path.split("/"))
+                    if os.path.exists(file_path) and not os.path.isfile(file_path):
+                        raise ValueError("'" + relative_path + "' already exists in '" + target_folder + "' and is not a file")
+                    member = open_member()
+                    try:
+                        temporary_file_path, sha256 = REST_API_DAG_File_Util.write_temporary_file(member, file_path, created_folders)
+                    finally:
+                        member.close()
+                    existing_sha256 = REST_API_DAG_File_Util.get_file_sha256(file_path)
+                    if sha256 == existing_sha256:
+                        REST_API_DAG_File_Util.remove_file(temporary_file_path)
+                        result["unchanged"].append(relative_path)
+                    else:
+                        staged_files.append((temporary_file_path, file_path))
+                        result["added" if existing_sha256 is None else "updated"].append(relative_path)
+            except Exception:
+                for temporary_file_path, _ in staged_files:
+                    REST_API_DAG_File_Util.remove_file(temporary_file_path)
+                REST_API_DAG_File_Util.remove_empty_folders(created_folders)
+                raise
+
+            # the files to prune are found before anything is renamed and are moved away to a backup like the replaced files
+            pruned_files = []  # (relative path, file path)
+            if prune and os.path.isdir(target_folder):
+                bundle_paths = set([relative_path for relative_path, _, _ in bundle_members])
+                for root, dirs, files in os.walk(target_folder):
+                    dirs[:] = [folder for folder in dirs if not folder.startswith(".")]
+                    for file_name in files:
+                        relative_path = os.path.relpath(os.path.join(root, file_name), target_folder).replace(os.sep, "/")
+                        if file_name.endswith(".py") and not file_name.startswith(".") and relative_path not in bundle_paths:
+                            pruned_files.append((relative_path, os.path.join(root, file_name)))
+
+            renamed_files = []  # (file path, backup file path or None when the file was added)
+            backup_file_paths = []
+            try:
+                for _, file_path in pruned_files:
+                    backup_file_path = os.path.join(os.path.dirname(file_path), "." + os.path.basename(file_path) + "." + uuid.uuid4().hex + ".bak")
+                    os.rename(file_path, backup_file_path)
+                    backup_file_paths.append(backup_file_path)
+                    renamed_files.append((file_path, backup_file_path))
+                for temporary_file_path, file_path in staged_files:
+                    backup_file_path = None
+                    if os.path.isfile(file_path):
+                        backup_file_path = temporary_file_path[:-len(".tmp")] + ".bak"
+                        backup_file_paths.append(backup_file_path)
+                        try:
+                            os.link(file_path, backup_file_path)
+                        except (OSError, AttributeError):
+                            shutil.copy2(file_path, backup_file_path)  # no hard links on this file system
+                    os.rename(temporary_file_path, file_path)
+                    renamed_files.append((file_path, backup_file_path))
+            except Exception:
+                for file_path, backup_file_path in reversed(renamed_files):
+                    try:
+                        if backup_file_path is not None:
+                            os.rename(backup_file_path, file_path)
+                        else:
+                            os.remove(file_path)
+                    except OSError as e:
+                        logging.error("Failed to put back '" + file_path + "' after a failed deployment: " + str(e))
+                for temporary_file_path, _ in staged_files:
+                    REST_API_DAG_File_Util.remove_file(temporary_file_path)
+                for backup_file_path in backup_file_paths:
+                    REST_API_DAG_File_Util.remove_file(backup_file_path)
+                REST_API_DAG_File_Util.remove_empty_folders(created_folders)
+                raise
+            for backup_file_path in backup_file_paths:
+                REST_API_DAG_File_Util.remove_file(backup_file_path)
+            result["removed"] = [relative_path for relative_path, _ in pruned_files]
+        for file_list in result.values():
+            file_list.sort()
+        return result
+
+    # Normalize a relative path of an archive member or argument. Returns None if it's absolute, goes outside of the folder
+    # it's relative to or has a hidden part (like the temporary files the DAG files are written to).
+    @staticmethod
+    def get_relative_path(path):
+        parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+        if not parts or path.startswith("/") or ":" in parts[0] or any([part.startswith(".") for part in parts]):
+            return None
+        return "/".join(parts)
+
+    # Set the paused state of DAGs directly in the metadata database. The DagModel rows of DAGs the scheduler hasn't
+    # picked up yet are created so that the state is kept when it does.
+    @staticmethod
+    def set_is_paused(dag_ids, is_paused, file_path=None):
+        session = settings.Session()
+        try:
+            for dag_id in dag_ids:
+                dag_model = session.query(DagModel).filter(DagModel.dag_id == dag_id).first()
+                if dag_model is None:
+                    dag_model = DagModel(dag_id=dag_id)
+                    dag_model.fileloc = file_path
+                    session.add(dag_model)
+                dag_model.is_paused = is_paused
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+# Answers read-only CLI APIs directly through the ORM inside the webserver process instead of spawning an 'airflow'
+# subprocess. Each function produces the same output the CLI command would print. A function returns None when it can't
+# answer the call the same way the CLI would (unsupported arguments, unknown task, etc.) so that the CLI is used instead.
+class REST_API_In_Process_Executor(object):
+
+    # Header printed before the list of DAGs by 'airflow list_dags'
+    list_dags_header = "\n\n" + ("-" * 67) + "\nDAGS\n" + ("-" * 67) + "\n"
+
+    # Arguments that control how the REST API runs the call rather than being arguments of the command
+    control_arguments = ["api", "timings", "async", "stream"]
+
+    # Execute the API in-process if possible. Returns the output of the call or None if the CLI should be used.
+    @staticmethod
+    def execute(api, arguments):
+        function = REST_API_In_Process_Executor.functions.get(api)
+        if function is None:
+            return None
+        try:
+            stdout = function(arguments)
+        except Exception as e:
+            logging.warning("In-process execution of the '" + str(api) + "' API failed. Falling back to the CLI: " + str(e))
+            return None
+        if stdout is None:
+            logging.info("The '" + str(api) + "' API call can't be answered in-process. Falling back to the CLI.")
+            return None
+        logging.info("Executed the '" + str(api) + "' API in-process")
+        output = REST_API.get_empty_process_output()
+        output["stdout"] = stdout
+        output["exit_code"] = 0
+        return output
+
+    # Execute a function with a new ORM session and close it afterwards
+    @staticmethod
+    def with_session(function):
+        session = settings.Session()
+        try:
+            return function(session)
+        finally:
+            session.close()
+
+    @staticmethod
+    def is_arg_provided(arguments, name):
+        return arguments.get(name) is not None
+
+    @staticmethod
+    def has_only_arguments(arguments, names):
+        return all([name in names for name in arguments.keys() if name not in REST_API_In_Process_Executor.control_arguments])
+
+    # Same output as 'airflow list_dags'
+    @staticmethod
+    def list_dags(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, []):
+            return None  # subdir and report need a DagBag loaded from a different location and with its own stats
+        dagbag = REST_API.get_dagbag()
+        return REST_API_In_Process_Executor.list_dags_header + "\n".join(sorted(dagbag.dags)) + "\n\n"
+
+    # Same output as 'airflow list_tasks {dag_id}'
+    @staticmethod
+    def list_tasks(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, ["dag_id"]):
+            return None  # the tree view is printed by the DAG itself
+        dag = REST_API.get_dagbag().dags.get(arguments.get("dag_id").strip())
+        if dag is None:
+            return None
+        return "\n".join(sorted([task.task_id for task in dag.tasks])) + "\n"
+
+    # Same output as 'airflow dag_state {dag_id} {execution_date}'
+    @staticmethod
+    def dag_state(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, ["dag_id", "execution_date"]):
+            return None
+        dag_id = arguments.get("dag_id").strip()
+        execution_date = dateutil.parser.parse(arguments.get("execution_date"))
+
+        def query(session):
+            return session.query(DagRun.state).filter(DagRun.dag_id == dag_id, DagRun.execution_date == execution_date).first()
+        dag_run = REST_API_In_Process_Executor.with_session(query)
+        return str(dag_run.state if dag_run is not None else None) + "\n"
+
+    # Same output as 'airflow task_state {dag_id} {task_id} {execution_date}'
+    @staticmethod
+    def task_state(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, ["dag_id", "task_id", "execution_date"]):
+            return None
+        dag_id = arguments.get("dag_id").strip()
+        task_id = arguments.get("task_id").strip()
+        dag = REST_API.get_dagbag().dags.get(dag_id)
+        if dag is None or task_id not in dag.task_ids:
+            return None  # let the CLI report the error
+        execution_date = dateutil.parser.parse(arguments.get("execution_date"))
+
+        def query(session):
+            return session.query(TaskInstance.state).filter(TaskInstance.dag_id == dag_id, TaskInstance.task_id == task_id, TaskInstance.execution_date == execution_date).first()
+        task_instance = REST_API_In_Process_Executor.with_session(query)
+        return str(task_instance.state if task_instance is not None else None) + "\n"
+
+    # Same output as 'airflow pool --get {name}'
+    @staticmethod
+    def pool(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, ["get"]) or not arguments.get("get"):
+            return None  # set and delete modify the pools
+        name = arguments.get("get")
+
+        def query(session):
+            return session.query(Pool).filter(Pool.pool == name).first()
+        pool = REST_API_In_Process_Executor.with_session(query)
+        if pool is None:
+            return None
+        return "{} ".format(pool) + "\n"
+
+    # Same output as 'airflow variables --get {key}'
+    @staticmethod
+    def variables(arguments):
+        if not REST_API_In_Process_Executor.has_only_arguments(arguments, ["get", "json", "default"]) or not arguments.get("get"):
+            return None  # set, delete, import and export modify the variables or the file system
+        try:
+            value = Variable.get(arguments.get("get"), deserialize_json=REST_API_In_Process_Executor.is_arg_provided(arguments, "json"), default_var=arguments.get("default"))
+        except ValueError as e:
+            value = e
+        return str(value) + "\n"
+
+# Functions of the APIs that can be answered in-process
+REST_API_In_Process_Executor.functions = {
+    "list_dags": REST_API_In_Process_Executor.list_dags,
+    "list_tasks": REST_API_In_Process_Executor.list_tasks,
+    "dag_state": REST_API_In_Process_Executor.dag_state,
+    "task_state": REST_API_In_Process_Executor.task_state,
+    "pool": REST_API_In_Process_Executor.pool,
+    "variables": REST_API_In_Process_Executor.variables
+}
+
+
+# Runs CLI commands as jobs outside of the request that started them. A job gets an id right away and its status can be
+# polled, its output fetched and the job cancelled through the job_* APIs.
+# Jobs requested with async=true are run on a bounded pool of threads (job_executor_max_workers), so no more than that many
+# run at the same time and the others wait in the queue. Background APIs (worker, scheduler, etc.) start long running
+# services, so they are started right away in their own session and only tracked by the registry.
+# The status of every job is kept in a JSON file next to its output in the job_output_folder, so that any web server
+# process on the host can answer for a job regardless of which process started it.
+class REST_API_Job_Manager(object):
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+    FINISHED_STATUSES = [SUCCESS, FAILED, CANCELLED]
+
+    def __init__(self, output_folder, max_workers, history_size):
+        self.output_folder = output_folder
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.lock = threading.RLock()
+        self.executor = None
+        self.jobs = collections.OrderedDict()  # job_id -> job of the jobs started by this process
+        self.futures = {}  # job_id -> future of the queued/running async jobs
+        self.processes = {}  # job_id -> process of the running jobs
+        self.tickets = {}  # job_id -> admission ticket of the call that submitted the job, released once the job is done
+
+    # Submit the command as a new job and return the job right away. The admission ticket of the call is handed over to
+    # the job so that the job takes its weight until it finishes or is cancelled.
+    def submit(self, api, airflow_cmd_split, background=False, ticket=None):
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "api": api,
+            "airflow_cmd": " ".join(airflow_cmd_split),
+            "background": background,
+            "hostname": hostname,
+            "status": self.QUEUED,
+            "pid": None,
+            "exit_code": None,
+            "submit_time": datetime.now().isoformat(),
+            "start_time": None,
+            "end_time": None,
+            "duration": None
+        }
+        if not os.path.isdir(self.output_folder):
+            os.makedirs(self.output_folder)
+        with self.lock:
+            self.jobs[job_id] = job
+            self._save(job)
+            if ticket is not None:
+                self.tickets[job_id] = ticket.hand_over()
+            try:
+                if background:
+                    self._start(job_id, airflow_cmd_split, wait=False)
+                else:
+                    self.futures[job_id] = self._get_executor().submit(self._run, job_id, airflow_cmd_split)
+            except Exception:
+                self._release_ticket(job_id)
+                raise
+        logging.info("Submitted job '" + job_id + "' for the command: " + str(job["airflow_cmd"]))
+        self._prune_history()
+        return self.get_job(job_id)
+
+    # Get the job. Jobs that were started by another process are read from their status file.
+    def get_job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self._load(job_id)
+
+    # List the jobs known to this host, most recent first
+    def list_jobs(self, status=None):
+        jobs = []
+        if os.path.isdir(self.output_folder):
+            for file_name in os.listdir(self.output_folder):
+                if file_name.endswith(".json"):
+                    job = self.get_job(file_name[:-len(".json")])
+                    if job is not None and (status is None or job["status"] == status):
+                        jobs.append(job)
+        return sorted(jobs, key=lambda job: job["submit_time"], reverse=True)
+
+    # Read up to length bytes of the output of the job starting at offset. The job writes the raw output of its process, so the
+    # lines go through the cli_output_line_filter as they're read. Only whole lines are returned (unless a single line is
+    # longer than length) so that a redacted part is never split between two reads.
+    def read_output(self, job_id, offset=0, length=None):
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        length = job_output_max_read_size if length is None else min(length, job_output_max_read_size)
+        output_file_path = self._get_output_file_path(job_id)
+        size = os.path.getsize(output_file_path) if os.path.isfile(output_file_path) else 0
+        data = b""
+        if offset < size:
+            with open(output_file_path, "rb") as output_file:
+                output_file.seek(offset)
+                data = output_file.read(length)
+        if not data.endswith(b"\n") and (offset + len(data) < size or job["status"] not in self.FINISHED_STATUSES):
+            last_line_end = data.rfind(b"\n")
+            if last_line_end != -1:
+                data = data[:last_line_end + 1]
+            elif len(data) < length:
+                data = b""  # the line is still being written
+        next_offset = offset + len(data)
+        lines = [cli_output_line_filter.filter_merged_line(line) for line in data.decode("utf-8", "replace").splitlines(True)]
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "offset": offset,
+            "next_offset": next_offset,
+            "size": size,
+            "complete": job["status"] in self.FINISHED_STATUSES and next_offset >= size,
+            "data": "".join([line for line in lines if line is not None])
+        }
+
+    # Cancel the job if it is queued or terminate its process if it is running. Returns the job afterwards.
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.get_job(job_id)
+            if job is None or job["status"] in self.FINISHED_STATUSES:
+                return job
+            future = self.futures.get(job_id)
+            if future is not None and future.cancel():
+                logging.info("Cancelled queued job '" + job_id + "'")
+                self.futures.pop(job_id, None)
+                self._release_ticket(job_id)
+            elif job["pid"] is not None:
+                logging.info("Terminating process " + str(job["pid"]) + " of job '" + job_id + "'")
+                try:
+                    if job["background"]:
+                        # the background jobs run in their own session, so the whole process group is terminated along
+                        # with the processes the service started (like the gunicorn workers of a webserver)
+                        os.killpg(job["pid"], signal.SIGTERM)
+                    else:
+                        os.kill(job["pid"], signal.SIGTERM)
+                except OSError as e:
+                    logging.warning("Failed to terminate process " + str(job["pid"]) + " of job '" + job_id + "': " + str(e))
+            # a job queued in another process is skipped when its turn comes since its status file says it's cancelled
+            self._update(job_id, status=self.CANCELLED, end_time=datetime.now().isoformat())
+            return self.get_job(job_id)
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self.executor
+
+    # Runs on the executor
+    def _run(self, job_id, airflow_cmd_split):
+        try:
+            self._start(job_id, airflow_cmd_split, wait=True)
+        except Exception as e:
+            logging.error("Job '" + job_id + "' failed to run: " + str(e))
+            self._update(job_id, status=self.FAILED, end_time=datetime.now().isoformat())
+        finally:
+            with self.lock:
+                self.futures.pop(job_id, None)
+            self._release_ticket(job_id)
+
+    def _start(self, job_id, airflow_cmd_split, wait):
+        with self.lock:
+            job = self.get_job(job_id)
+            if job is None or job["status"] == self.CANCELLED:
+                logging.info("Job '" + job_id + "' was cancelled before it started")
+                return
+            with open(self._get_output_file_path(job_id), "ab") as output_file:
+                if job["background"]:
+                    # starting the service in its own session so it isn't tied to the web server process
+                    process = subprocess.Popen(airflow_cmd_split, stdout=output_file, stderr=subprocess.STDOUT, close_fds=True, preexec_fn=os.setsid)
+                else:
+                    process = subprocess.Popen(airflow_cmd_split, stdout=output_file, stderr=subprocess.STDOUT, close_fds=True)
+            self.processes[job_id] = process
+            start_time = datetime.now()
+            self._update(job_id, status=self.RUNNING, pid=process.pid, start_time=start_time.isoformat())
+
+        if wait:
+            self._wait(job_id, process, start_time)
+        else:
+            waiter = threading.Thread(target=self._wait, args=(job_id, process, start_time))
+            waiter.daemon = True
+            waiter.start()
+
+    def _wait(self, job_id, process, start_time):
+        try:
+            exit_code = process.wait()
+            end_time = datetime.now()
+            with self.lock:
+                self.processes.pop(job_id, None)
+                job = self.get_job(job_id)
+                status = self.SUCCESS if exit_code == 0 else self.FAILED
+                if job is not None and job["status"] == self.CANCELLED:
+                    status = self.CANCELLED
+                self._update(job_id, status=status, exit_code=exit_code, end_time=end_time.isoformat(), duration=(end_time - start_time).total_seconds())
+        finally:
+            self._release_ticket(job_id)
+        logging.info("Job '" + job_id + "' finished with exit code " + str(exit_code))
+
+    # Give the weight the job took in the admission control back
+    def _release_ticket(self, job_id):
+        with self.lock:
+            ticket = self.tickets.pop(job_id, None)
+        if ticket is not None:
+            ticket.release()
+
+    def _update(self, job_id, **changes):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id)
+                if job is None:
+                    return
+            job.update(changes)
+            self._save(job)
+
+    def _get_output_file_path(self, job_id):
+        return os.path.join(self.output_folder, job_id + ".log")
+
+    def _get_status_file_path(self, job_id):
+        return os.path.join(self.output_folder, job_id + ".json")
+
+    # Write the status file through a temporary file so readers never see a partial file. The temporary file has a unique
+    # name since the job can be saved by several threads or processes at once (like its waiter and a cancel call).
+    def _save(self, job):
+        status_file_path = self._get_status_file_path(job["job_id"])
+        file_descriptor, tmp_file_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.output_folder)
+        try:
+            with os.fdopen(file_descriptor, "w") as status_file:
+                status_file.write(json.dumps(job))
+            os.rename(tmp_file_path, status_file_path)
+        except Exception:
+            try:
+                os.remove(tmp_file_path)
+            except OSError:
+                pass
+            raise
+
+    def _load(self, job_id):
+        if not re.match(r"^[0-9a-f]{32}$", str(job_id)):
+            return None
+        status_file_path = self._get_status_file_path(job_id)
+        try:
+            with open(status_file_path, "r") as status_file:
+                return json.loads(status_file.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    # Only keep the status and output files of the most recent finished jobs
+    def _prune_history(self):
+        with self.lock:
+            finished_jobs = [job for job in self.list_jobs() if job["status"] in self.FINISHED_STATUSES]
+            for job in finished_jobs[self.history_size:]:
+                logging.info("Removing job '" + job["job_id"] + "' from the job history")
+                self.jobs.pop(job["job_id"], None)
+                for file_path in [self._get_status_file_path(job["job_id"]), self._get_output_file_path(job["job_id"])]:
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass
+
+
+# Pipeline of regex filters applied to each line of the stdout and stderr of the CLI commands as they are read, so it
+# works the same on small outputs, large outputs and streamed outputs without holding the whole output. The filters are
+# applied in order and each one applies to stdout, stderr or both:
+#
+#   * drop   - Removes the lines matching the regex
+#   * keep   - Removes the lines not matching the regex
+#   * redact - Replaces the parts of the line matching the regex with the redaction text
+class REST_API_Line_Filter(object):
+
+    DROP = "drop"
+    KEEP = "keep"
+    REDACT = "redact"
+    ACTIONS = [DROP, KEEP, REDACT]
+
+    # Log lines written by Airflow, like: [2017-04-19 10:04:34,927] {__init__.py:36} INFO - Using executor CeleryExecutor
+    LOADING_MESSAGE_PATTERN = r"^\[\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}[,.]\d+\] \{[^}]*\} [A-Z]+ - "
+
+    def __init__(self, filters, redaction="***"):
+        self.filters = filters  # list of (action, stream names, compiled regex)
+        self.redaction = redaction
+
+    # Parse the filters from the config. There is one filter per line in the form ACTION:STREAM:REGEX where ACTION is
+    # drop, keep or redact and STREAM is stdout, stderr or both. Invalid filters are logged and skipped.
+    @staticmethod
+    def parse_filters(filters_config):
+        filters = []
+        for filter_config in filters_config.split("\n"):
+            filter_config = filter_config.strip()
+            if not filter_config:
+                continue
+            try:
+                action, stream_name, pattern = filter_config.split(":", 2)
+                action = action.strip().lower()
+                stream_name = stream_name.strip().lower()
+                if action not in REST_API_Line_Filter.ACTIONS or stream_name not in ["stdout", "stderr", "both"]:
+                    raise ValueError("the action should be one of " + str(REST_API_Line_Filter.ACTIONS) + " and the stream one of stdout, stderr or both")
+                stream_names = ["stdout", "stderr"] if stream_name == "both" else [stream_name]
+                filters.append((action, stream_names, re.compile(pattern)))
+            except (ValueError, re.error) as e:
+                logging.error("Skipping the invalid output line filter '" + filter_config + "': " + str(e))
+        return filters
+
+    # Get the line after going through the filters or None if it's dropped
+    def filter_line(self, stream_name, line):
+        for action, stream_names, regex in self.filters:
+            if stream_name not in stream_names:
+                continue
+            if action == self.REDACT:
+                line = regex.sub(self.redaction, line)
+            elif (regex.search(line) is not None) == (action == self.DROP):
+                return None
+        return line
+
+    # Get the line of an output where stdout and stderr are merged (like the output of the jobs) after going through the
+    # filters or None if it's dropped. The drop and keep filters of stdout apply and the redact filters of both streams.
+    def filter_merged_line(self, line):
+        for action, stream_names, regex in self.filters:
+            if action == self.REDACT:
+                line = regex.sub(self.redaction, line)
+            elif "stdout" in stream_names and (regex.search(line) is not None) == (action == self.DROP):
+                return None
+        return line
+
+    # Get the text with the parts matching the redact filters of both streams replaced by the redaction text, line by
+    # line like for the output of the CLI. Used for data that isn't an output, so the drop and keep filters don't apply.
+    def redact(self, text):
+        regexes = [regex for action, stream_names, regex in self.filters if action == self.REDACT]
+        if not regexes:
+            return text
+        lines = text.splitlines(True)
+        for regex in regexes:
+            lines = [regex.sub(self.redaction, line) for line in lines]
+        return "".join(lines)
+
+    # Generator that filters (stream_name, line) tuples
+    def filter_lines(self, lines):
+        if not self.filters:
+            for stream_name, line in lines:
+                yield stream_name, line
+            return
+        for stream_name, line in lines:
+            line = self.filter_line(stream_name, line)
+            if line is not None:
+                yield stream_name, line
+
+    # Filter the stdout and stderr of an output dict of a CLI function
+    def filter_output(self, output):
+        if self.filters:
+            for stream_name in ["stdout", "stderr"]:
+                lines = output.get(stream_name, "").splitlines(True)
+                output[stream_name] = "".join([line for line in [self.filter_line(stream_name, line) for line in lines] if line is not None])
+        return output
+
+
+# Collects the stdout and stderr lines of a CLI command while keeping at most max_memory_size bytes of each in memory.
+# Once a stream goes over it, the stream is written to a file in the folder instead (including the part that was kept
+# in memory) and only the part kept in memory is returned in the response. The output then gets an 'output_id' that can
+# be used with the cli_output API to read the whole output by byte or line ranges. At most history_size such outputs
+# are kept in the folder.
+class REST_API_Output_Capture(object):
+
+    STREAM_NAMES = ["stdout", "stderr"]
+
+    def __init__(self, max_memory_size, folder, history_size):
+        self.max_memory_size = max_memory_size
+        self.folder = folder
+        self.history_size = history_size
+        self.output_id = None
+        self.lines = {"stdout": [], "stderr": []}
+        self.sizes = {"stdout": 0, "stderr": 0}  # bytes of each stream, including the part written to a file
+        self.output_files = {}  # stream_name -> file the stream is written to once it went over max_memory_size
+
+    # Add a line (or chunk of a line) of the output
+    def add(self, stream_name, line):
+        encoded_line = line.encode("utf-8")
+        output_file = self.output_files.get(stream_name)
+        if output_file is None and self.sizes[stream_name] + len(encoded_line) > self.max_memory_size:
+            output_file = self._open_output_file(stream_name)
+        if output_file is not None:
+            output_file.write(encoded_line)
+        else:
+            self.lines[stream_name].append(line)
+        self.sizes[stream_name] += len(encoded_line)
+
+    # Get the output dict of the CLI command. When the output was too large, the dict also has the 'output_id' and for
+    # each stream whether it was 'truncated' and its full 'size' in bytes.
+    def get_output(self):
+        output = REST_API.get_empty_process_output()
+        for stream_name in self.STREAM_NAMES:
+            output[stream_name] = "".join(self.lines[stream_name])
+        if self.output_id is not None:
+            # the streams that fit in memory are written too so that the whole output can be read with the output_id
+            truncated = {}
+            for stream_name in self.STREAM_NAMES:
+                truncated[stream_name] = stream_name in self.output_files
+                output_file = self.output_files.get(stream_name) or self._open_output_file(stream_name)
+                output_file.close()
+            output["output_id"] = self.output_id
+            output["truncated"] = truncated
+            output["size"] = dict(self.sizes)
+            logging.info("The output was larger than " + str(self.max_memory_size) + " bytes. The whole output was written to the output '" + self.output_id + "'.")
+            self._prune_history()
+        return output
+
+    def _open_output_file(self, stream_name):
+        if self.output_id is None:
+            self.output_id = uuid.uuid4().hex
+            if not os.path.isdir(self.folder):
+                try:
+                    os.makedirs(self.folder)
+                except OSError:
+                    pass  # created by another process in the meantime
+        output_file_path = self.get_output_file_path(self.folder, self.output_id, stream_name)
+        # the output can contain things like connection URIs so only the owner is allowed to read it
+        output_file = os.fdopen(os.open(output_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb")
+        for line in self.lines[stream_name]:
+            output_file.write(line.encode("utf-8"))
+        self.lines[stream_name] = self._get_lines_within(self.lines[stream_name], self.max_memory_size)
+        self.output_files[stream_name] = output_file
+        return output_file
+
+    # Get the first lines that add up to at most max_size bytes
+    @staticmethod
+    def _get_lines_within(lines, max_size):
+        lines_within = []
+        size = 0
+        for line in lines:
+            size += len(line.encode("utf-8"))
+            if size > max_size:
+                break
+            lines_within.append(line)
+        return lines_within
+
+    def _prune_history(self):
+        output_files = []
+        for file_name in os.listdir(self.folder):
+            try:
+                output_files.append((os.path.getmtime(os.path.join(self.folder, file_name)), file_name))
+            except OSError:
+                continue
+        output_ids = []
+        for _, file_name in sorted(output_files, reverse=True):
+            output_id = file_name.split(".")[0]
+            if output_id not in output_ids:
+                output_ids.append(output_id)
+        for output_id in output_ids[self.history_size:]:
+            logging.info("Removing the output '" + output_id + "' from the output history")
+            for stream_name in self.STREAM_NAMES:
+                try:
+                    os.remove(self.get_output_file_path(self.folder, output_id, stream_name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def get_output_file_path(folder, output_id, stream_name):
+        return os.path.join(folder, output_id + "." + stream_name)
+
+    # Read up to length bytes of a stream of the output starting at offset. Returns None if there is no such output.
+    @staticmethod
+    def read_bytes(folder, output_id, stream_name, offset=0, length=None):
+        output_file_path = REST_API_Output_Capture._get_existing_output_file_path(folder, output_id, stream_name)
+        if output_file_path is None:
+            return None
+        length = process_output_max_read_size if length is None else min(length, process_output_max_read_size)
+        size = os.path.getsize(output_file_path)
+        data = b""
+        if offset < size:
+            with open(output_file_path, "rb") as output_file:
+                output_file.seek(offset)
+                data = output_file.read(length)
+        return {
+            "output_id": output_id,
+            "stream": stream_name,
+            "offset": offset,
+            "next_offset": offset + len(data),
+            "size": size,
+            "complete": offset + len(data) >= size,
+            "data": data.decode("utf-8", "replace")
+        }
+
+    # Read up to line_count lines of a stream of the output starting at the line start_line (0 based). At most
+    # process_output_max_read_size bytes are returned. Returns None if there is no such output.
+    @staticmethod
+    def read_lines(folder, output_id, stream_name, start_line=0, line_count=None):
+        output_file_path = REST_API_Output_Capture._get_existing_output_file_path(folder, output_id, stream_name)
+        if output_file_path is None:
+            return None
+        lines = []
+        read_size = 0
+        line_number = 0
+        complete = True
+        with open(output_file_path, "rb") as output_file:
+            for line in output_file:
+                if line_number >= start_line:
+                    if (line_count is not None and len(lines) >= line_count) or read_size + len(line) > process_output_max_read_size:
+                        complete = False
+                        break
+                    lines.append(line.decode("utf-8", "replace"))
+                    read_size += len(line)
+                line_number += 1
+        return {
+            "output_id": output_id,
+            "stream": stream_name,
+            "start_line": start_line,
+            "next_line": start_line + len(lines),
+            "complete": complete,
+            "lines": lines
+        }
+
+    @staticmethod
+    def _get_existing_output_file_path(folder, output_id, stream_name):
+        if not re.match(r"^[0-9a-f]{32}$", str(output_id)) or stream_name not in REST_API_Output_Capture.STREAM_NAMES:
+            return None
+        output_file_path = REST_API_Output_Capture.get_output_file_path(folder, output_id, stream_name)
+        return output_file_path if os.path.isfile(output_file_path) else None
+
+
+# Reads the local log files of the task instances written in the BASE_LOG_FOLDER by the task runners. The files are only read
+# with seeks and bounded reads so that large logs are never loaded as a whole.
+class REST_API_Task_Log(object):
+
+    # size of the blocks read backwards from the end of a log to find its last lines
+    tail_block_size = 65536
+
+    # Get the path of the log file of the try of the task instance or None if it's not inside the BASE_LOG_FOLDER
+    @staticmethod
+    def get_log_file_path(dag_id, task_id, execution_date, try_number):
+        base_log_folder = os.path.abspath(airflow_base_log_folder)
+        log_file_path = os.path.abspath(os.path.join(base_log_folder, task_log_filename_template.format(
+            dag_id=dag_id,
+            task_id=task_id,
+            execution_date=execution_date.isoformat(),
+            try_number=try_number
+        )))
+        return log_file_path if log_file_path.startswith(base_log_folder + os.sep) else None
+
+    # Get the latest try_number of the task instance, which is the one its last log file is numbered with
+    @staticmethod
+    def get_latest_try_number(dag_id, task_id, execution_date):
+        task_instance = TaskInstance.__table__
+        session = settings.Session()
+        try:
+            try_number = session.execute(select([task_instance.c.try_number]).where(and_(
+                task_instance.c.dag_id == dag_id,
+                task_instance.c.task_id == task_id,
+                task_instance.c.execution_date == execution_date
+            ))).scalar()
+        finally:
+            session.close()
+        return max(try_number or 1, 1)
+
+    # Wait until the log file has more than offset bytes or the timeout passes. The file doesn't have to exist yet.
+    @staticmethod
+    def wait_for_bytes(log_file_path, offset, timeout):
+        end_time = time.time() + timeout
+        while True:
+            size = os.path.getsize(log_file_path) if os.path.isfile(log_file_path) else -1
+            if size > offset or time.time() >= end_time:
+                return
+            time.sleep(max(0, min(task_log_follow_poll_interval, end_time - time.time())))
+
+    # Read up to length bytes of the log file starting at offset
+    @staticmethod
+    def read_bytes(log_file_path, offset=0, length=None):
+        length = task_log_max_read_size if length is None else min(length, task_log_max_read_size)
+        size = os.path.getsize(log_file_path)
+        data = b""
+        if offset < size:
+            with open(log_file_path, "rb") as log_file:
+                log_file.seek(offset)
+                data = log_file.read(length)
+            if offset + len(data) < size:
+                data = REST_API_Task_Log.trim_incomplete_character(data)
+        return REST_API_Task_Log.get_output(offset, data, size)
+
+    # Read the last line_count lines of the log file (at most length bytes) by reading blocks backwards from its end
+    @staticmethod
+    def read_tail(log_file_path, line_count, length=None):
+        length = task_log_max_read_size if length is None else min(length, task_log_max_read_size)
+        with open(log_file_path, "rb") as log_file:
+            log_file.seek(0, os.SEEK_END)
+            size = log_file.tell()
+            position = size
+            data = b""
+            # a log ending with a new line has one more new line than lines
+            while position > 0 and data.count(b"\n") <= line_count and len(data) < length:
+                read_size = min(REST_API_Task_Log.tail_block_size, position)
+                position -= read_size
+                log_file.seek(position)
+                data = log_file.read(read_size) + data
+        lines_end = len(data) - 1 if data.endswith(b"\n") else len(data)
+        start = lines_end
+        for _ in range(line_count):
+            start = data.rfind(b"\n", 0, start)
+            if start == -1:
+                break
+        start = start + 1 if line_count > 0 else len(data)
+        if len(data) - start > length:
+            start = len(data) - length
+        return REST_API_Task_Log.get_output(position + start, data[start:], size)
+
+    # Drop the bytes of a UTF-8 character cut in the middle at the end of the data so that the next read starts with them
+    @staticmethod
+    def trim_incomplete_character(data):
+        tail = bytearray(data[-3:])
+        for index in range(1, len(tail) + 1):
+            byte = tail[-index]
+            if byte & 0xC0 == 0x80:
+                continue  # continuation byte
+            if byte & 0xE0 == 0xC0:
+                character_length = 2
+            elif byte & 0xF0 == 0xE0:
+                character_length = 3
+            elif byte & 0xF8 == 0xF0:
+                character_length = 4
+            else:
+                character_length = 1
+            return data[:-index] if character_length > index else data
+        return data
+
+    @staticmethod
+    def get_output(offset, data, size):
+        return {
+            "offset": offset,
+            "next_offset": offset + len(data),
+            "size": size,
+            "complete": offset + len(data) >= size,
+            "data": data.decode("utf-8", "replace")
+        }
+
+
+# A pre-warmed helper process that runs Airflow CLI commands without paying for the interpreter startup, the 'import airflow'
+# chain and the plugin loading on every call. The helper runs this module with '--cli-fork-server' (see
+# run_cli_fork_server()) so it has the CLI parser and a warm DagBag loaded, and forks a child for each command it's handed.
+# Commands are exchanged as JSON lines over the helper's stdin/stdout: the helper answers with the pid of the child once
+# it's forked and with its exit code once it's done. The child writes the command's stdout and stderr to temporary files
+# which are read back and removed once the command is done. A child that runs for longer than the timeout is terminated.
+class REST_API_CLI_Worker(object):
+
+    # Prefix of the lines written by the fork server so they can't be confused with anything printed while importing
+    protocol_prefix = "REST_API_CLI_FORK_SERVER "
+
+    # Number of seconds a child terminated because of the timeout has to exit before it's killed
+    kill_grace_period = 5
+
+    # Get the current resident memory of the process in KB. ru_maxrss is only the peak, which never goes down, so it's only
+    # used where /proc isn't available.
+    @staticmethod
+    def get_rss_kb():
+        try:
+            with open("/proc/self/statm", "r") as statm_file:
+                return int(statm_file.read().split()[1]) * resource.getpagesize() // 1024
+        except (IOError, OSError, ValueError, IndexError):
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return max_rss // 1024 if sys.platform == "darwin" else max_rss  # bytes on macOS
+
+    def __init__(self):
+        self.jobs = 0
+        self.rss_kb = 0
+        plugin_file_path = os.path.abspath(__file__)
+        if plugin_file_path.endswith(".pyc"):
+            plugin_file_path = plugin_file_path[:-1]
+        with open(os.path.join(airflow_base_log_folder, "rest_api_plugin_cli_workers.log"), "ab") as log_file:
+            self.process = subprocess.Popen([sys.executable, plugin_file_path, "--cli-fork-server"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log_file, close_fds=True)
+        ready = self._read_message()
+        self.rss_kb = ready.get("rss_kb", 0)
+        logging.info("Started CLI Worker with pid " + str(self.process.pid))
+
+    # Execute the command in a forked child of the worker and get its output along with its exit code. When the command
+    # runs for longer than timeout seconds (0 for no timeout), the child is terminated and the output says so.
+    def execute(self, airflow_cmd_split, timeout=0):
+        stdout_file_descriptor, stdout_path = tempfile.mkstemp(prefix="rest_api_plugin_cli_", suffix=".stdout")
+        stderr_file_descriptor, stderr_path = tempfile.mkstemp(prefix="rest_api_plugin_cli_", suffix=".stderr")
+        os.close(stdout_file_descriptor)
+        os.close(stderr_file_descriptor)
+        timers = []
+        try:
+            self._write_message({"argv": airflow_cmd_split[1:], "stdout_path": stdout_path, "stderr_path": stderr_path})
+            child_pid = self._read_message()["child_pid"]
+            timed_out = threading.Event()
+            done = threading.Event()
+
+            def terminate_child(signal_number):
+                if done.is_set():
+                    return
+                timed_out.set()
+                logging.warning("Terminating the command of CLI Worker " + str(self.process.pid) + " after " + str(timeout) + " seconds (child pid: " + str(child_pid) + ")")
+                try:
+                    os.kill(child_pid, signal_number)
+                except OSError:
+                    pass  # already exited
+
+            if timeout > 0:
+                timers = [threading.Timer(timeout, terminate_child, [signal.SIGTERM]), threading.Timer(timeout + self.kill_grace_period, terminate_child, [signal.SIGKILL])]
+                for timer in timers:
+                    timer.daemon = True
+                    timer.start()
+            result = self._read_message()
+            done.set()
+            self.jobs += 1
+            self.rss_kb = result.get("rss_kb", 0)
+            logging.info("CLI Worker " + str(self.process.pid) + " finished the command with exit code " + str(result.get("exit_code")))
+            lines = REST_API.read_output_files_lines(stdout_path, stderr_path)
+            if timed_out.is_set():
+                lines = itertools.chain(lines, [("stderr", "The command was terminated after running for more than " + str(timeout) + " seconds (see cli_worker_execute_timeout)\n")])
+            output = REST_API.collect_output_lines(lines)
+            output["exit_code"] = result.get("exit_code")
+            return output
+        finally:
+            for timer in timers:
+                timer.cancel()
+            for path in [stdout_path, stderr_path]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # Whether the worker should be replaced instead of being reused
+    def should_recycle(self, max_jobs, max_memory_mb):
+        return self.process.poll() is not None or self.jobs >= max_jobs or self.rss_kb >= max_memory_mb * 1024
+
+    def stop(self):
+        logging.info("Stopping CLI Worker with pid " + str(self.process.pid) + " after " + str(self.jobs) + " jobs")
+        try:
+            self.process.stdin.close()
+        except (IOError, OSError):
+            pass
+        for _ in range(50):
+            if self.process.poll() is not None:
+                return
+            time.sleep(0.1)
+        self.process.kill()
+        self.process.wait()
+
+    def _write_message(self, message):
+        self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        self.process.stdin.flush()
+
+    def _read_message(self):
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise Exception("CLI Worker " + str(self.process.pid) + " exited unexpectedly")
+            line = REST_API.decode_output_line(line)
+            if self.protocol_prefix in line:
+                return json.loads(line[line.index(self.protocol_prefix) + len(self.protocol_prefix):])
+
+
+# Pool of pre-warmed CLI Workers. Workers are started in the background the first time the pool is used and replaced when
+# they have run max_jobs commands or their memory grew over max_memory_mb. When no worker becomes available within the
+# acquire timeout (for example while the workers are still starting), None is returned so the caller spawns the command.
+class REST_API_CLI_Worker_Pool(object):
+
+    def __init__(self, size, max_jobs, max_memory_mb, acquire_timeout, execute_timeout=0):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_memory_mb = max_memory_mb
+        self.acquire_timeout = acquire_timeout
+        self.execute_timeout = execute_timeout
+        self.lock = threading.Lock()
+        self.idle_workers = queue.Queue()
+        self.worker_count = 0  # workers that are idle, busy or starting
+
+    # Execute the command on a worker. Returns the output or None if it couldn't be executed on a worker.
+    def execute(self, airflow_cmd_split):
+        self._start_missing_workers()
+        try:
+            worker = self.idle_workers.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            logging.warning("No CLI Worker became available within " + str(self.acquire_timeout) + " seconds")
+            return None
+        try:
+            output = worker.execute(airflow_cmd_split, self.execute_timeout)
+        except Exception as e:
+            logging.error("CLI Worker " + str(worker.process.pid) + " failed to execute the command: " + str(e))
+            self._discard_worker(worker)
+            return None
+        if worker.should_recycle(self.max_jobs, self.max_memory_mb):
+            self._discard_worker(worker)
+        else:
+            self.idle_workers.put(worker)
+        return output
+
+    def _discard_worker(self, worker):
+        worker.stop()
+        with self.lock:
+            self.worker_count -= 1
+        self._start_missing_workers()
+
+    def _start_missing_workers(self):
+        with self.lock:
+            missing_worker_count = self.size - self.worker_count
+            self.worker_count += max(missing_worker_count, 0)
+        for _ in range(missing_worker_count):
+            starter = threading.Thread(target=self._start_worker)
+            starter.daemon = True
+            starter.start()
+
+    def _start_worker(self):
+        try:
+            self.idle_workers.put(REST_API_CLI_Worker())
+        except Exception as e:
+            logging.error("Failed to start a CLI Worker: " + str(e))
+            with self.lock:
+                self.worker_count -= 1
+
+
+# Clears the task instances of many DAGs with a few set-based statements, instead of 'airflow clear' loading the DagBag and
+# updating the task instances one by one. The task instances are selected and cleared the same way: the running ones are
+# shut down along with their jobs, the other ones lose their state (and get their retries back) so that the scheduler runs
+# them again, and their DAG runs are set back to running.
+class REST_API_Task_Instance_Clearer(object):
+
+    # the table of the jobs of the running task instances, which isn't one of the models the plugin imports
+    job_table = table("job", column("id"), column("state"))
+
+    # Get a dict of dag_id -> {task_id: retries} of the tasks to clear in the DAGs, along with the tasks of their subdags.
+    # The tasks of the DAGs are filtered by the task_regex like 'airflow clear' does, the subdags are cleared as a whole.
+    @staticmethod
+    def get_tasks(dags, task_regex=None, upstream=False, downstream=False, include_subdags=True):
+        dag_tasks = collections.OrderedDict()
+        dags_to_clear = [(dag, True) for dag in dags]
+        while dags_to_clear:
+            dag, apply_task_regex = dags_to_clear.pop(0)
+            if dag.dag_id in dag_tasks:
+                continue
+            tasks = list(dag.tasks)
+            if apply_task_regex and task_regex is not None:
+                tasks = [task for task in tasks if re.search(task_regex, task.task_id)]
+                relatives = []
+                for task in tasks:
+                    if upstream:
+                        relatives.extend(task.get_flat_relatives(upstream=True))
+                    if downstream:
+                        relatives.extend(task.get_flat_relatives(upstream=False))
+                tasks.extend(relatives)
+            dag_tasks[dag.dag_id] = dict([(task.task_id, getattr(task, "retries", 0) or 0) for task in tasks])
+            if include_subdags:
+                dags_to_clear.extend([(task.subdag, False) for task in tasks if task.__class__.__name__ == "SubDagOperator"])
+        return dag_tasks
+
+    # Get the condition that selects the task instances to clear
+    @staticmethod
+    def get_condition(dag_tasks, start_date=None, end_date=None, only_failed=False, only_running=False):
+        task_instance = TaskInstance.__table__
+        dag_conditions = [and_(task_instance.c.dag_id == dag_id, task_instance.c.task_id.in_(list(tasks))) for dag_id, tasks in dag_tasks.items() if tasks]
+        conditions = [or_(*dag_conditions) if dag_conditions else task_instance.c.dag_id.in_([])]
+        if start_date is not None:
+            conditions.append(task_instance.c.execution_date >= start_date)
+        if end_date is not None:
+            conditions.append(task_instance.c.execution_date <= end_date)
+        if only_failed:
+            conditions.append(task_instance.c.state == State.FAILED)
+        if only_running:
+            conditions.append(task_instance.c.state == State.RUNNING)
+        return and_(*conditions)
+
+    # Get a dict of dag_id -> number of task instances that match the condition
+    @staticmethod
+    def count(session, condition):
+        task_instance = TaskInstance.__table__
+        query = select([task_instance.c.dag_id, func.count()]).where(condition).group_by(task_instance.c.dag_id)
+        return dict([(dag_id, count) for dag_id, count in session.execute(query).fetchall()])
+
+    # Clear the task instances that match the condition. Nothing is committed.
+    @staticmethod
+    def clear(session, dag_tasks, condition):
+        task_instance = TaskInstance.__table__
+        dag_run = DagRun.__table__
+
+        # the DAG runs are updated first since the cleared task instances don't match the condition anymore
+        session.execute(dag_run.update().where(and_(
+            dag_run.c.dag_id.in_(list(dag_tasks)),
+            exists().where(and_(task_instance.c.dag_id == dag_run.c.dag_id, task_instance.c.execution_date == dag_run.c.execution_date, condition))
+        )).values(state=State.RUNNING, start_date=datetime.now()))
+
+        # the running task instances without a job are left as they are, like 'airflow clear' does. The other ones are shut
+        # down after the rest is cleared so that their new state doesn't match the condition of the rest.
+        not_running_condition = and_(condition, or_(task_instance.c.state != State.RUNNING, task_instance.c.state.is_(None)))
+        if "max_tries" not in task_instance.c:
+            # Airflow versions without max_tries delete the task instances, which resets their try_number
+            session.execute(task_instance.update().where(not_running_condition).values(state=State.NONE, try_number=0))
+        else:
+            # the tasks are grouped by their number of retries so that each group is given its retries back with one statement
+            for dag_id, tasks in dag_tasks.items():
+                task_ids_by_retries = collections.defaultdict(list)
+                for task_id, retries in tasks.items():
+                    task_ids_by_retries[retries].append(task_id)
+                for retries, task_ids in task_ids_by_retries.items():
+                    session.execute(task_instance.update().where(and_(not_running_condition, task_instance.c.dag_id == dag_id, task_instance.c.task_id.in_(task_ids))).values(
+                        state=State.NONE,
+                        max_tries=task_instance.c.try_number + retries
+                    ))
+
+        running_condition = and_(condition, task_instance.c.state == State.RUNNING, task_instance.c.job_id.isnot(None))
+        job_table = REST_API_Task_Instance_Clearer.job_table
+        session.execute(job_table.update().where(job_table.c.id.in_(select([task_instance.c.job_id]).where(running_condition))).values(state=State.SHUTDOWN))
+        session.execute(task_instance.update().where(running_condition).values(state=State.SHUTDOWN))
+
+
+# Queries the states of many task instances or dag runs at once.
+# Instead of one query per key, the keys are queried keys_per_query at a time. The keys are grouped by all their columns but
+# one, which is filtered with an IN (like the task_ids of a dag run), so that the query only matches the requested keys and
+# can use the primary key index of the table.
+class REST_API_State_Query(object):
+
+    # Maximum number of keys per query, which keeps the number of bound parameters under the limits of the databases
+    keys_per_query = 250
+
+    # Get the (dag_id, task_id, execution_date, state) of the task instances. Either the keys, which are
+    # (dag_id, task_id, execution_date) tuples, or the dag_id should be provided. Keys that have no task instance are returned
+    # with a None state. If states is provided, only the task instances in one of the states are returned (None for no state).
+    @staticmethod
+    def get_task_instance_states(session, keys=None, dag_id=None, task_ids=None, start_date=None, end_date=None, states=None):
+        query = session.query(TaskInstance.dag_id, TaskInstance.task_id, TaskInstance.execution_date, TaskInstance.state)
+        if states is not None:
+            query = query.filter(REST_API_State_Query.get_state_filter(TaskInstance.state, states))
+        if keys is not None:
+            # the task instances of a dag run are grouped with an IN on their task_ids
+            rows = REST_API_State_Query.query_keys(query, [TaskInstance.dag_id, TaskInstance.task_id, TaskInstance.execution_date], 1, keys)
+            return REST_API_State_Query.match_keys(keys, rows, states)
+        else:
+            query = query.filter(TaskInstance.dag_id == dag_id)
+            if task_ids:
+                query = query.filter(TaskInstance.task_id.in_(task_ids))
+            if start_date is not None:
+                query = query.filter(TaskInstance.execution_date >= start_date)
+            if end_date is not None:
+                query = query.filter(TaskInstance.execution_date <= end_date)
+            query = query.order_by(TaskInstance.execution_date, TaskInstance.task_id)
+        return [tuple(row) for row in query.all()]
+
+    # Get the (dag_id, execution_date, state) of the dag runs. Same as get_task_instance_states() but the keys are
+    # (dag_id, execution_date) tuples.
+    @staticmethod
+    def get_dag_run_states(session, keys=None, dag_id=None, start_date=None, end_date=None, states=None):
+        query = session.query(DagRun.dag_id, DagRun.execution_date, DagRun.state)
+        if states is not None:
+            query = query.filter(REST_API_State_Query.get_state_filter(DagRun.state, states))
+        if keys is not None:
+            # the dag runs of a DAG are grouped with an IN on their execution_dates
+            rows = REST_API_State_Query.query_keys(query, [DagRun.dag_id, DagRun.execution_date], 1, keys)
+            return REST_API_State_Query.match_keys(keys, rows, states)
+        else:
+            query = query.filter(DagRun.dag_id == dag_id)
+            if start_date is not None:
+                query = query.filter(DagRun.execution_date >= start_date)
+            if end_date is not None:
+                query = query.filter(DagRun.execution_date <= end_date)
+            query = query.order_by(DagRun.execution_date)
+        return [tuple(row) for row in query.all()]
+
+    # Get the rows of the query that match the keys, which are tuples of the values of the columns. The keys are queried
+    # keys_per_query at a time, grouped by the values of all the columns but the one at in_index which is filtered with
+    # an IN.
+    @staticmethod
+    def query_keys(query, columns, in_index, keys):
+        group_columns = [key_column for index, key_column in enumerate(columns) if index != in_index]
+        get_group = lambda key: tuple([value for index, value in enumerate(key) if index != in_index])
+        # the keys of a group are kept together so that a group is split between as few queries as possible
+        keys = sorted(set([tuple(key) for key in keys]), key=lambda key: [str(value) for value in get_group(key)])
+        rows = []
+        for chunk_start in range(0, len(keys), REST_API_State_Query.keys_per_query):
+            groups = collections.OrderedDict()  # values of the group columns -> values of the IN column
+            for key in keys[chunk_start:chunk_start + REST_API_State_Query.keys_per_query]:
+                groups.setdefault(get_group(key), []).append(key[in_index])
+            condition = or_(*[
+                and_(*([group_column == value for group_column, value in zip(group_columns, group)] + [columns[in_index].in_(in_values)]))
+                for group, in_values in groups.items()
+            ])
+            rows.extend([tuple(row) for row in query.filter(condition).all()])
+        return rows
+
+    # Filter on the states, where None stands for no state
+    @staticmethod
+    def get_state_filter(column, states):
+        conditions = []
+        not_none_states = [state for state in states if state is not None]
+        if not_none_states:
+            conditions.append(column.in_(not_none_states))
+        if None in states:
+            conditions.append(column.is_(None))
+        return or_(*conditions) if conditions else column.in_([])
+
+    # Get the row of each key in the order of the keys, with a None state for the keys without a row
+    @staticmethod
+    def match_keys(keys, rows, states):
+        states_by_key = dict([(row[:-1], row[-1]) for row in rows])
+        matched_rows = []
+        for key in keys:
+            key = tuple(key)
+            if key in states_by_key:
+                matched_rows.append(key + (states_by_key[key],))
+            elif states is None or None in states:
+                matched_rows.append(key + (None,))
+        return matched_rows
+
+    # Convert rows into a dict of columns
+    @staticmethod
+    def to_columns(column_names, rows):
+        columns = dict([(column_name, []) for column_name in column_names])
+        for row in rows:
+            for column_name, value in zip(column_names, row):
+                columns[column_name].append(value.isoformat() if isinstance(value, datetime) else value)
+        return {"count": len(rows), "columns": columns}
+
+
+# Long-poll watches of the state of dag runs and task instances. The watches of all the calls waiting in the web server
+# process are served by a single thread that polls the states of all of them with one query for the dag runs and one
+# for the task instances every poll_interval seconds (see REST_API_State_Query), instead of a query per watch. A watch
+# is done as soon as one of its states differs from the known states. The thread stops when nothing is being watched.
+# Each watch still blocks the worker of its request while it waits, so it only scales with threaded or async workers.
+class REST_API_State_Watcher(object):
+
+    def __init__(self, poll_interval, max_watchers):
+        self.poll_interval = poll_interval
+        self.max_watchers = max_watchers
+        self.lock = threading.Lock()
+        self.watches = {}  # watch id -> {"dag_run_keys", "task_instance_keys", "known_states", "states", "event"}
+        self.thread = None
+        self.stats = {
+            "watches": 0,
+            "changes": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "polls": 0,
+            "total_poll_seconds": 0.0
+        }
+
+    # Wait until the states of the keys differ from the known states, a dict of key -> state, or timeout seconds pass.
+    # The keys are (dag_id, execution_date) of dag runs or (dag_id, task_id, execution_date) of task instances. Without
+    # known states, the first poll ends the watch. Returns (changed, states) or None when too many watches are running.
+    def watch(self, dag_run_keys, task_instance_keys, known_states, timeout):
+        watch = {
+            "dag_run_keys": dag_run_keys,
+            "task_instance_keys": task_instance_keys,
+            "known_states": known_states,
+            "states": None,
+            "event": threading.Event()
+        }
+        watch_id = uuid.uuid4().hex
+        with self.lock:
+            if len(self.watches) >= self.max_watchers:
+                self.stats["rejected"] += 1
+                return None
+            self.watches[watch_id] = watch
+            self.stats["watches"] += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._poll_loop, name="rest_api_state_watcher")
+                self.thread.daemon = True
+                self.thread.start()
+        changed = watch["event"].wait(timeout)
+        with self.lock:
+            self.watches.pop(watch_id, None)
+            self.stats["changes" if changed else "timeouts"] += 1
+        return bool(changed), watch["states"]
+
+    # Get a copy of the counters along with the number of running watches
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["watching"] = len(self.watches)
+            stats["poll_interval"] = self.poll_interval
+            return stats
+
+    def _poll_loop(self):
+        while True:
+            with self.lock:
+                if not self.watches:
+                    self.thread = None
+                    return
+                watches = list(self.watches.values())
+            start_time = time.time()
+            try:
+                self._poll(watches)
+            except Exception as e:
+                logging.error("Failed to poll the states of the watches: " + str(e))
+            poll_seconds = time.time() - start_time
+            with self.lock:
+                self.stats["polls"] += 1
+                self.stats["total_poll_seconds"] += poll_seconds
+            time.sleep(max(0, self.poll_interval - poll_seconds))
+
+    # Get the states of the keys of all the watches and end the watches whose states changed
+    def _poll(self, watches):
+        dag_run_keys = set()
+        task_instance_keys = set()
+        for watch in watches:
+            dag_run_keys.update(watch["dag_run_keys"])
+            task_instance_keys.update(watch["task_instance_keys"])
+        states = {}
+        session = settings.Session()
+        try:
+            for row in REST_API_State_Query.get_dag_run_states(session, keys=list(dag_run_keys)):
+                states[row[:-1]] = row[-1]
+            for row in REST_API_State_Query.get_task_instance_states(session, keys=list(task_instance_keys)):
+                states[row[:-1]] = row[-1]
+        finally:
+            session.close()
+        for watch in watches:
+            watch["states"] = dict([(key, states.get(key)) for key in watch["dag_run_keys"] + watch["task_instance_keys"]])
+            if watch["known_states"] is None or watch["states"] != watch["known_states"]:
+                watch["event"].set()
+
+
+# REST_API View which extends the flask_admin BaseView
+class REST_API(BaseView):
+
+    # Fields of the connections the connections_query API can return. The password is never returned.
+    connection_fields = ["conn_id", "conn_type", "host", "schema", "login", "port", "extra", "is_encrypted", "is_extra_encrypted"]
+    connection_default_fields = ["conn_id", "conn_type", "host", "schema", "login", "port"]
+
+    # Checks a string object to see if it is none or empty so we can determine if an argument (passed to the rest api) is provided
+    @staticmethod
+    def is_arg_not_provided(arg):
+        return arg is None or arg == ""
+
+    # Checks if a boolean argument (passed to the rest api) is set. It's set when it's true, on or 1, or when it's provided
+    # without a value like a checkbox.
+    @staticmethod
+    def is_arg_true(arg):
+        return arg is not None and arg.strip().lower() in ["", "true", "on", "1"]
+
+    # Get the api_metadata of the API from the api object list or None if there is no such API
+    @staticmethod
+    def get_api_metadata(api):
+        compiled_api = api_registry.get(api.strip().lower()) if api is not None else None
+        return compiled_api.metadata if compiled_api is not None else None
+
+    # Get the JSON body of the request. When the request isn't JSON (like the forms on the admin page), the JSON is read from
+    # the form field instead. Raises a ValueError if the JSON is invalid.
+    @staticmethod
+    def get_json_body(form_field_name):
+        body = request.get_json(silent=True)
+        if body is None and request.form.get(form_field_name):
+            body = json.loads(request.form.get(form_field_name))
+        return body
+
+    # Get the DagBag which has a list of all the current Dags
+    @staticmethod
+    def get_dagbag():
+        if dagbag_cache_enabled:
+            return dagbag_cache.get_dagbag()
+        return DagBag()
+
+    # '/' Endpoint where the Admin page is which allows you to view the APIs available and trigger them
+    @expose('/')
+    def index(self):
+        logging.info("REST_API.index() called")
+
+        # the DAGs and the APIs are loaded by the page from the index_dags and index_apis endpoints after it's displayed
+        return self.render("rest_api_plugin/index.html",
+                           airflow_webserver_base_url=airflow_webserver_base_url,
+                           rest_api_endpoint=rest_api_endpoint,
+                           index_dags_endpoint=self.get_url(".index_dags"),
+                           index_apis_endpoint=self.get_url(".index_apis"),
+                           airflow_version=airflow_version,
+                           rest_api_plugin_version=rest_api_plugin_version
+                           )
+
+    # '/index_dags' Endpoint that serves the DAGs displayed on the Admin page as JSON
+    # Query Arguments: search (part of the dag_id), is_active (true/false), offset, limit
+    @expose('/index_dags')
+    def index_dags(self):
+        logging.info("REST_API.index_dags() called")
+        try:
+            offset, limit = self.get_pagination_arguments()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        search = request.args.get("search", "").strip()
+        is_active = request.args.get("is_active", "").strip().lower()
+        is_active = None if is_active == "" else is_active in ["true", "on", "1"]
+
+        dag_ids = sorted([dag_id for dag_id in self.get_dagbag().dags if search in dag_id])
+
+        # getting the pause state of all the DAGs in one query (only the ones of the page if no filtering on the state is needed)
+        if is_active is None:
+            total = len(dag_ids)
+            dag_ids = dag_ids[offset:offset + limit]
+        session = settings.Session()
+        try:
+            query = session.query(DagModel.dag_id, DagModel.is_paused)
+            if is_active is None:
+                query = query.filter(DagModel.dag_id.in_(dag_ids)) if dag_ids else query.filter(DagModel.dag_id.in_([]))
+            is_paused_by_dag_id = dict([(dag_id, is_paused) for dag_id, is_paused in query.all()])
+        finally:
+            session.close()
+
+        dags = []
+        for dag_id in dag_ids:
+            dags.append({
+                "dag_id": dag_id,
+                "is_active": (not is_paused_by_dag_id[dag_id]) if dag_id in is_paused_by_dag_id else False
+            })
+        if is_active is not None:
+            dags = [dag for dag in dags if dag["is_active"] == is_active]
+            total = len(dags)
+            dags = dags[offset:offset + limit]
+
+        return self.get_conditional_json_response({"total": total, "offset": offset, "limit": limit, "dags": dags})
+
+    # '/index_apis' Endpoint that serves the metadata of the APIs displayed on the Admin page as JSON
+    # Query Arguments: search (part of the API name), offset, limit
+    @expose('/index_apis')
+    def index_apis(self):
+        logging.info("REST_API.index_apis() called")
+        try:
+            offset, limit = self.get_pagination_arguments(default_limit=len(apis_metadata))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        search = request.args.get("search", "").strip().lower()
+        apis = [api_metadata for api_metadata in apis_metadata if search in api_metadata["name"]]
+        return self.get_conditional_json_response({"total": len(apis), "offset": offset, "limit": limit, "apis": apis[offset:offset + limit]})
+
+    # Get the offset and limit query arguments. Raises a ValueError if they're invalid.
+    @staticmethod
+    def get_pagination_arguments(default_limit=100, max_limit=1000):
+        try:
+            offset = int(request.args.get("offset") or 0)
+            limit = int(request.args.get("limit") or default_limit)
+        except ValueError:
+            raise ValueError("offset and limit should be integers")
+        if offset < 0 or limit < 1:
+            raise ValueError("offset can't be negative and limit should be at least 1")
+        return offset, min(limit, max(max_limit, default_limit))
+
+    # JSON response with an ETag. Returns a 304 if the client already has the same content.
+    @staticmethod
+    def get_conditional_json_response(data):
+        response = jsonify(data)
+        response.add_etag()
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    # '/metrics' Endpoint that serves the metrics of the REST API Plugin in the Prometheus text format. Requires the HTTP
+    # token (when authentication is enabled) unless metrics_require_http_token is set to False.
+    @expose('/metrics')
+    def prometheus_metrics(self):
+        logging.info("REST_API.prometheus_metrics() called")
+        if metrics_require_http_token:
+            return http_token_secure(REST_API.render_metrics)(self)
+        return self.render_metrics()
+
+    def render_metrics(self):
+        if not metrics_enabled:
+            return Response("Metrics are disabled\n", status=404, mimetype="text/plain")
+        return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    # '/api' REST Endpoint where API requests should all come in
+    @csrf.exempt  # Exempt the CSRF token
+    @expose('/api', methods=["GET", "POST"])
+    @http_token_secure  # On each request,
+    def api(self):
+        base_response = REST_API_Response_Util.get_base_response()
+
+        # Get the api that you want to execute
+        api = request.args.get('api')
+        logging.info("REST_API.api() called (api: " + str(api) + ")")
+
+        return self.execute_api(base_response, api, request.args)
+
+    # Executes the API and records the metrics of the call. The arguments are a dict like object (the query arguments of
+    # the request or the arguments of an item of a batch). When the 'timings' argument is provided, the response gets a
+    # 'timings' block with the time spent in each phase of the call.
+    def execute_api(self, base_response, api, arguments):
+        # calls of unknown APIs share a label so that random api arguments can't create new metrics
+        api_label = api.strip().lower() if api is not None and api_registry.get(api.strip().lower()) is not None else "unknown"
+        timings = REST_API_Timings(api_label, include_in_response=self.is_arg_true(arguments.get("timings")))
+        base_response["timings"] = timings
+
+        metrics.inc("rest_api_requests_in_flight", {"api": api_label})
+        http_response_code = 500
+        try:
+            response = self.validate_and_execute_api(base_response, api, arguments)
+            http_response_code = response[1] if isinstance(response, tuple) else response.status_code
+            return response
+        finally:
+            metrics.inc("rest_api_requests_in_flight", {"api": api_label}, -1)
+            metrics.inc("rest_api_requests_total", {"api": api_label, "http_response_code": str(http_response_code)})
+            metrics.observe("rest_api_request_duration_seconds", {"api": api_label}, time.time() - timings.start_time)
+
+    # Validates the arguments of the API and executes it
+    def validate_and_execute_api(self, base_response, api, arguments):
+        with REST_API_Timings.measure(base_response, "validation"):
+            if api is not None:
+                api = api.strip().lower()
+
+            # Validate that the API is provided
+            if self.is_arg_not_provided(api):
+                logging.warning("api argument not provided")
+                return REST_API_Response_Util.get_400_error_response(base_response, "API should be provided")
+
+            # Get the compiled API from the registry that corresponds to the api we want to run
+            compiled_api = api_registry.get(api)
+            if compiled_api is None:
+                logging.info("api '" + str(api) + "' was not found in the apis list in the REST API Plugin")
+                return REST_API_Response_Util.get_400_error_response(base_response, "API '" + str(api) + "' was not found")
+
+            # check if all the required arguments are provided
+            missing_required_arguments = compiled_api.get_missing_required_arguments(arguments)
+            if len(missing_required_arguments) > 0:
+                logging.warning("Missing required arguments: " + str(missing_required_arguments))
+                return REST_API_Response_Util.get_400_error_response(base_response, "The argument(s) " + str(missing_required_arguments) + " are required")
+
+        # Check to make sure that the DAG you're referring to, already exists.
+        dag_id = arguments.get("dag_id") if compiled_api.has_dag_id_argument else None
+        if dag_id is not None:
+            dag_id = dag_id.strip()
+            with REST_API_Timings.measure(base_response, "dagbag"):
+                dag_bag = self.get_dagbag()
+            if dag_id not in dag_bag.dags:
+                logging.info("DAG_ID '" + str(dag_id) + "' was not found in the DagBag list '" + str(dag_bag.dags) + "'")
+                return REST_API_Response_Util.get_400_error_response(base_response, "The DAG ID '" + str(dag_id) + "' does not exist")
+
+        # Wait for the admission control to let the call run
+        with REST_API_Timings.measure(base_response, "admission"):
+            ticket, rejection_reason, retry_after = admission_controller.admit(self.get_client_id(), compiled_api.admission_weight)
+        if ticket is None:
+            metrics.inc("rest_api_admission_rejections_total", {"api": api, "reason": rejection_reason})
+            return REST_API_Response_Util.get_429_error_response(base_response, "Too many calls are running or waiting (" + rejection_reason + "). Retry after " + str(retry_after) + " seconds.", retry_after)
+
+        try:
+            # Custom APIs are routed to their handler and the others are executed as airflow CLI commands
+            if compiled_api.handler is not None:
+                with REST_API_Timings.measure(base_response, "execution"):
+                    response = compiled_api.handler(self, base_response, arguments)
+            else:
+                response = self.execute_cli(base_response, compiled_api.metadata, arguments, ticket)
+        except Exception:
+            if not ticket.handed_over:
+                ticket.release()
+            raise
+        # a job releases the ticket once it's done and a streamed response runs the command while it's sent, so the call
+        # is done once the response is closed
+        if ticket.handed_over:
+            pass
+        elif isinstance(response, Response) and response.is_streamed:
+            response.call_on_close(ticket.release)
+        else:
+            ticket.release()
+        return response
+
+    # Get the identity of the client of the request used by the admission control: its address along with a hash of its
+    # HTTP token when it sends one
+    @staticmethod
+    def get_client_id():
+        http_token = request.headers.get(airflow_rest_api_plugin_http_token_header_name)
+        if http_token:
+            return hashlib.sha1(http_token.encode("utf-8")).hexdigest()[:16] + "@" + str(request.remote_addr)
+        return str(request.remote_addr)
+
+    # Custom Function for the batch API
+    def batch(self, base_response, arguments):
+        logging.info("Executing custom 'batch' function")
+
+        try:
+            items = self.get_json_body("items")
+        except ValueError as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "items is not valid JSON: " + str(e))
+        if isinstance(items, dict):
+            items = items.get("items")
+        if not isinstance(items, list):
+            return REST_API_Response_Util.get_400_error_response(base_response, "A JSON list of API calls should be provided")
+        if len(items) > batch_max_items:
+            return REST_API_Response_Util.get_400_error_response(base_response, "A batch can't have more than " + str(batch_max_items) + " items")
+
+        max_parallelism = batch_max_parallelism
+        if not self.is_arg_not_provided(request.args.get("max_parallelism")):
+            try:
+                max_parallelism = min(int(request.args.get("max_parallelism")), batch_max_parallelism)
+            except ValueError:
+                return REST_API_Response_Util.get_400_error_response(base_response, "max_parallelism should be an integer")
+            if max_parallelism < 1:
+                return REST_API_Response_Util.get_400_error_response(base_response, "max_parallelism should be at least 1")
+
+        # each item is executed with its own copy of the request context since flask's request context is thread local
+        futures = []
+        executor = ThreadPoolExecutor(max_workers=max(min(max_parallelism, len(items)), 1))
+        try:
+            for item in items:
+                futures.append(executor.submit(copy_current_request_context(self.execute_batch_item), item))
+            results = [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=True)
+
+        logging.info("Executed a batch of " + str(len(results)) + " items")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=results)
+
+    # Executes a single item of a batch and returns its response as a dict
+    def execute_batch_item(self, item):
+        arguments = {}
+        base_response = REST_API_Response_Util.get_base_response(include_arguments=False)
+        base_response["arguments"] = arguments
+        api = None
+        try:
+            if not isinstance(item, dict) or not isinstance(item.get("api"), string_types) or not isinstance(item.get("arguments", {}), dict):
+                response = REST_API_Response_Util.get_400_error_response(base_response, "A batch item should be an object with the 'api' and 'arguments' fields")
+            else:
+                api = item.get("api")
+                # normalizing the values the same way query arguments would look like. Checkboxes can be set with true.
+                for argument_name, argument_value in item.get("arguments", {}).items():
+                    if argument_value is True:
+                        arguments[argument_name] = ""
+                    elif argument_value is not None and argument_value is not False:
+                        arguments[argument_name] = argument_value if isinstance(argument_value, string_types) else str(argument_value)
+                api_metadata = self.get_api_metadata(api)
+                if api_metadata is not None and (api_metadata.get("http_method") == "POST" or not api_metadata.get("batch_enabled", True)):
+                    response = REST_API_Response_Util.get_400_error_response(base_response, "API '" + str(api) + "' can't be executed in a batch")
+                elif "stream" in arguments:
+                    response = REST_API_Response_Util.get_400_error_response(base_response, "The stream argument can't be used in a batch")
+                else:
+                    response = self.execute_api(base_response, api, arguments)
+        except Exception as e:
+            logging.error("Batch item failed: " + str(e))
+            response = REST_API_Response_Util.get_500_error_response(base_response, "An error occurred while executing the item: " + str(e))
+
+        if isinstance(response, tuple):
+            response = response[0]
+        result = json.loads(response.get_data(as_text=True))
+        result["api"] = api
+        return result
+
+    # Custom Function for the bulk_state API
+    def bulk_state(self, base_response, arguments):
+        logging.info("Executing custom 'bulk_state' function")
+        try:
+            query = self.get_json_body("query")
+        except ValueError as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "query is not valid JSON: " + str(e))
+        if not isinstance(query, dict):
+            return REST_API_Response_Util.get_400_error_response(base_response, "A JSON object should be provided")
+
+        query_type = query.get("type", "task_instance")
+        if query_type not in ["task_instance", "dag_run"]:
+            return REST_API_Response_Util.get_400_error_response(base_response, "type should be either 'task_instance' or 'dag_run'")
+        key_length = 3 if query_type == "task_instance" else 2
+        keys = query.get("keys")
+        dag_id = query.get("dag_id")
+        states = query.get("states")
+        if (keys is None) == (dag_id is None):
+            return REST_API_Response_Util.get_400_error_response(base_response, "Either keys or dag_id should be provided")
+        if states is not None and (not isinstance(states, list) or not all([state is None or isinstance(state, string_types) for state in states])):
+            return REST_API_Response_Util.get_400_error_response(base_response, "states should be a list of states")
+        if query.get("task_ids") is not None and (not isinstance(query.get("task_ids"), list) or not all([isinstance(task_id, string_types) for task_id in query.get("task_ids")])):
+            return REST_API_Response_Util.get_400_error_response(base_response, "task_ids should be a list of task ids")
+        if states is not None:
+            states = [None if state is None or state.lower() == "none" else state.lower() for state in states]
+
+        try:
+            if keys is not None:
+                if not isinstance(keys, list) or not all([isinstance(key, list) and len(key) == key_length for key in keys]):
+                    return REST_API_Response_Util.get_400_error_response(base_response, "keys should be a list of " + ("[dag_id, task_id, execution_date]" if key_length == 3 else "[dag_id, execution_date]") + " lists")
+                if len(keys) > bulk_state_max_keys:
+                    return REST_API_Response_Util.get_400_error_response(base_response, "No more than " + str(bulk_state_max_keys) + " keys can be provided")
+                keys = [tuple(key[:-1]) + (dateutil.parser.parse(key[-1]),) for key in keys]
+            start_date = dateutil.parser.parse(query["start_date"]) if query.get("start_date") else None
+            end_date = dateutil.parser.parse(query["end_date"]) if query.get("end_date") else None
+        except (ValueError, TypeError, AttributeError) as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Failed to parse an execution date: " + str(e))
+
+        session = settings.Session()
+        try:
+            if query_type == "task_instance":
+                rows = REST_API_State_Query.get_task_instance_states(session, keys=keys, dag_id=dag_id, task_ids=query.get("task_ids"), start_date=start_date, end_date=end_date, states=states)
+                column_names = ["dag_id", "task_id", "execution_date", "state"]
+            else:
+                rows = REST_API_State_Query.get_dag_run_states(session, keys=keys, dag_id=dag_id, start_date=start_date, end_date=end_date, states=states)
+                column_names = ["dag_id", "execution_date", "state"]
+        finally:
+            session.close()
+
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=REST_API_State_Query.to_columns(column_names, rows))
+
+    # General execution of a CLI command
+    # A command will be assembled and then passed to the OS as a commandline function and the results will be returned
+    def execute_cli(self, base_response, api_metadata, arguments, ticket=None):
+        logging.info("Executing cli function")
+
+        # assembling the airflow_cmd function from the layout of the arguments that was compiled when the plugin was loaded
+        compiled_api = api_registry.get(api_metadata["name"])
+        airflow_cmd_split = compiled_api.build_cli_command(arguments)
+
+        run_api_in_background_mode = compiled_api.background_mode
+        run_api_as_async_job = self.is_arg_true(arguments.get("async"))
+
+        # joining all the individual arguments and components into a single string
+        airflow_cmd = " ".join(airflow_cmd_split)
+
+        logging.info("airflow_cmd array: " + str(airflow_cmd_split))
+        logging.info("airflow_cmd: " + str(airflow_cmd))
+
+        # APIs that run in the background and the ones requested with async=true are handed to the job manager, which
+        # returns the job right away. Its status and output can be retrieved with the job_status and job_output APIs.
+        if run_api_in_background_mode or run_api_as_async_job:
+            with REST_API_Timings.measure(base_response, "execution"):
+                job = job_manager.submit(api_metadata["name"], airflow_cmd_split, background=run_api_in_background_mode, ticket=ticket)
+            return REST_API_Response_Util.get_200_response(base_response=base_response, output=job, airflow_cmd=airflow_cmd)
+
+        # if requested, stream the output of the command back while it runs instead of waiting for it to finish
+        stream_format = arguments.get("stream")
+        if stream_format is not None:
+            return self.stream_cli_command(base_response, airflow_cmd, airflow_cmd_split, stream_format.strip().lower())
+
+        # serve the output from the response cache if it's enabled for the API. Clients can skip the cached output with the
+        # 'Cache-Control: no-cache' header. Calls that change something are never cached.
+        use_response_cache = response_cache_enabled and compiled_api.cache_ttl > 0
+        cache_key = None
+        if use_response_cache and not compiled_api.is_mutating_call(arguments):
+            cache_key = compiled_api.get_cache_key(arguments)
+            cached_output = None
+            if "no-cache" not in request.headers.get("Cache-Control", ""):
+                with REST_API_Timings.measure(base_response, "execution"):
+                    cached_output = response_cache.get(compiled_api, cache_key)
+            base_response["cache"] = "HIT" if cached_output is not None else "MISS"
+            if cached_output is not None:
+                return REST_API_Response_Util.get_200_response(base_response=base_response, output=cached_output, airflow_cmd=airflow_cmd)
+
+        # identical calls of idempotent APIs that run at the same time share a single execution
+        if request_coalescing_enabled and compiled_api.coalesce and not compiled_api.is_mutating_call(arguments):
+            with REST_API_Timings.measure(base_response, "coalescing"):
+                output, base_response["coalesced"] = request_coalescer.execute(compiled_api.get_cache_key(arguments), lambda: self.execute_cli_output(base_response, compiled_api, arguments, airflow_cmd_split))
+        else:
+            output = self.execute_cli_output(base_response, compiled_api, arguments, airflow_cmd_split)
+
+        # the cached outputs of the API are dropped once a call that changed something is done. Only the outputs of the
+        # commands that succeeded are cached so that a transient failure isn't served until the TTL passes.
+        with REST_API_Timings.measure(base_response, "execution"):
+            if cache_key is not None:
+                if "output_id" not in output and output.get("exit_code") == 0:
+                    response_cache.put(compiled_api, cache_key, output)
+            elif use_response_cache:
+                response_cache.invalidate(compiled_api.name)
+
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output, airflow_cmd=airflow_cmd)
+
+    # Get the output of the CLI API, filtered by the output line filters
+    def execute_cli_output(self, base_response, compiled_api, arguments, airflow_cmd_split):
+        # read-only APIs are answered directly through the ORM when possible to avoid spawning a process
+        output = None
+        with REST_API_Timings.measure(base_response, "execution"):
+            if in_process_read_apis_enabled:
+                output = REST_API_In_Process_Executor.execute(compiled_api.name, arguments)
+            run_in_process = output is not None
+            if not run_in_process:
+                # the output lines of the CLI command go through the cli_output_line_filter as they are read
+                output = self.execute_cli_command(airflow_cmd_split)
+
+        # output produced in-process has no loading messages, but it still goes through the configured filters
+        if run_in_process:
+            with REST_API_Timings.measure(base_response, "filtering"):
+                output = in_process_output_line_filter.filter_output(output)
+        return output
+
+    # Custom function for the version API
+    def version(self, base_response, arguments):
+        logging.info("Executing custom 'version' function")
+        return REST_API_Response_Util.get_200_response(base_response, airflow_version)
+
+    # Custom function for the rest_api_plugin_version API
+    def rest_api_plugin_version(self, base_response, arguments):
+        logging.info("Executing custom 'rest_api_plugin_version' function")
+        return REST_API_Response_Util.get_200_response(base_response, rest_api_plugin_version)
+
+    # Custom Function for the clear_dags API
+    def clear_dags(self, base_response, arguments):
+        logging.info("Executing custom 'clear_dags' function")
+        dag_ids = [dag_id.strip() for dag_id in (arguments.get("dag_id") or "").split(",") if dag_id.strip()]
+        dag_regex = arguments.get("dag_regex")
+        task_regex = arguments.get("task_regex")
+        if not dag_ids and self.is_arg_not_provided(dag_regex):
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_id or dag_regex should be provided")
+        for regex in [dag_regex, task_regex]:
+            if not self.is_arg_not_provided(regex):
+                try:
+                    re.compile(regex)
+                except re.error as e:
+                    return REST_API_Response_Util.get_400_error_response(base_response, "'" + regex + "' is not a valid regex: " + str(e))
+        try:
+            start_date = dateutil.parser.parse(arguments.get("start_date")) if not self.is_arg_not_provided(arguments.get("start_date")) else None
+            end_date = dateutil.parser.parse(arguments.get("end_date")) if not self.is_arg_not_provided(arguments.get("end_date")) else None
+        except (ValueError, TypeError, OverflowError) as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Failed to parse the start_date or end_date: " + str(e))
+        dry_run = arguments.get("dry_run") is not None
+
+        dagbag = REST_API.get_dagbag()
+        unknown_dag_ids = [dag_id for dag_id in dag_ids if dag_id not in dagbag.dags]
+        if unknown_dag_ids:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The DAGs " + str(unknown_dag_ids) + " don't exist")
+        dags = [dagbag.dags[dag_id] for dag_id in dag_ids]
+        if not self.is_arg_not_provided(dag_regex):
+            dags.extend([dagbag.dags[dag_id] for dag_id in sorted(dagbag.dags) if re.search(dag_regex, dag_id)])
+        if not dags:
+            return REST_API_Response_Util.get_400_error_response(base_response, "No DAG matches the dag_regex '" + dag_regex + "'")
+
+        dag_tasks = REST_API_Task_Instance_Clearer.get_tasks(
+            dags,
+            task_regex=task_regex if not self.is_arg_not_provided(task_regex) else None,
+            upstream=arguments.get("upstream") is not None,
+            downstream=arguments.get("downstream") is not None,
+            include_subdags=arguments.get("exclude_subdags") is None
+        )
+        condition = REST_API_Task_Instance_Clearer.get_condition(
+            dag_tasks,
+            start_date=start_date,
+            end_date=end_date,
+            only_failed=arguments.get("only_failed") is not None,
+            only_running=arguments.get("only_running") is not None
+        )
+
+        session = settings.Session()
+        try:
+            counts = REST_API_Task_Instance_Clearer.count(session, condition)
+            if not dry_run and counts:
+                REST_API_Task_Instance_Clearer.clear(session, dag_tasks, condition)
+                session.commit()
+        except Exception as e:
+            session.rollback()
+            error_message = "An error occurred while trying to clear the DAGs " + str(list(dag_tasks)) + ": " + str(e)
+            logging.error(error_message)
+            return REST_API_Response_Util.get_500_error_response(base_response, error_message)
+        finally:
+            session.close()
+        logging.info(("clear_dags would clear " if dry_run else "clear_dags cleared ") + str(sum(counts.values())) + " task instances of " + str(len(dag_tasks)) + " DAGs")
+
+        output = {
+            "dags": dict([(dag_id, counts.get(dag_id, 0)) for dag_id in dag_tasks]),
+            "count": sum(counts.values()),
+            "dry_run": dry_run
+        }
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output)
+
+    # Custom Function for the deploy_dag API
+    def deploy_dag(self, base_response, arguments):
+        logging.info("Executing custom 'deploy_dag' function")
+
+        if 'dag_file' not in request.files or request.files['dag_file'].filename == '':  # check if the post request has the file part
+            logging.warning("The dag_file argument wasn't provided")
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_file should be provided")
+        dag_file = request.files['dag_file']
+
+        force = True if request.form.get('force') is not None else False
+        logging.info("deploy_dag force upload: " + str(force))
+
+        pause = True if request.form.get('pause') is not None else False
+        logging.info("deploy_dag in pause state: " + str(pause))
+
+        unpause = True if request.form.get('unpause') is not None else False
+        logging.info("deploy_dag in unpause state: " + str(unpause))
+
+        # make sure that the dag_file is a python script that's written directly in the DAGs folder
+        if not dag_file.filename.endswith(".py"):
+            logging.warning("deploy_dag file is not a python file. It does not end with a .py.")
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_file is not a *.py file")
+        if os.path.basename(dag_file.filename) != dag_file.filename or dag_file.filename.startswith("."):
+            logging.warning("deploy_dag file name '" + str(dag_file.filename) + "' is not a plain file name")
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_file name should not contain a path or start with a '.'")
+        save_file_path = os.path.join(airflow_dags_folder, dag_file.filename)
+
+        # Check if the file already exists.
+        if os.path.isfile(save_file_path) and not force:
+            logging.warning("File to upload already exists")
+            return REST_API_Response_Util.get_400_error_response(base_response, "The file '" + save_file_path + "' already exists on host '" + hostname + "'.")
+
+        logging.info("Saving file to '" + save_file_path + "'")
+        sha256, written = REST_API_DAG_File_Util.write_file(dag_file.stream, save_file_path)
+        if written:
+            dagbag_cache.invalidate(save_file_path)
+            response_cache.invalidate_dags()
         else:
+            logging.info("The file '" + save_file_path + "' already has the same content. Skipping the write.")
+
+        warning = None
+        dag_ids = None
+        # if both the pause and unpause options are provided then skip the pausing and unpausing phase
+        if pause and unpause:
             warning = "Both options pause and unpause were given. Skipping setting the state (pause, unpause) of the DAG."
             logging.warning(warning)
+        elif pause or unpause:
+            try:
+                dag_ids = REST_API_DAG_File_Util.get_dag_ids(save_file_path, timeout=deploy_dag_parse_timeout)
+                REST_API_DAG_File_Util.set_is_paused(dag_ids, pause, save_file_path)
+            except Exception as e:
+                warning = "Failed to set the state (pause, unpause) of the DAG: " + str(e)
+                logging.warning(warning)
+        else:
+            # the DAG ids are only informational here, so they're only read from the source code
+            try:
+                with open(save_file_path, "rb") as saved_file:
+                    dag_ids = REST_API_DAG_File_Util.get_dag_ids_from_source(saved_file.read(), save_file_path)
+            except Exception as e:
+                warning = "Failed to read the DAG ids of the DAG file: " + str(e)
+                logging.warning(warning)
+
+        base_response["file_path"] = save_file_path
+        base_response["sha256"] = sha256
+        base_response["unchanged"] = not written
+        base_response["dag_ids"] = dag_ids
+        if written:
+            output = "DAG File [" + save_file_path + "] has been uploaded"
+        else:
+            output = "DAG File [" + save_file_path + "] is already up to date"
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output, warning=warning)
+
+    # Custom Function for the deploy_dag_bundle API
+    def deploy_dag_bundle(self, base_response, arguments):
+        logging.info("Executing custom 'deploy_dag_bundle' function")
+
+        if 'dag_bundle' not in request.files or request.files['dag_bundle'].filename == '':  # check if the post request has the file part
+            logging.warning("The dag_bundle argument wasn't provided")
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_bundle should be provided")
+        dag_bundle = request.files['dag_bundle']
+
+        subdir = request.form.get('subdir')
+        target_folder = airflow_dags_folder
+        if not self.is_arg_not_provided(subdir):
+            relative_subdir = REST_API_DAG_File_Util.get_relative_path(subdir)
+            if relative_subdir is None:
+                return REST_API_Response_Util.get_400_error_response(base_response, "subdir should be a relative path inside the DAGs folder")
+            target_folder = os.path.join(airflow_dags_folder, *relative_subdir.split("/"))
+        prune = True if request.form.get('prune') is not None else False
+        if prune and self.is_arg_not_provided(subdir):
+            # the DAGs folder is shared with the DAGs (and the helper modules) deployed by other means
+            return REST_API_Response_Util.get_400_error_response(base_response, "prune can only be used along with a subdir")
+        pause = True if request.form.get('pause') is not None else False
+        unpause = True if request.form.get('unpause') is not None else False
+        logging.info("deploy_dag_bundle target folder: '" + str(target_folder) + "', prune: " + str(prune) + ", pause: " + str(pause) + ", unpause: " + str(unpause))
+
+        # the archive is streamed to a temporary file so that it isn't held in memory while it's extracted
+        file_descriptor, archive_path = tempfile.mkstemp(prefix="rest_api_plugin_dag_bundle_")
+        try:
+            with os.fdopen(file_descriptor, "wb") as archive_file:
+                dag_bundle.save(archive_file)
+            try:
+                bundle_members, close_archive = REST_API_DAG_File_Util.get_bundle_members(archive_path, deploy_dag_bundle_max_files, deploy_dag_bundle_max_size)
+            except (ValueError, tarfile.TarError, zipfile.BadZipfile) as e:
+                return REST_API_Response_Util.get_400_error_response(base_response, str(e))
+            try:
+                result = REST_API_DAG_File_Util.deploy_bundle(bundle_members, target_folder, prune)
+            except ValueError as e:
+                return REST_API_Response_Util.get_400_error_response(base_response, str(e))
+            finally:
+                close_archive()
+        except Exception as e:
+            error_message = "An error occurred while trying to deploy the DAG bundle: " + str(e)
+            logging.error(error_message)
+            return REST_API_Response_Util.get_500_error_response(base_response, error_message)
+        finally:
+            REST_API_DAG_File_Util.remove_file(archive_path)
+        logging.info("deploy_dag_bundle added " + str(len(result["added"])) + ", updated " + str(len(result["updated"])) + ", left " + str(len(result["unchanged"])) + " unchanged and removed " + str(len(result["removed"])) + " files")
+
+        # refreshing the DagBags once for all the files that changed
+        changed_files = result["added"] + result["updated"] + result["removed"]
+        result["import_errors"] = {}
+        if changed_files:
+            try:
+                refresh_results = REST_API.refresh_dag_files([os.path.abspath(os.path.join(target_folder, *relative_path.split("/"))) for relative_path in changed_files])
+            except Exception as e:
+                logging.error("Failed to refresh the deployed DAG files: " + str(e))
+                refresh_results = []
+                dagbag_cache.invalidate()
+            response_cache.invalidate_dags()
+            for relative_path, refresh_result in zip(changed_files, refresh_results):
+                if refresh_result["import_error"] is not None:
+                    result["import_errors"][relative_path] = str(refresh_result["import_error"])
+
+        warning = None
+        if pause and unpause:
+            warning = "Both options pause and unpause were given. Skipping setting the state (pause, unpause) of the DAGs."
+            logging.warning(warning)
+        elif pause or unpause:
+            failed_files = []
+            for relative_path in result["added"]:
+                file_path = os.path.join(target_folder, *relative_path.split("/"))
+                try:
+                    REST_API_DAG_File_Util.set_is_paused(REST_API_DAG_File_Util.get_dag_ids(file_path, timeout=deploy_dag_parse_timeout), pause, file_path)
+                except Exception as e:
+                    logging.warning("Failed to set the state (pause, unpause) of the DAGs of '" + file_path + "': " + str(e))
+                    failed_files.append(relative_path)
+            if failed_files:
+                warning = "Failed to set the state (pause, unpause) of the DAGs of: " + ", ".join(failed_files)
+
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=result, warning=warning)
+
+    # Custom Function for the variables_import API
+    def variables_import(self, base_response, arguments):
+        logging.info("Executing custom 'variables_import' function")
+        try:
+            variables = self.get_json_body("variables")
+        except ValueError as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "variables is not valid JSON: " + str(e))
+        if not isinstance(variables, dict):
+            return REST_API_Response_Util.get_400_error_response(base_response, "A JSON object of variables should be provided")
+        prefix = arguments.get("prefix") or ""
+
+        # the values that aren't strings are stored as JSON so that they're read back the same way by variables_export
+        values = {}
+        for key, value in variables.items():
+            if not key.strip():
+                return REST_API_Response_Util.get_400_error_response(base_response, "The key of a variable can't be empty")
+            if key.startswith(prefix):
+                values[key] = value if isinstance(value, string_types) else json.dumps(value)
+        if len(values) > variables_import_max_items:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Can't import more than " + str(variables_import_max_items) + " variables at once")
+
+        keys = sorted(values)
+        output = {"created": [], "updated": [], "unchanged": [], "skipped": len(variables) - len(values)}
+        session = settings.Session()
+        try:
+            # the existing variables are loaded in chunks to keep the IN clauses small. Their values are set through the model
+            # so that they're encrypted like Variable.set does.
+            existing_variables = {}
+            for start in range(0, len(keys), 500):
+                for variable in session.query(Variable).filter(Variable.key.in_(keys[start:start + 500])):
+                    existing_variables[variable.key] = variable
+            for key in keys:
+                variable = existing_variables.get(key)
+                if variable is None:
+                    session.add(Variable(key=key, val=values[key]))
+                    output["created"].append(key)
+                elif variable.val != values[key]:
+                    variable.val = values[key]
+                    output["updated"].append(key)
+                else:
+                    output["unchanged"].append(key)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            error_message = "An error occurred while trying to import the variables: " + str(e)
+            logging.error(error_message)
+            return REST_API_Response_Util.get_500_error_response(base_response, error_message)
+        finally:
+            session.close()
+        response_cache.invalidate("variables")
+        logging.info("variables_import created " + str(len(output["created"])) + " and updated " + str(len(output["updated"])) + " variables")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output)
+
+    # Custom Function for the variables_export API
+    # The variables are streamed as a JSON object of key -> value, the format of 'airflow variables --export' which
+    # variables_import accepts, so that only variables_export_batch_size variables are held in memory at a time.
+    def variables_export(self, base_response, arguments):
+        logging.info("Executing custom 'variables_export' function")
+        prefix = arguments.get("prefix")
+
+        def generate():
+            session = settings.Session()
+            try:
+                query = session.query(Variable)
+                if not self.is_arg_not_provided(prefix):
+                    query = query.filter(REST_API.get_prefix_filter(Variable.key, prefix))
+                chunk = []
+                separator = "\n"
+                yield "{"
+                for variable in query.order_by(Variable.key).yield_per(variables_export_batch_size):
+                    # the keys and values go through the redact filters like the output of the variables API, then
+                    # the values are deserialized when they're JSON like 'airflow variables --export' does
+                    key = in_process_output_line_filter.redact(variable.key)
+                    val = in_process_output_line_filter.redact(variable.val) if variable.val is not None else None
+                    try:
+                        value = json.loads(val)
+                    except (ValueError, TypeError):
+                        value = val
+                    chunk.append(separator + json.dumps(key) + ": " + json.dumps(value))
+                    separator = ",\n"
+                    if len(chunk) >= variables_export_batch_size:
+                        yield "".join(chunk)
+                        chunk = []
+                chunk.append("\n}\n")
+                yield "".join(chunk)
+            finally:
+                session.close()
+
+        return Response(stream_with_context(generate()), mimetype="application/json", headers={"Cache-Control": "no-cache"})
+
+    # Get a filter on the values of the column that start with the prefix, with the LIKE wildcards of the prefix escaped
+    @staticmethod
+    def get_prefix_filter(column, prefix):
+        escaped_prefix = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.like(escaped_prefix + "%", escape="\\")
+
+    # Custom Function for the connections_query API
+    def connections_query(self, base_response, arguments):
+        logging.info("Executing custom 'connections_query' function")
+        fields = [field.strip() for field in (arguments.get("fields") or "").split(",") if field.strip()] or REST_API.connection_default_fields
+        unknown_fields = [field for field in fields if field not in REST_API.connection_fields or not hasattr(Connection, field)]
+        if unknown_fields:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Unknown fields " + str(unknown_fields) + ". The fields are: " + ", ".join([field for field in REST_API.connection_fields if hasattr(Connection, field)]))
+        try:
+            limit = int(arguments.get("limit")) if not self.is_arg_not_provided(arguments.get("limit")) else min(100, connections_query_max_limit)
+        except ValueError:
+            return REST_API_Response_Util.get_400_error_response(base_response, "limit should be an integer")
+        if limit < 1 or limit > connections_query_max_limit:
+            return REST_API_Response_Util.get_400_error_response(base_response, "limit should be between 1 and " + str(connections_query_max_limit))
+        cursor = None
+        if not self.is_arg_not_provided(arguments.get("cursor")):
+            try:
+                cursor = json.loads(base64.urlsafe_b64decode(str(arguments.get("cursor"))).decode("utf-8"))
+                cursor_conn_id, cursor_id = cursor
+            except (ValueError, TypeError):
+                return REST_API_Response_Util.get_400_error_response(base_response, "cursor is not valid")
+        conn_types = [conn_type.strip() for conn_type in (arguments.get("conn_type") or "").split(",") if conn_type.strip()]
+
+        session = settings.Session()
+        try:
+            # the extra is only decrypted by the model, the other fields are read as columns without loading the models.
+            # The id and the conn_id are always read since the cursor is made of them.
+            if "extra" in fields:
+                query = session.query(Connection)
+            else:
+                query = session.query(Connection.id, Connection.conn_id, *[getattr(Connection, field) for field in fields if field != "conn_id"])
+            if not self.is_arg_not_provided(arguments.get("prefix")):
+                query = query.filter(REST_API.get_prefix_filter(Connection.conn_id, arguments.get("prefix")))
+            if conn_types:
+                query = query.filter(Connection.conn_type.in_(conn_types))
+            # keyset pagination on (conn_id, id) since many connections can have the same conn_id
+            if cursor is not None:
+                query = query.filter(or_(Connection.conn_id > cursor_conn_id, and_(Connection.conn_id == cursor_conn_id, Connection.id > cursor_id)))
+            rows = query.order_by(Connection.conn_id, Connection.id).limit(limit + 1).all()
+            connections = [dict([(field, self.get_connection_field(row, field)) for field in fields]) for row in rows[:limit]]
+        finally:
+            session.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            last_row = rows[limit - 1]
+            next_cursor = base64.urlsafe_b64encode(json.dumps([last_row.conn_id, last_row.id]).encode("utf-8")).decode("utf-8")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output={"connections": connections, "next_cursor": next_cursor})
+
+    # Get the value of a field of a connection row of connections_query. The extra goes through the redact filters like
+    # the output of the connections API.
+    @staticmethod
+    def get_connection_field(row, field):
+        value = getattr(row, field)
+        if field == "extra" and value is not None:
+            value = in_process_output_line_filter.redact(value)
+        return value
+
+    # Custom Function for the connections_bulk API
+    def connections_bulk(self, base_response, arguments):
+        logging.info("Executing custom 'connections_bulk' function")
+        try:
+            body = self.get_json_body("connections")
+        except ValueError as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "connections is not valid JSON: " + str(e))
+        if not isinstance(body, dict) or not isinstance(body.get("add", []), list) or not isinstance(body.get("delete", []), list):
+            return REST_API_Response_Util.get_400_error_response(base_response, "A JSON object with an 'add' and/or a 'delete' list should be provided")
+        items_to_add = body.get("add", [])
+        conn_ids_to_delete = body.get("delete", [])
+        if len(items_to_add) + len(conn_ids_to_delete) > connections_bulk_max_items:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Can't add and delete more than " + str(connections_bulk_max_items) + " connections at once")
+
+        errors = []
+        for index, conn_id in enumerate(conn_ids_to_delete):
+            if not isinstance(conn_id, string_types) or not conn_id.strip():
+                errors.append("Delete item " + str(index) + ": a conn_id should be provided")
+        connections = []
+        added_conn_ids = []
+        added_conn_ids_set = set()
+        for index, item in enumerate(items_to_add):
+            error_prefix = "Add item " + str(index) + ": "
+            if not isinstance(item, dict) or not isinstance(item.get("conn_id"), string_types) or not item.get("conn_id").strip():
+                errors.append(error_prefix + "an object with a 'conn_id' should be provided")
+                continue
+            if item.get("conn_id") in added_conn_ids_set:
+                errors.append(error_prefix + "conn_id '" + item.get("conn_id") + "' is added by another item")
+                continue
+            # the connections are built like 'airflow connections --add' builds them, from the conn_uri or the fields
+            try:
+                if item.get("conn_uri"):
+                    connection = Connection(conn_id=item.get("conn_id"), uri=item.get("conn_uri"))
+                elif item.get("conn_type"):
+                    connection = Connection(
+                        conn_id=item.get("conn_id"),
+                        conn_type=item.get("conn_type"),
+                        host=item.get("host"),
+                        login=item.get("login"),
+                        password=item.get("password"),
+                        schema=item.get("schema"),
+                        port=int(item.get("port")) if item.get("port") is not None else None
+                    )
+                else:
+                    errors.append(error_prefix + "a conn_uri or a conn_type should be provided")
+                    continue
+                conn_extra = item.get("conn_extra")
+                if conn_extra is not None:
+                    connection.extra = conn_extra if isinstance(conn_extra, string_types) else json.dumps(conn_extra)
+            except Exception as e:
+                errors.append(error_prefix + "failed to build the connection: " + str(e))
+                continue
+            connections.append(connection)
+            added_conn_ids.append(connection.conn_id)
+            added_conn_ids_set.add(connection.conn_id)
+        if errors:
+            return REST_API_Response_Util.get_400_error_response(base_response, errors)
+
+        deleted_conn_ids_set = set(conn_ids_to_delete)
+        conn_ids_to_delete = sorted(deleted_conn_ids_set)
+        session = settings.Session()
+        try:
+            # the existing conn_ids are loaded in chunks to keep the IN clauses small
+            conn_ids = sorted(set(conn_ids_to_delete + added_conn_ids))
+            existing_conn_ids = set()
+            for start in range(0, len(conn_ids), 500):
+                existing_conn_ids.update([row.conn_id for row in session.query(Connection.conn_id).filter(Connection.conn_id.in_(conn_ids[start:start + 500]))])
+            errors.extend(["Connection '" + conn_id + "' doesn't exist" for conn_id in conn_ids_to_delete if conn_id not in existing_conn_ids])
+            errors.extend(["Connection '" + conn_id + "' already exists" for conn_id in added_conn_ids if conn_id in existing_conn_ids and conn_id not in deleted_conn_ids_set])
+            if errors:
+                return REST_API_Response_Util.get_400_error_response(base_response, errors)
+
+            # the connections are deleted first so that a connection can be replaced by deleting and adding it in the same call
+            for start in range(0, len(conn_ids_to_delete), 500):
+                session.query(Connection).filter(Connection.conn_id.in_(conn_ids_to_delete[start:start + 500])).delete(synchronize_session=False)
+            session.add_all(connections)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            error_message = "An error occurred while trying to add and delete the connections: " + str(e)
+            logging.error(error_message)
+            return REST_API_Response_Util.get_500_error_response(base_response, error_message)
+        finally:
+            session.close()
+        response_cache.invalidate("connections")
+        logging.info("connections_bulk deleted " + str(len(conn_ids_to_delete)) + " and added " + str(len(connections)) + " connections")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output={"added": added_conn_ids, "deleted": conn_ids_to_delete})
+
+    # Custom Function for the trigger_dags API
+    def trigger_dags(self, base_response, arguments):
+        logging.info("Executing custom 'trigger_dags' function")
+        try:
+            items = self.get_json_body("items")
+        except ValueError as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "items is not valid JSON: " + str(e))
+        if isinstance(items, dict):
+            items = items.get("items", [items])
+        if not isinstance(items, list) or len(items) == 0:
+            return REST_API_Response_Util.get_400_error_response(base_response, "A JSON list of DAG runs to create should be provided")
+        if len(items) > trigger_dags_max_items:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Can't trigger more than " + str(trigger_dags_max_items) + " DAG runs at once")
+
+        dagbag = REST_API.get_dagbag()
+        now = datetime.now()
+        errors = []
+        dag_runs = []  # (dag_id, run_id, execution_date, conf, index of the item) of the DAG runs to create, including the ones of the subdags
+        execution_dates = set()  # (dag_id, execution_date) of the DAG runs to create
+        run_ids = set()  # (dag_id, run_id) of the DAG runs to create
+        for index, item in enumerate(items):
+            error_prefix = "Item " + str(index) + ": "
+            if not isinstance(item, dict) or not isinstance(item.get("dag_id"), string_types):
+                errors.append(error_prefix + "an object with a 'dag_id' should be provided")
+                continue
+            dag = dagbag.dags.get(item.get("dag_id").strip())
+            if dag is None:
+                errors.append(error_prefix + "DAG '" + item.get("dag_id").strip() + "' doesn't exist")
+                continue
+            conf = item.get("conf")
+            if isinstance(conf, string_types):
+                try:
+                    conf = json.loads(conf) if conf.strip() else None
+                except ValueError as e:
+                    errors.append(error_prefix + "conf is not valid JSON: " + str(e))
+                    continue
+            if conf is not None and not isinstance(conf, dict):
+                errors.append(error_prefix + "conf should be a JSON object")
+                continue
+            if item.get("exec_date"):
+                try:
+                    execution_date = dateutil.parser.parse(str(item.get("exec_date")))
+                except (ValueError, TypeError, OverflowError) as e:
+                    errors.append(error_prefix + "failed to parse the exec_date: " + str(e))
+                    continue
+            else:
+                # the DAG runs triggered without an exec_date for the same DAG get the next second to be unique, since
+                # some metadata databases (like MySQL) don't store the fractions of a second
+                execution_date = now
+                while (dag.dag_id, execution_date) in execution_dates:
+                    execution_date += timedelta(seconds=1)
+            run_id = item.get("run_id") or ("manual__" + execution_date.isoformat())
+
+            # the subdags are triggered along with their parent like the experimental trigger_dag API of Airflow does
+            for dag_to_trigger in [dag] + list(getattr(dag, "subdags", None) or []):
+                if (dag_to_trigger.dag_id, execution_date) in execution_dates:
+                    errors.append(error_prefix + "DAG '" + dag_to_trigger.dag_id + "' is already triggered for " + execution_date.isoformat() + " by another item")
+                    break
+                if (dag_to_trigger.dag_id, run_id) in run_ids:
+                    errors.append(error_prefix + "Run id '" + run_id + "' is already used for DAG '" + dag_to_trigger.dag_id + "' by another item")
+                    break
+                execution_dates.add((dag_to_trigger.dag_id, execution_date))
+                run_ids.add((dag_to_trigger.dag_id, run_id))
+                dag_runs.append((dag_to_trigger.dag_id, run_id, execution_date, conf, index))
+        if errors:
+            return REST_API_Response_Util.get_400_error_response(base_response, errors)
+
+        session = settings.Session()
+        try:
+            # checking the DAG runs that already exist with one query for all the items
+            existing_dag_runs = session.query(DagRun.dag_id, DagRun.run_id, DagRun.execution_date).filter(
+                DagRun.dag_id.in_(set([dag_run[0] for dag_run in dag_runs])),
+                or_(DagRun.run_id.in_(set([dag_run[1] for dag_run in dag_runs])), DagRun.execution_date.in_(set([dag_run[2] for dag_run in dag_runs])))
+            ).all()
+            for dag_id, run_id, execution_date in existing_dag_runs:
+                if (dag_id, run_id) in run_ids:
+                    errors.append("Run id '" + str(run_id) + "' already exists for DAG '" + dag_id + "'")
+                elif (dag_id, execution_date) in execution_dates:
+                    errors.append("A DAG run already exists for DAG '" + dag_id + "' and " + execution_date.isoformat())
+            if errors:
+                return REST_API_Response_Util.get_400_error_response(base_response, errors)
+
+            # the task instances are created by the scheduler when it picks the DAG runs up
+            session.add_all([
+                DagRun(dag_id=dag_id, run_id=run_id, execution_date=execution_date, start_date=now, state=State.RUNNING, conf=conf, external_trigger=True)
+                for dag_id, run_id, execution_date, conf, index in dag_runs
+            ])
+            session.commit()
+        except IntegrityError as e:
+            # execution dates that are different here can be the same once stored with the precision of the database
+            session.rollback()
+            logging.warning("trigger_dags failed to create the DAG runs: " + str(e))
+            return REST_API_Response_Util.get_400_error_response(base_response, "Some DAG runs already exist or have the same execution date at the precision of the metadata database: " + str(e.orig))
+        except Exception as e:
+            session.rollback()
+            error_message = "An error occurred while trying to create the DAG runs: " + str(e)
+            logging.error(error_message)
+            return REST_API_Response_Util.get_500_error_response(base_response, error_message)
+        finally:
+            session.close()
+        logging.info("trigger_dags created " + str(len(dag_runs)) + " DAG runs for " + str(len(items)) + " items")
+
+        # one DAG run per item in the same order, the ones of the subdags aren't listed
+        output = []
+        for dag_id, run_id, execution_date, conf, index in dag_runs:
+            if index == len(output):
+                output.append({"dag_id": dag_id, "run_id": run_id, "execution_date": execution_date.isoformat(), "state": State.RUNNING})
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output)
+
+    # Custom Function for the watch_state API
+    def watch_state(self, base_response, arguments):
+        logging.info("Executing custom 'watch_state' function")
+        dag_id = arguments.get("dag_id").strip()
+        task_ids = [task_id.strip() for task_id in (arguments.get("task_ids") or "").split(",") if task_id.strip()]
+        try:
+            execution_date = dateutil.parser.parse(arguments.get("execution_date"))
+        except (ValueError, TypeError, OverflowError) as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Failed to parse the execution_date: " + str(e))
+        try:
+            timeout = min(float(arguments.get("timeout")), watch_state_max_timeout) if arguments.get("timeout") else watch_state_max_timeout
+        except ValueError:
+            return REST_API_Response_Util.get_400_error_response(base_response, "timeout should be a number")
 
-        return REST_API_Response_Util.get_200_response(base_response=base_response, output="DAG File [{}] has been uploaded".format(dag_file), warning=warning)
+        if task_ids:
+            dag_run_keys = []
+            task_instance_keys = [(dag_id, task_id, execution_date) for task_id in task_ids]
+        else:
+            dag_run_keys = [(dag_id, execution_date)]
+            task_instance_keys = []
+        keys = dag_run_keys + task_instance_keys
+
+        known_states = None
+        if arguments.get("state") is not None:
+            states = [None if state.strip().lower() in ("", "none") else state.strip().lower() for state in arguments.get("state").split(",")]
+            if len(states) == 1:
+                states = states * len(keys)
+            if len(states) != len(keys):
+                return REST_API_Response_Util.get_400_error_response(base_response, "state should be a single state or one state per task id")
+            known_states = dict(zip(keys, states))
+
+        result = state_watcher.watch(dag_run_keys, task_instance_keys, known_states, max(0, timeout))
+        if result is None:
+            return REST_API_Response_Util.get_429_error_response(base_response, "Too many watches are running", int(math.ceil(watch_state_poll_interval)))
+        changed, states = result
+        output = {"changed": changed, "dag_id": dag_id, "execution_date": execution_date.isoformat()}
+        if task_ids:
+            output["task_states"] = dict([(key[1], states.get(key)) for key in task_instance_keys]) if states is not None else None
+        else:
+            output["state"] = states.get(dag_run_keys[0]) if states is not None else None
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output)
 
     # Custom Function for the refresh_dag API
-    # This will call the direct function corresponding to the web endpoint '/admin/airflow/refresh' that already exists in Airflow
-    def refresh_dag(self, base_response):
+    # Re-parses only the files the given DAGs were loaded from (or the given files) and updates the cached DagBags in place
+    def refresh_dag(self, base_response, arguments):
         logging.info("Executing custom 'refresh_dag' function")
-        dag_id = request.args.get('dag_id')
-        logging.info("dag_id to refresh: '" + str(dag_id) + "'")
-        if self.is_arg_not_provided(dag_id):
-            return REST_API_Response_Util.get_400_error_response(base_response, "dag_id should be provided")
-        elif " " in dag_id:
-            return REST_API_Response_Util.get_400_error_response(base_response, "dag_id contains spaces and is therefore an illegal argument")
-
-        try:
-            from airflow.www.views import Airflow
-            # NOTE: The request argument 'dag_id' is required for the refresh() function to get the dag_id
-            refresh_result = Airflow().refresh()
-            logging.info("Refresh Result: " + str(refresh_result))
+        dag_ids = [dag_id.strip() for dag_id in (arguments.get('dag_id') or "").split(",") if dag_id.strip()]
+        file_paths = [file_path.strip() for file_path in (arguments.get('file_path') or "").split(",") if file_path.strip()]
+        logging.info("dag_ids to refresh: " + str(dag_ids) + ", file_paths to refresh: " + str(file_paths))
+        if not dag_ids and not file_paths:
+            return REST_API_Response_Util.get_400_error_response(base_response, "dag_id or file_path should be provided")
+        for dag_id in dag_ids:
+            if " " in dag_id:
+                return REST_API_Response_Util.get_400_error_response(base_response, "dag_id '" + dag_id + "' contains spaces and is therefore an illegal argument")
+
+        filepaths = []
+        dags_folder = os.path.abspath(airflow_dags_folder)
+        for file_path in file_paths:
+            filepath = os.path.abspath(os.path.join(dags_folder, file_path))
+            if not filepath.startswith(dags_folder + os.sep):
+                return REST_API_Response_Util.get_400_error_response(base_response, "file_path '" + file_path + "' is not inside the DAGs folder")
+            if filepath not in filepaths:
+                filepaths.append(filepath)
+
+        try:
+            dag_filepaths = REST_API.get_dag_filepaths(dag_ids)
+            for dag_id in dag_ids:
+                if dag_filepaths.get(dag_id) is not None and dag_filepaths[dag_id] not in filepaths:
+                    filepaths.append(dag_filepaths[dag_id])
+            unknown_dag_ids = [dag_id for dag_id in dag_ids if dag_filepaths.get(dag_id) is None]
+            if not filepaths:
+                return REST_API_Response_Util.get_400_error_response(base_response, "The DAGs " + str(unknown_dag_ids) + " were not found")
+
+            # the DAGs are expired as of before the refresh so that the web server views don't re-parse the refreshed DAGs again
+            expired_time = datetime.now()
+            results = REST_API.refresh_dag_files(filepaths)
+            found_dag_ids = [dag.dag_id for result in results for dag in result["dags"]]
+            REST_API.expire_dags(set(found_dag_ids + dag_ids), expired_time)
+            response_cache.invalidate_dags()
         except Exception as e:
-            error_message = "An error occurred while trying to Refresh the DAG '" + str(dag_id) + "': " + str(e)
+            error_message = "An error occurred while trying to Refresh the DAGs " + str(dag_ids) + " and files " + str(file_paths) + ": " + str(e)
             logging.error(error_message)
             return REST_API_Response_Util.get_500_error_response(base_response, error_message)
 
-        return REST_API_Response_Util.get_200_response(base_response=base_response, output="DAG [{}] is now fresh as a daisy".format(dag_id))
+        output = {"dags": {}, "files": {}}
+        for result in results:
+            parse_seconds = round(result["parse_seconds"], 6)
+            import_error = str(result["import_error"]) if result["import_error"] is not None else None
+            output["files"][result["file_path"]] = {"dag_ids": sorted([dag.dag_id for dag in result["dags"]]), "parse_seconds": parse_seconds, "import_error": import_error}
+            for dag in result["dags"]:
+                output["dags"][dag.dag_id] = {"file_path": result["file_path"], "parse_seconds": parse_seconds, "import_error": import_error}
 
-    # Executes the airflow command passed into it in the background so the function isn't tied to the webserver process
+        warning = None
+        missing_dag_ids = [dag_id for dag_id in dag_ids if dag_id not in output["dags"]]
+        if missing_dag_ids:
+            warning = "The DAGs " + str(missing_dag_ids) + " were not found after the refresh"
+            logging.warning(warning)
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=output, warning=warning)
+
+    # Get the files the DAGs were loaded from as a dict of dag_id -> filepath. Looks in the cached DagBags first and in the
+    # fileloc of the DAGs in the metadata database for the DAGs that aren't loaded (like the ones whose file fails to import).
+    # The filepath is None for the DAGs that weren't found.
     @staticmethod
-    def execute_cli_command_background_mode(airflow_cmd):
-        logging.info("Executing CLI Command in the Background")
-        exit_code = os.system(airflow_cmd)
-        output = REST_API.get_empty_process_output()
-        output["stdout"] = "exit_code: " + str(exit_code)
-        return output
+    def get_dag_filepaths(dag_ids):
+        dag_filepaths = {}
+        webserver_dagbag = REST_API.get_webserver_dagbag()
+        for dag_id in dag_ids:
+            if dagbag_cache_enabled:
+                dag_filepaths[dag_id] = dagbag_cache.get_dag_filepath(dag_id)
+            elif webserver_dagbag is not None and dag_id in webserver_dagbag.dags:
+                dag_filepaths[dag_id] = REST_API_DagBag_Cache._get_dag_filepath(webserver_dagbag.dags[dag_id])
+        missing_dag_ids = [dag_id for dag_id in dag_ids if dag_filepaths.get(dag_id) is None]
+        if missing_dag_ids:
+            session = settings.Session()
+            try:
+                for dag_model in session.query(DagModel).filter(DagModel.dag_id.in_(missing_dag_ids)).all():
+                    filepath = dag_model.fileloc
+                    # the fileloc of a DAG loaded from a zip file is the path of the module inside the zip file
+                    while filepath and not os.path.isfile(filepath) and os.path.dirname(filepath) != filepath:
+                        filepath = os.path.dirname(filepath)
+                    if filepath and os.path.isfile(filepath):
+                        dag_filepaths[dag_model.dag_id] = os.path.abspath(filepath)
+            finally:
+                session.close()
+        # DAGs that are in neither, like the ones of a file that was just added, are looked up after scanning the DAGs folder
+        if dagbag_cache_enabled and [dag_id for dag_id in dag_ids if dag_filepaths.get(dag_id) is None]:
+            dagbag_cache.get_dagbag()
+            for dag_id in dag_ids:
+                if dag_filepaths.get(dag_id) is None:
+                    dag_filepaths[dag_id] = dagbag_cache.get_dag_filepath(dag_id)
+        return dag_filepaths
+
+    # Get the DagBag the Airflow web server views use or None if it's not available (outside of the web server)
+    @staticmethod
+    def get_webserver_dagbag():
+        try:
+            from airflow.www import views
+            return getattr(views, "dagbag", None)
+        except Exception:
+            return None
+
+    # Re-parse the files into the cached DagBag of the REST API Plugin (if enabled) and the DagBag of the web server views.
+    # The DAGs parsed into the cached DagBag are shared with the web server's one so the files are parsed only once.
+    @staticmethod
+    def refresh_dag_files(filepaths):
+        webserver_dagbag = REST_API.get_webserver_dagbag()
+        if dagbag_cache_enabled:
+            results = dagbag_cache.refresh_files(filepaths)
+            if webserver_dagbag is not None and webserver_dagbag is not dagbag_cache.dagbag:
+                for result in results:
+                    REST_API.forget_dag_file(webserver_dagbag, result["file_path"])
+                    for dag in result["dags"]:
+                        webserver_dagbag.dags[dag.dag_id] = dag
+                    if result["import_error"] is not None:
+                        webserver_dagbag.import_errors[result["file_path"]] = result["import_error"]
+            return results
+
+        results = []
+        for filepath in filepaths:
+            start_time = time.time()
+            if webserver_dagbag is not None:
+                dagbag = webserver_dagbag
+                REST_API.forget_dag_file(dagbag, filepath)
+                dags = (dagbag.process_file(filepath, only_if_updated=False) or []) if os.path.isfile(filepath) else []
+            else:
+                # outside of the web server there's no DagBag to update so the file is only parsed to report the result
+                dagbag = DagBag(dag_folder=filepath)
+                dags = [dag for dag in dagbag.dags.values() if REST_API_DagBag_Cache._get_dag_filepath(dag) == filepath]
+            results.append({"file_path": filepath, "dags": dags, "parse_seconds": time.time() - start_time, "import_error": dagbag.import_errors.get(filepath)})
+        return results
+
+    # Remove the DAGs (and import errors) that were loaded from the file from a DagBag
+    @staticmethod
+    def forget_dag_file(dagbag, filepath):
+        for dag_id, dag in list(dagbag.dags.items()):
+            if REST_API_DagBag_Cache._get_dag_filepath(dag) == filepath:
+                del dagbag.dags[dag_id]
+        dagbag.import_errors.pop(filepath, None)
+        dagbag.file_last_changed.pop(filepath, None)
+
+    # Set the last_expired of the DAGs so that the other web server processes re-parse them the next time they're viewed
+    @staticmethod
+    def expire_dags(dag_ids, expired_time):
+        if not dag_ids:
+            return
+        session = settings.Session()
+        try:
+            session.query(DagModel).filter(DagModel.dag_id.in_(list(dag_ids))).update({DagModel.last_expired: expired_time}, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+    # Custom Function for the dagbag_cache_stats API
+    def dagbag_cache_stats(self, base_response, arguments):
+        logging.info("Executing custom 'dagbag_cache_stats' function")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=dagbag_cache.get_stats())
+
+    # Custom Function for the admission_control_stats API
+    def admission_control_stats(self, base_response, arguments):
+        logging.info("Executing custom 'admission_control_stats' function")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=admission_controller.get_stats())
+
+    # Custom Function for the job_status API
+    def job_status(self, base_response, arguments):
+        logging.info("Executing custom 'job_status' function")
+        job_id = arguments.get("job_id").strip()
+        job = job_manager.get_job(job_id)
+        if job is None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The job '" + str(job_id) + "' does not exist")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=job)
+
+    # Custom Function for the job_output API
+    def job_output(self, base_response, arguments):
+        logging.info("Executing custom 'job_output' function")
+        job_id = arguments.get("job_id").strip()
+        try:
+            offset = int(arguments.get("offset") or 0)
+            length = int(arguments.get("length")) if arguments.get("length") else None
+        except ValueError:
+            return REST_API_Response_Util.get_400_error_response(base_response, "offset and length should be integers")
+        if offset < 0 or (length is not None and length < 0):
+            return REST_API_Response_Util.get_400_error_response(base_response, "offset and length can't be negative")
+        job_output = job_manager.read_output(job_id, offset=offset, length=length)
+        if job_output is None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The job '" + str(job_id) + "' does not exist")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=job_output)
+
+    # Custom Function for the task_log API
+    def task_log(self, base_response, arguments):
+        logging.info("Executing custom 'task_log' function")
+        dag_id = arguments.get("dag_id").strip()
+        task_id = arguments.get("task_id").strip()
+        try:
+            execution_date = dateutil.parser.parse(arguments.get("execution_date"))
+        except (ValueError, TypeError, OverflowError) as e:
+            return REST_API_Response_Util.get_400_error_response(base_response, "Failed to parse the execution_date: " + str(e))
+        try:
+            try_number = int(arguments.get("try_number")) if not self.is_arg_not_provided(arguments.get("try_number")) else None
+            offset = int(arguments.get("offset") or 0)
+            length = int(arguments.get("length")) if not self.is_arg_not_provided(arguments.get("length")) else None
+            tail_lines = int(arguments.get("tail_lines")) if not self.is_arg_not_provided(arguments.get("tail_lines")) else None
+            timeout = min(float(arguments.get("timeout")), task_log_follow_max_timeout) if not self.is_arg_not_provided(arguments.get("timeout")) else task_log_follow_max_timeout
+        except ValueError:
+            return REST_API_Response_Util.get_400_error_response(base_response, "try_number, offset, length and tail_lines should be integers and timeout a number")
+        if min([offset, length or 0, tail_lines or 0, try_number or 1]) < 0 or try_number == 0:
+            return REST_API_Response_Util.get_400_error_response(base_response, "offset, length and tail_lines can't be negative and try_number should be at least 1")
+        follow = arguments.get("follow") is not None
+        if follow and tail_lines is not None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "follow reads from the offset and can't be used with tail_lines")
+
+        if try_number is None:
+            try_number = REST_API_Task_Log.get_latest_try_number(dag_id, task_id, execution_date)
+        log_file_path = REST_API_Task_Log.get_log_file_path(dag_id, task_id, execution_date, try_number)
+        if log_file_path is None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The log of the task instance isn't inside the BASE_LOG_FOLDER")
+        if follow:
+            REST_API_Task_Log.wait_for_bytes(log_file_path, offset, max(0, timeout))
+        if not os.path.isfile(log_file_path):
+            if not follow:
+                return REST_API_Response_Util.get_400_error_response(base_response, "The log file '" + log_file_path + "' does not exist")
+            # the task instance didn't start writing its log yet. It's followed as an empty log.
+            output = REST_API_Task_Log.get_output(offset, b"", 0)
+        elif tail_lines is not None:
+            output = REST_API_Task_Log.read_tail(log_file_path, tail_lines, length=length)
+        else:
+            output = REST_API_Task_Log.read_bytes(log_file_path, offset=offset, length=length)
+        output["file_path"] = log_file_path
+        output["try_number"] = try_number
+        response = REST_API_Response_Util.get_200_response(base_response=base_response, output=output)
+        if arguments.get("gzip") is not None:
+            response = REST_API_Response_Util.get_gzip_response(response)
+        return response
+
+    # Custom Function for the cli_output API
+    def cli_output(self, base_response, arguments):
+        logging.info("Executing custom 'cli_output' function")
+        output_id = arguments.get("output_id").strip()
+        stream_name = (arguments.get("output_stream") or "stdout").strip().lower()
+        if stream_name not in REST_API_Output_Capture.STREAM_NAMES:
+            return REST_API_Response_Util.get_400_error_response(base_response, "output_stream should be either 'stdout' or 'stderr'")
+        try:
+            offset = int(arguments.get("offset") or 0)
+            length = int(arguments.get("length")) if arguments.get("length") else None
+            start_line = int(arguments.get("start_line")) if arguments.get("start_line") else None
+            line_count = int(arguments.get("line_count")) if arguments.get("line_count") else None
+        except ValueError:
+            return REST_API_Response_Util.get_400_error_response(base_response, "offset, length, start_line and line_count should be integers")
+        if min([offset, length or 0, start_line or 0, line_count or 0]) < 0:
+            return REST_API_Response_Util.get_400_error_response(base_response, "offset, length, start_line and line_count can't be negative")
+        if start_line is not None or line_count is not None:
+            cli_output = REST_API_Output_Capture.read_lines(process_output_folder, output_id, stream_name, start_line=start_line or 0, line_count=line_count)
+        else:
+            cli_output = REST_API_Output_Capture.read_bytes(process_output_folder, output_id, stream_name, offset=offset, length=length)
+        if cli_output is None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The output '" + str(output_id) + "' does not exist")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=cli_output)
+
+    # Custom Function for the job_cancel API
+    def job_cancel(self, base_response, arguments):
+        logging.info("Executing custom 'job_cancel' function")
+        job_id = arguments.get("job_id").strip()
+        job = job_manager.cancel(job_id)
+        if job is None:
+            return REST_API_Response_Util.get_400_error_response(base_response, "The job '" + str(job_id) + "' does not exist")
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=job)
+
+    # Custom Function for the list_jobs API
+    def list_jobs(self, base_response, arguments):
+        logging.info("Executing custom 'list_jobs' function")
+        status = arguments.get("status")
+        status = status.strip().upper() if not self.is_arg_not_provided(status) else None
+        return REST_API_Response_Util.get_200_response(base_response=base_response, output=job_manager.list_jobs(status=status))
 
     # General execution of the airflow command passed to it and returns the response
     @staticmethod
     def execute_cli_command(airflow_cmd_split):
         logging.info("Executing CLI Command")
+        start_time = time.time()
+        if cli_worker_pool_enabled:
+            output = cli_worker_pool.execute(airflow_cmd_split)
+            if output is not None:
+                metrics.observe("rest_api_cli_process_duration_seconds", {"api": airflow_cmd_split[1], "runner": "cli_worker_pool"}, time.time() - start_time)
+                return output
+            start_time = time.time()
         process = subprocess.Popen(airflow_cmd_split, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        process.wait()
-        return REST_API.collect_process_output(process)
+        metrics.observe("rest_api_cli_process_spawn_seconds", {"api": airflow_cmd_split[1]}, time.time() - start_time)
+        output = REST_API.collect_process_output(process)
+        metrics.observe("rest_api_cli_process_duration_seconds", {"api": airflow_cmd_split[1], "runner": "subprocess"}, time.time() - start_time)
+        return output
 
     # gets and empty object that has all the fields a CLI function would have in it.
     @staticmethod
@@ -800,43 +4887,251 @@ class REST_API(BaseView):
             "stdout": ""
         }
 
-    # Get the output of the CLI process and package it in a dict
+    # Get the output of the CLI process and package it in a dict along with its exit code. Waits for the process to finish.
     @staticmethod
     def collect_process_output(process):
-        output = REST_API.get_empty_process_output()
-        if process.stderr is not None:
-            output["stderr"] = ""
-            for line in process.stderr.readlines():
-                output["stderr"] += str(line)
-        if process.stdin is not None:
-            output["stdin"] = ""
-            for line in process.stdin.readlines():
-                output["stdin"] += str(line)
-        if process.stdout is not None:
-            output["stdout"] = ""
-            for line in process.stdout.readlines():
-                output["stdout"] += str(line)
-        logging.info("RestAPI Output: " + str(output))
+        output = REST_API.collect_output_lines(REST_API.read_process_output_lines(process))
+        output["exit_code"] = process.returncode
+        return output
+
+    # Package (stream_name, line) tuples into the output dict of a CLI function
+    @staticmethod
+    def collect_output_lines(lines):
+        output_capture = REST_API_Output_Capture(process_output_max_memory_size, process_output_folder, process_output_history_size)
+        for stream_name, line in cli_output_line_filter.filter_lines(lines):
+            output_capture.add(stream_name, line)
+        output = output_capture.get_output()
+        logging.info("RestAPI Output: " + str(output_capture.sizes["stdout"]) + " bytes of stdout and " + str(output_capture.sizes["stderr"]) + " bytes of stderr")
         return output
 
+    # Generator that yields (stream_name, line) tuples from files the stdout and stderr of a command were written to
+    @staticmethod
+    def read_output_files_lines(stdout_path, stderr_path):
+        for stream_name, path in [("stdout", stdout_path), ("stderr", stderr_path)]:
+            decoder = REST_API.get_output_decoder()
+            with open(path, "rb") as output_file:
+                for line in iter(lambda: output_file.readline(process_output_max_line_chunk_size), b""):
+                    line = decoder.decode(line)
+                    if line:
+                        yield stream_name, line
+            line = decoder.decode(b"", True)
+            if line:
+                yield stream_name, line
+
+    # Generator that yields (stream_name, line) tuples from the stdout and stderr of the process as they are written.
+    # Both pipes are drained concurrently by reader threads so the process can never block on a full pipe, while the
+    # bounded queue between the readers and the consumer keeps memory bounded when the consumer is slow.
+    # Waits for the process to finish once both pipes are closed.
+    @staticmethod
+    def read_process_output_lines(process):
+        lines = queue.Queue(maxsize=process_output_max_queued_lines)
+        stop_reading = threading.Event()
+
+        def put_line(item):
+            while not stop_reading.is_set():
+                try:
+                    lines.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    pass
+
+        def read_pipe(stream_name, pipe):
+            try:
+                # reading with a size limit so that output without newlines is still handed over in bounded chunks
+                for line in iter(lambda: pipe.readline(process_output_max_line_chunk_size), b""):
+                    put_line((stream_name, line))
+            finally:
+                pipe.close()
+                put_line((stream_name, None))
+
+        open_pipes = 0
+        for stream_name, pipe in [("stdout", process.stdout), ("stderr", process.stderr)]:
+            if pipe is not None:
+                reader = threading.Thread(target=read_pipe, args=(stream_name, pipe))
+                reader.daemon = True
+                reader.start()
+                open_pipes += 1
+
+        # the lines of each stream are decoded in order by the decoder of the stream, which holds back a character that's
+        # split between two chunks of a line longer than process_output_max_line_chunk_size until the next chunk
+        decoders = {"stdout": REST_API.get_output_decoder(), "stderr": REST_API.get_output_decoder()}
+        try:
+            while open_pipes > 0:
+                stream_name, line = lines.get()
+                if line is None:
+                    open_pipes -= 1
+                    line = decoders[stream_name].decode(b"", True)
+                else:
+                    line = decoders[stream_name].decode(line)
+                if line:
+                    yield stream_name, line
+            process.wait()
+        finally:
+            stop_reading.set()
+
+    # Get a decoder of the output of a process that is fed the output chunk by chunk
+    @staticmethod
+    def get_output_decoder():
+        return codecs.getincrementaldecoder("utf-8")("replace")
+
+    # Decode a line read from a process pipe
+    @staticmethod
+    def decode_output_line(line):
+        if isinstance(line, bytes):
+            return line.decode("utf-8", "replace")
+        return line
+
+    # Runs the CLI command and streams its stdout and stderr back to the client while the process runs.
+    # The final message contains the response envelope ('status', 'airflow_cmd', 'exit_code', etc.).
+    # stream_format 'sse' sends Server-Sent Events, everything else sends newline delimited JSON over a chunked response.
+    # If the client disconnects before the command finishes, the process is terminated.
+    @staticmethod
+    def stream_cli_command(base_response, airflow_cmd, airflow_cmd_split, stream_format):
+        logging.info("Executing CLI Command in Streaming Mode (format: " + str(stream_format) + ")")
+        use_sse = stream_format == "sse"
+
+        def format_message(event, data):
+            if use_sse:
+                return "event: " + event + "\ndata: " + json.dumps(data) + "\n\n"
+            return json.dumps(data) + "\n"
+
+        def generate():
+            start_time = time.time()
+            process = subprocess.Popen(airflow_cmd_split, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            output_lines = REST_API.read_process_output_lines(process)
+            try:
+                for stream_name, line in cli_output_line_filter.filter_lines(output_lines):
+                    yield format_message(stream_name, {"stream": stream_name, "line": line})
+            finally:
+                if process.poll() is None:
+                    logging.warning("Streaming client disconnected. Terminating the CLI process.")
+                    process.terminate()
+                    process.wait()
+                output_lines.close()
+            final_response = base_response
+            final_response["airflow_cmd"] = airflow_cmd
+            final_response["exit_code"] = process.returncode
+            final_response["response_time"] = datetime.now()
+            timings = final_response.pop("timings", None)
+            if isinstance(timings, REST_API_Timings):
+                timings.record("execution", time.time() - start_time)
+                if timings.include_in_response:
+                    final_response["timings"] = timings.to_dict()
+            yield format_message("result", final_response)
+
+        mimetype = "text/event-stream" if use_sse else "application/x-ndjson"
+        return Response(stream_with_context(generate()), mimetype=mimetype, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
     # Filtering out logging statements from the standard output
     # Content like:
     #
     # [2017-04-19 10:04:34,927] {__init__.py:36} INFO - Using executor CeleryExecutor
     # [2017-04-19 10:04:35,926] {models.py:154} INFO - Filling up the DagBag from /Users/...
+    #
+    # The CLI APIs drop these lines as they are read through the cli_output_line_filter instead.
     @staticmethod
     def filter_loading_messages(output):
-        stdout = output["stdout"]
-        new_stdout_array = stdout.split("\n")
-        content_to_remove_greatest_index = 0
-        for index, content in enumerate(new_stdout_array):
-            if content.startswith("["):
-                content_to_remove_greatest_index = index
-        content_to_remove_greatest_index += 1
-        if len(new_stdout_array) > content_to_remove_greatest_index:
-            new_stdout_array = new_stdout_array[content_to_remove_greatest_index:]
-            output["stdout"] = "\n".join(new_stdout_array)
-        return output
+        return loading_messages_line_filter.filter_output(output)
+
+# Registering the handlers of the custom APIs
+api_registry.set_handler("version", REST_API.version)
+api_registry.set_handler("rest_api_plugin_version", REST_API.rest_api_plugin_version)
+api_registry.set_handler("deploy_dag", REST_API.deploy_dag)
+api_registry.set_handler("deploy_dag_bundle", REST_API.deploy_dag_bundle)
+api_registry.set_handler("refresh_dag", REST_API.refresh_dag)
+api_registry.set_handler("variables_import", REST_API.variables_import)
+api_registry.set_handler("variables_export", REST_API.variables_export)
+api_registry.set_handler("connections_query", REST_API.connections_query)
+api_registry.set_handler("connections_bulk", REST_API.connections_bulk)
+api_registry.set_handler("trigger_dags", REST_API.trigger_dags)
+api_registry.set_handler("clear_dags", REST_API.clear_dags)
+api_registry.set_handler("watch_state", REST_API.watch_state)
+api_registry.set_handler("dagbag_cache_stats", REST_API.dagbag_cache_stats)
+api_registry.set_handler("admission_control_stats", REST_API.admission_control_stats)
+api_registry.set_handler("job_status", REST_API.job_status)
+api_registry.set_handler("job_output", REST_API.job_output)
+api_registry.set_handler("job_cancel", REST_API.job_cancel)
+api_registry.set_handler("list_jobs", REST_API.list_jobs)
+api_registry.set_handler("cli_output", REST_API.cli_output)
+api_registry.set_handler("task_log", REST_API.task_log)
+api_registry.set_handler("batch", REST_API.batch)
+api_registry.set_handler("bulk_state", REST_API.bulk_state)
+
+# Creating the Metrics of the REST API Plugin
+metrics = REST_API_Metrics(enabled=metrics_enabled, buckets=metrics_histogram_buckets)
+metrics.define("rest_api_requests_total", REST_API_Metrics.COUNTER, "Number of API calls by API and HTTP response code")
+metrics.define("rest_api_requests_in_flight", REST_API_Metrics.GAUGE, "Number of API calls being executed")
+metrics.define("rest_api_request_duration_seconds", REST_API_Metrics.HISTOGRAM, "Duration of the API calls")
+metrics.define("rest_api_phase_duration_seconds", REST_API_Metrics.HISTOGRAM, "Time spent in each phase of the API calls (validation, dagbag, admission, coalescing, execution, filtering, serialization)")
+metrics.define("rest_api_cli_process_spawn_seconds", REST_API_Metrics.HISTOGRAM, "Time taken to start an airflow CLI process")
+metrics.define("rest_api_cli_process_duration_seconds", REST_API_Metrics.HISTOGRAM, "Time taken to run an airflow CLI command, from starting it to collecting its output")
+metrics.define("rest_api_dagbag_reload_seconds", REST_API_Metrics.HISTOGRAM, "Time taken to fill up or refresh the cached DagBag")
+metrics.define("rest_api_admission_queue_depth", REST_API_Metrics.GAUGE, "Number of API calls waiting for the admission control to let them run")
+metrics.define("rest_api_admission_wait_seconds", REST_API_Metrics.HISTOGRAM, "Time the admitted API calls waited for the admission control")
+metrics.define("rest_api_admission_rejections_total", REST_API_Metrics.COUNTER, "Number of API calls rejected by the admission control by API and reason")
+
+
+# Collects the counters of the DagBag Cache and the Response Cache
+def collect_cache_metrics():
+    dagbag_cache_stats = dagbag_cache.get_stats()
+    response_cache_stats = response_cache.get_stats()
+    request_coalescer_stats = request_coalescer.get_stats()
+    state_watcher_stats = state_watcher.get_stats()
+    return [
+        ("rest_api_plugin_info", REST_API_Metrics.GAUGE, "Version of the REST API Plugin and of Airflow", {"version": rest_api_plugin_version, "airflow_version": airflow_version}, 1),
+        ("rest_api_dagbag_cache_lookups_total", REST_API_Metrics.COUNTER, "Number of times the cached DagBag was used by result", {"result": "hit"}, dagbag_cache_stats["hits"]),
+        ("rest_api_dagbag_cache_lookups_total", REST_API_Metrics.COUNTER, "Number of times the cached DagBag was used by result", {"result": "miss"}, dagbag_cache_stats["misses"]),
+        ("rest_api_dagbag_cache_files_reparsed_total", REST_API_Metrics.COUNTER, "Number of DAG files re-parsed by the DagBag cache", None, dagbag_cache_stats["files_reparsed"]),
+        ("rest_api_dagbag_cache_dags", REST_API_Metrics.GAUGE, "Number of DAGs in the cached DagBag", None, dagbag_cache_stats["dag_count"]),
+        ("rest_api_response_cache_lookups_total", REST_API_Metrics.COUNTER, "Number of response cache lookups by result", {"result": "hit"}, response_cache_stats["hits"]),
+        ("rest_api_response_cache_lookups_total", REST_API_Metrics.COUNTER, "Number of response cache lookups by result", {"result": "miss"}, response_cache_stats["misses"]),
+        ("rest_api_response_cache_evictions_total", REST_API_Metrics.COUNTER, "Number of entries evicted from the response cache", None, response_cache_stats["evictions"]),
+        ("rest_api_response_cache_size_bytes", REST_API_Metrics.GAUGE, "Size of the outputs in the response cache", None, response_cache_stats["size"]),
+        ("rest_api_coalesced_calls_total", REST_API_Metrics.COUNTER, "Number of API calls that shared the output of an identical call by scope", {"scope": "process"}, request_coalescer_stats["coalesced"]),
+        ("rest_api_coalesced_calls_total", REST_API_Metrics.COUNTER, "Number of API calls that shared the output of an identical call by scope", {"scope": "host"}, request_coalescer_stats["coalesced_across_processes"]),
+        ("rest_api_coalescing_wait_timeouts_total", REST_API_Metrics.COUNTER, "Number of API calls that stopped waiting for an identical call and ran on their own", None, request_coalescer_stats["wait_timeouts"]),
+        ("rest_api_state_watches", REST_API_Metrics.GAUGE, "Number of watch_state calls waiting for a state change", None, state_watcher_stats["watching"]),
+        ("rest_api_state_watcher_polls_total", REST_API_Metrics.COUNTER, "Number of times the states of all the watches were polled", None, state_watcher_stats["polls"]),
+        ("rest_api_state_watcher_poll_seconds_total", REST_API_Metrics.COUNTER, "Time spent polling the states of the watches", None, state_watcher_stats["total_poll_seconds"])
+    ]
+
+
+metrics.add_collector(collect_cache_metrics)
+
+# Creating the filters the output lines of the CLI commands go through. When enabled, the loading messages are dropped
+# from stdout before the configured filters are applied.
+loading_messages_line_filter = REST_API_Line_Filter([(REST_API_Line_Filter.DROP, ["stdout"], re.compile(REST_API_Line_Filter.LOADING_MESSAGE_PATTERN))])
+in_process_output_line_filter = REST_API_Line_Filter(REST_API_Line_Filter.parse_filters(output_line_filters), redaction=output_line_filter_redaction)
+cli_output_line_filter = REST_API_Line_Filter((loading_messages_line_filter.filters if filter_loading_messages_in_cli_response else []) + in_process_output_line_filter.filters, redaction=output_line_filter_redaction)
+
+# Creating the process-wide DagBag Cache used by the REST API (the DagBag is only filled up on first use)
+dagbag_cache = REST_API_DagBag_Cache(dag_folder=airflow_dags_folder, refresh_interval=dagbag_cache_refresh_interval, version_check_interval=response_cache_dag_check_interval)
+
+# Response cache shared by all the calls of the CLI APIs that have a cache_ttl
+response_cache = REST_API_Response_Cache(backend=response_cache_backend, max_size=response_cache_max_size, folder=response_cache_folder)
+
+# Creating the Request Coalescer that shares the execution of identical calls running at the same time
+request_coalescer = REST_API_Request_Coalescer(enabled=request_coalescing_enabled, across_processes=request_coalescing_across_processes, folder=request_coalescing_folder, wait_timeout=request_coalescing_wait_timeout)
+
+# Creating the State Watcher that serves the watch_state calls (its thread is only started while something is watched)
+state_watcher = REST_API_State_Watcher(poll_interval=watch_state_poll_interval, max_watchers=watch_state_max_watchers)
+
+# Creating the Admission Controller that limits how many API calls run at the same time
+admission_controller = REST_API_Admission_Controller(
+    enabled=admission_control_enabled,
+    max_weight=admission_control_max_weight,
+    client_max_weight=admission_control_client_max_weight,
+    client_rate_limit=admission_control_client_rate_limit,
+    client_burst=admission_control_client_burst,
+    queue_size=admission_control_queue_size,
+    queue_timeout=admission_control_queue_timeout
+)
+
+# Creating the Job Manager that runs the async and background CLI commands
+job_manager = REST_API_Job_Manager(output_folder=job_output_folder, max_workers=job_executor_max_workers, history_size=job_history_size)
+
+# Creating the Pool of pre-warmed CLI Workers (the workers are only started on first use)
+cli_worker_pool = REST_API_CLI_Worker_Pool(size=cli_worker_pool_size, max_jobs=cli_worker_max_jobs, max_memory_mb=cli_worker_max_memory_mb, acquire_timeout=cli_worker_acquire_timeout, execute_timeout=cli_worker_execute_timeout)
 
 # Creating View to be used by Plugin
 rest_api_view = REST_API(category="Admin", name="REST API Plugin")
@@ -860,3 +5155,84 @@ class REST_API_Plugin(AirflowPlugin):
     executors = []
     admin_views = [rest_api_view]
     menu_links = []
+
+
+# Get the parser of the Airflow CLI
+def get_cli_parser():
+    try:
+        from airflow.bin.cli import CLIFactory
+        return CLIFactory.get_parser()
+    except ImportError:  # Airflow versions before 1.8
+        from airflow.bin.cli import get_parser
+        return get_parser()
+
+
+# Main loop of a CLI Worker (see REST_API_CLI_Worker). Reads commands as JSON lines from stdin, runs each one in a forked
+# child so it starts with the already imported modules and the warm DagBag, and writes the exit code back to stdout.
+def run_cli_fork_server():
+    # keeping the original stdout for the protocol and sending anything else that's printed to stderr
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def write_message(message):
+        message["rss_kb"] = REST_API_CLI_Worker.get_rss_kb()
+        protocol_out.write(REST_API_CLI_Worker.protocol_prefix + json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    sys.argv = ["airflow"]  # so the usage messages of the parser look like the ones of the CLI
+    parser = get_cli_parser()
+
+    # the CLI commands fill up a DagBag from the DAGS_FOLDER through airflow.bin.cli.DagBag. Handing them the warm DagBag instead.
+    if dagbag_cache_enabled:
+        from airflow.bin import cli
+
+        def get_warm_dagbag(dag_folder=None, *args, **kwargs):
+            if (dag_folder is None or os.path.abspath(os.path.expanduser(dag_folder)) == os.path.abspath(airflow_dags_folder)) and not args and not kwargs:
+                return dagbag_cache.dagbag
+            return DagBag(dag_folder, *args, **kwargs)
+        dagbag_cache.get_dagbag()
+        cli.DagBag = get_warm_dagbag
+
+    write_message({"ready": True, "pid": os.getpid()})
+    for line in iter(sys.stdin.readline, ""):
+        message = json.loads(line)
+        if dagbag_cache_enabled:
+            dagbag_cache.get_dagbag()
+        # database connections can't be shared with the child, so making sure none are open when forking
+        settings.engine.dispose()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                protocol_out.close()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                null_file_descriptor = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(null_file_descriptor, sys.stdin.fileno())
+                for path, file_descriptor in [(message["stdout_path"], sys.stdout.fileno()), (message["stderr_path"], sys.stderr.fileno())]:
+                    output_file_descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    os.dup2(output_file_descriptor, file_descriptor)
+                    os.close(output_file_descriptor)
+                args = parser.parse_args(message["argv"])
+                args.func(args)
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                try:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                finally:
+                    os._exit(exit_code)
+        write_message({"child_pid": pid})
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        write_message({"exit_code": exit_code})
+
+
+if __name__ == "__main__" and "--cli-fork-server" in sys.argv:
+    run_cli_fork_server()
@@ -0,0 +1,221 @@
+# Tests of the clear_dags API against the task instances, dag runs and jobs of the stub metadata database. The task
+# instances are expected to end up like 'airflow clear' leaves them.
+#
+# Usage: python -m unittest discover tests
+import json
+import os
+import unittest
+from datetime import datetime
+
+from plugin_loader import load_test_plugin
+
+CLEAR_TEST_DAG = """
+from airflow.models import DAG, BaseOperator, SubDagOperator
+
+dag = DAG("clear_test")
+extract = BaseOperator(task_id="extract", dag=dag, retries=1)
+transform = BaseOperator(task_id="transform", dag=dag, retries=2)
+load = BaseOperator(task_id="load", dag=dag)
+extract.set_downstream(transform)
+transform.set_downstream(load)
+section_dag = DAG("clear_test.section")
+BaseOperator(task_id="inner", dag=section_dag, retries=3)
+section = SubDagOperator(task_id="section", dag=dag, subdag=section_dag)
+"""
+
+FIRST_DATE = datetime(2020, 1, 1)
+SECOND_DATE = datetime(2020, 1, 2)
+
+# the (dag_id, task_id, execution_date) -> (state, try_number, job_id) of the seeded task instances
+TASK_INSTANCES = {
+    ("clear_test", "extract", FIRST_DATE): ("success", 1, None),
+    ("clear_test", "transform", FIRST_DATE): ("failed", 3, None),
+    ("clear_test", "load", FIRST_DATE): ("upstream_failed", 0, None),
+    ("clear_test", "section", FIRST_DATE): ("success", 1, None),
+    ("clear_test.section", "inner", FIRST_DATE): ("success", 2, None),
+    ("clear_test", "extract", SECOND_DATE): ("success", 1, None),
+    ("clear_test", "transform", SECOND_DATE): ("running", 1, 1),
+    ("clear_test", "load", SECOND_DATE): (None, 0, None),
+    ("clear_test", "section", SECOND_DATE): ("running", 1, None),
+    ("clear_test.section", "inner", SECOND_DATE): ("running", 1, 2),
+}
+
+
+class ClearDagsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin, app = load_test_plugin()
+        cls.client = app.test_client()
+        dag_file_path = os.path.join(cls.plugin.airflow_dags_folder, "clear_test.py")
+        with open(dag_file_path, "w") as dag_file:
+            dag_file.write(CLEAR_TEST_DAG)
+        cls.plugin.dagbag_cache.invalidate(dag_file_path)
+        cls.dag_file_path = dag_file_path
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.dag_file_path)
+        cls.plugin.dagbag_cache.invalidate(cls.dag_file_path)
+
+    def setUp(self):
+        from airflow import settings
+        from airflow.models import DagRun, Job, TaskInstance
+        session = settings.Session()
+        try:
+            for (dag_id, task_id, execution_date), (state, try_number, job_id) in TASK_INSTANCES.items():
+                session.add(TaskInstance(dag_id=dag_id, task_id=task_id, execution_date=execution_date, state=state, try_number=try_number, max_tries=try_number, job_id=job_id))
+            for dag_id in ["clear_test", "clear_test.section"]:
+                session.add(DagRun(dag_id=dag_id, execution_date=FIRST_DATE, state="failed"))
+                session.add(DagRun(dag_id=dag_id, execution_date=SECOND_DATE, state="running"))
+            session.add_all([Job(id=1, state="running"), Job(id=2, state="running")])
+            session.commit()
+        finally:
+            session.close()
+
+    def tearDown(self):
+        from airflow import settings
+        from airflow.models import DagRun, Job, TaskInstance
+        session = settings.Session()
+        try:
+            for model in [TaskInstance, DagRun, Job]:
+                session.query(model).delete()
+            session.commit()
+        finally:
+            session.close()
+
+    def clear_dags(self, arguments):
+        response = self.client.get("/admin/rest_api/api?api=clear_dags&" + arguments)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return json.loads(response.get_data(as_text=True))["output"]
+
+    # Get the (dag_id, task_id, execution_date) -> (state, max_tries) of the task instances
+    def get_task_instances(self):
+        from airflow import settings
+        from airflow.models import TaskInstance
+        session = settings.Session()
+        try:
+            return dict([((ti.dag_id, ti.task_id, ti.execution_date), (ti.state, ti.max_tries)) for ti in session.query(TaskInstance)])
+        finally:
+            session.close()
+
+    # Get the (dag_id, execution_date) -> state of the dag runs
+    def get_dag_runs(self):
+        from airflow import settings
+        from airflow.models import DagRun
+        session = settings.Session()
+        try:
+            return dict([((dag_run.dag_id, dag_run.execution_date), dag_run.state) for dag_run in session.query(DagRun)])
+        finally:
+            session.close()
+
+    # Get the id -> state of the jobs
+    def get_jobs(self):
+        from airflow import settings
+        from airflow.models import Job
+        session = settings.Session()
+        try:
+            return dict([(job.id, job.state) for job in session.query(Job)])
+        finally:
+            session.close()
+
+    # Get the (state, max_tries) of the seeded task instances, which is what they should be when nothing is cleared
+    def get_seeded_task_instances(self):
+        return dict([(key, (state, try_number)) for key, (state, try_number, job_id) in TASK_INSTANCES.items()])
+
+    def test_dry_run_counts_without_clearing(self):
+        output = self.clear_dags("dag_id=clear_test&dry_run=on")
+        self.assertEqual(output, {"dags": {"clear_test": 8, "clear_test.section": 2}, "count": 10, "dry_run": True})
+        self.assertEqual(self.get_task_instances(), self.get_seeded_task_instances())
+        self.assertEqual(self.get_jobs(), {1: "running", 2: "running"})
+
+    def test_clear_resets_the_states_and_gives_the_retries_back(self):
+        output = self.clear_dags("dag_id=clear_test")
+        self.assertEqual(output, {"dags": {"clear_test": 8, "clear_test.section": 2}, "count": 10, "dry_run": False})
+        self.assertEqual(self.get_task_instances(), {
+            ("clear_test", "extract", FIRST_DATE): (None, 2),
+            ("clear_test", "transform", FIRST_DATE): (None, 5),
+            ("clear_test", "load", FIRST_DATE): (None, 0),
+            ("clear_test", "section", FIRST_DATE): (None, 1),
+            ("clear_test.section", "inner", FIRST_DATE): (None, 5),
+            ("clear_test", "extract", SECOND_DATE): (None, 2),
+            # the running task instances with a job are shut down, the ones without a job are left as they are
+            ("clear_test", "transform", SECOND_DATE): ("shutdown", 1),
+            ("clear_test", "load", SECOND_DATE): (None, 0),
+            ("clear_test", "section", SECOND_DATE): ("running", 1),
+            ("clear_test.section", "inner", SECOND_DATE): ("shutdown", 1),
+        })
+        self.assertEqual(self.get_jobs(), {1: "shutdown", 2: "shutdown"})
+        self.assertEqual(set(self.get_dag_runs().values()), set(["running"]))
+
+    def test_dry_run_of_an_empty_selection(self):
+        output = self.clear_dags("dag_id=clear_test&task_regex=^nothing$&dry_run=on")
+        self.assertEqual(output, {"dags": {"clear_test": 0}, "count": 0, "dry_run": True})
+
+    def test_task_regex_with_the_downstream_tasks(self):
+        self.assertEqual(self.clear_dags("dag_id=clear_test&task_regex=^transform$&dry_run=on")["count"], 2)
+        output = self.clear_dags("dag_id=clear_test&task_regex=^transform$&downstream=on")
+        self.assertEqual(output["dags"], {"clear_test": 4})
+        expected_task_instances = self.get_seeded_task_instances()
+        expected_task_instances.update({
+            ("clear_test", "transform", FIRST_DATE): (None, 5),
+            ("clear_test", "load", FIRST_DATE): (None, 0),
+            ("clear_test", "transform", SECOND_DATE): ("shutdown", 1),
+            ("clear_test", "load", SECOND_DATE): (None, 0),
+        })
+        self.assertEqual(self.get_task_instances(), expected_task_instances)
+        self.assertEqual(self.get_jobs(), {1: "shutdown", 2: "running"})
+        self.assertEqual(self.get_dag_runs()[("clear_test", FIRST_DATE)], "running")
+        self.assertEqual(self.get_dag_runs()[("clear_test.section", FIRST_DATE)], "failed")
+
+    def test_task_regex_with_the_upstream_tasks(self):
+        output = self.clear_dags("dag_id=clear_test&task_regex=^load$&upstream=on&dry_run=on")
+        self.assertEqual(output["dags"], {"clear_test": 6})
+
+    def test_subdag_task_clears_the_subdag(self):
+        output = self.clear_dags("dag_id=clear_test&task_regex=^section$")
+        self.assertEqual(output["dags"], {"clear_test": 2, "clear_test.section": 2})
+        task_instances = self.get_task_instances()
+        self.assertEqual(task_instances[("clear_test.section", "inner", FIRST_DATE)], (None, 5))
+        self.assertEqual(task_instances[("clear_test.section", "inner", SECOND_DATE)], ("shutdown", 1))
+        self.assertEqual(task_instances[("clear_test", "extract", FIRST_DATE)], ("success", 1))
+
+    def test_exclude_subdags(self):
+        output = self.clear_dags("dag_id=clear_test&exclude_subdags=on")
+        self.assertEqual(output["dags"], {"clear_test": 8})
+        task_instances = self.get_task_instances()
+        self.assertEqual(task_instances[("clear_test.section", "inner", FIRST_DATE)], ("success", 2))
+        self.assertEqual(self.get_jobs(), {1: "shutdown", 2: "running"})
+
+    def test_only_failed(self):
+        output = self.clear_dags("dag_id=clear_test&only_failed=on")
+        self.assertEqual(output["count"], 1)
+        expected_task_instances = self.get_seeded_task_instances()
+        expected_task_instances[("clear_test", "transform", FIRST_DATE)] = (None, 5)
+        self.assertEqual(self.get_task_instances(), expected_task_instances)
+        self.assertEqual(self.get_dag_runs()[("clear_test", FIRST_DATE)], "running")
+        self.assertEqual(self.get_dag_runs()[("clear_test.section", FIRST_DATE)], "failed")
+
+    def test_only_running(self):
+        output = self.clear_dags("dag_id=clear_test&only_running=on")
+        self.assertEqual(output["dags"], {"clear_test": 2, "clear_test.section": 1})
+        expected_task_instances = self.get_seeded_task_instances()
+        expected_task_instances.update({
+            ("clear_test", "transform", SECOND_DATE): ("shutdown", 1),
+            ("clear_test.section", "inner", SECOND_DATE): ("shutdown", 1),
+        })
+        self.assertEqual(self.get_task_instances(), expected_task_instances)
+        self.assertEqual(self.get_jobs(), {1: "shutdown", 2: "shutdown"})
+
+    def test_start_and_end_date(self):
+        output = self.clear_dags("dag_id=clear_test&start_date=2020-01-01T00:00:00&end_date=2020-01-01T23:59:59")
+        self.assertEqual(output["dags"], {"clear_test": 4, "clear_test.section": 1})
+        task_instances = self.get_task_instances()
+        self.assertEqual(task_instances[("clear_test", "extract", FIRST_DATE)], (None, 2))
+        self.assertEqual(task_instances[("clear_test", "extract", SECOND_DATE)], ("success", 1))
+        self.assertEqual(self.get_dag_runs()[("clear_test", SECOND_DATE)], "running")
+        self.assertEqual(self.get_jobs(), {1: "running", 2: "running"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# Tests of the version of the DAGs folder the response cache checks its outputs depending on the DAGs against
+#
+# Usage: python -m unittest discover tests
+import os
+import shutil
+import tempfile
+import unittest
+
+from plugin_loader import load_test_plugin
+
+
+class DagFolderVersionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        plugin, app = load_test_plugin()
+        cls.dagbag_cache_class = plugin.REST_API_DagBag_Cache
+
+    def setUp(self):
+        self.dag_folder = tempfile.mkdtemp(prefix="rest_api_plugin_test_dags_")
+        self.write_dag_file("a.py")
+
+    def tearDown(self):
+        shutil.rmtree(self.dag_folder)
+
+    def write_dag_file(self, file_name):
+        with open(os.path.join(self.dag_folder, file_name), "w") as dag_file:
+            dag_file.write("from airflow.models import DAG\n")
+        return os.path.join(self.dag_folder, file_name)
+
+    def test_folder_is_scanned_on_every_call_without_an_interval(self):
+        dagbag_cache = self.dagbag_cache_class(self.dag_folder)
+        version = dagbag_cache.get_dag_folder_version()
+        self.write_dag_file("b.py")
+        self.assertNotEqual(dagbag_cache.get_dag_folder_version(), version)
+
+    def test_folder_is_scanned_at_most_once_per_interval(self):
+        dagbag_cache = self.dagbag_cache_class(self.dag_folder, version_check_interval=60)
+        version = dagbag_cache.get_dag_folder_version()
+        self.write_dag_file("b.py")
+        self.assertEqual(dagbag_cache.get_dag_folder_version(), version)
+        dagbag_cache.last_version_time -= 60
+        self.assertNotEqual(dagbag_cache.get_dag_folder_version(), version)
+
+    def test_invalidation_is_seen_within_the_interval(self):
+        dagbag_cache = self.dagbag_cache_class(self.dag_folder, version_check_interval=60)
+        version = dagbag_cache.get_dag_folder_version()
+        dagbag_cache.invalidate(self.write_dag_file("b.py"))
+        self.assertNotEqual(dagbag_cache.get_dag_folder_version(), version)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# Tests of the warnings of the deploy_dag API
+#
+# Usage: python -m unittest discover tests
+import io
+import json
+import os
+import unittest
+
+from plugin_loader import load_test_plugin
+
+DEPLOY_TEST_DAG = b"""
+from airflow.models import DAG
+
+dag = DAG("deploy_test")
+"""
+
+
+class DeployDagTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin, app = load_test_plugin()
+        cls.client = app.test_client()
+        cls.dag_file_path = os.path.join(cls.plugin.airflow_dags_folder, "deploy_test.py")
+
+    def tearDown(self):
+        if os.path.isfile(self.dag_file_path):
+            os.remove(self.dag_file_path)
+            self.plugin.dagbag_cache.invalidate(self.dag_file_path)
+
+    def deploy_dag(self, **form):
+        form["dag_file"] = (io.BytesIO(DEPLOY_TEST_DAG), "deploy_test.py")
+        response = self.client.post("/admin/rest_api/api?api=deploy_dag", data=form, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return json.loads(response.get_data(as_text=True))
+
+    def test_dag_ids_are_read_from_the_source(self):
+        response = self.deploy_dag()
+        self.assertEqual(response["dag_ids"], ["deploy_test"])
+        self.assertNotIn("warning", response)
+
+    def test_failed_read_of_the_dag_ids_has_its_own_warning(self):
+        file_util = self.plugin.REST_API_DAG_File_Util
+        real_get_dag_ids_from_source = file_util.get_dag_ids_from_source
+
+        def failing_get_dag_ids_from_source(source, file_path="<unknown>"):
+            raise ValueError("parse failed")
+
+        file_util.get_dag_ids_from_source = staticmethod(failing_get_dag_ids_from_source)
+        try:
+            response = self.deploy_dag()
+        finally:
+            file_util.get_dag_ids_from_source = staticmethod(real_get_dag_ids_from_source)
+        self.assertEqual(response["warning"], "Failed to read the DAG ids of the DAG file: parse failed")
+        self.assertIsNone(response["dag_ids"])
+        self.assertTrue(os.path.isfile(self.dag_file_path))
+
+    def test_pause_and_unpause_are_skipped_together(self):
+        response = self.deploy_dag(pause="on", unpause="on")
+        self.assertEqual(response["warning"], "Both options pause and unpause were given. Skipping setting the state (pause, unpause) of the DAG.")
+
+
+if __name__ == "__main__":
+    unittest.main()
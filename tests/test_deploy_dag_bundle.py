@@ -0,0 +1,131 @@
+# Tests of the deployment of DAG bundles: the pruning of the files that aren't in the bundle and the rollback of a
+# deployment that fails halfway
+#
+# Usage: python -m unittest discover tests
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from plugin_loader import load_test_plugin
+
+
+# Get the bundle members of the files, like REST_API_DAG_File_Util.get_bundle_members() returns them
+def get_bundle_members(files):
+    return [(relative_path, len(content), (lambda content=content: io.BytesIO(content.encode("utf-8")))) for relative_path, content in sorted(files.items())]
+
+
+# Get the relative paths and the content of all the files of the folder, including the hidden ones
+def read_folder(folder):
+    files = {}
+    for root, dirs, file_names in os.walk(folder):
+        for file_name in file_names:
+            with open(os.path.join(root, file_name)) as folder_file:
+                files[os.path.relpath(os.path.join(root, file_name), folder).replace(os.sep, "/")] = folder_file.read()
+    return files
+
+
+# Get the relative paths of all the folders of the folder
+def list_folders(folder):
+    return sorted([os.path.relpath(os.path.join(root, name), folder).replace(os.sep, "/") for root, dirs, _ in os.walk(folder) for name in dirs])
+
+
+class DeployBundleTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin, app = load_test_plugin()
+        cls.client = app.test_client()
+        cls.file_util = cls.plugin.REST_API_DAG_File_Util
+
+    def setUp(self):
+        self.target_folder = tempfile.mkdtemp(prefix="rest_api_plugin_test_bundle_")
+        self.initial_files = {"a.py": "a = 1\n", "b.py": "b = 1\n", "lib/helper.py": "helper = 1\n", "notes.txt": "notes\n"}
+        for relative_path, content in self.initial_files.items():
+            file_path = os.path.join(self.target_folder, *relative_path.split("/"))
+            if not os.path.isdir(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            with open(file_path, "w") as target_file:
+                target_file.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.target_folder)
+
+    def test_prune_removes_the_python_files_that_are_not_in_the_bundle(self):
+        result = self.file_util.deploy_bundle(get_bundle_members({"a.py": "a = 2\n", "new/c.py": "c = 1\n"}), self.target_folder, prune=True)
+        self.assertEqual(result, {"added": ["new/c.py"], "updated": ["a.py"], "unchanged": [], "removed": ["b.py", "lib/helper.py"]})
+        self.assertEqual(read_folder(self.target_folder), {"a.py": "a = 2\n", "new/c.py": "c = 1\n", "notes.txt": "notes\n"})
+
+    def test_without_prune_the_other_files_are_kept(self):
+        result = self.file_util.deploy_bundle(get_bundle_members({"a.py": "a = 1\n", "b.py": "b = 2\n"}), self.target_folder)
+        self.assertEqual(result, {"added": [], "updated": ["b.py"], "unchanged": ["a.py"], "removed": []})
+        self.assertEqual(read_folder(self.target_folder), dict(self.initial_files, **{"b.py": "b = 2\n"}))
+
+    def test_failed_rename_rolls_the_deployment_back(self):
+        bundle_files = {"a.py": "a = 2\n", "new/deep/c.py": "c = 1\n", "z.py": "z = 1\n"}
+        real_rename = os.rename
+
+        # the rename of the last file of the bundle fails, after the pruning and the other renames were done
+        def failing_rename(source, destination):
+            if destination.endswith("z.py"):
+                raise OSError("rename failed")
+            real_rename(source, destination)
+
+        os.rename = failing_rename
+        try:
+            self.assertRaises(OSError, self.file_util.deploy_bundle, get_bundle_members(bundle_files), self.target_folder, True)
+        finally:
+            os.rename = real_rename
+        self.assertEqual(read_folder(self.target_folder), self.initial_files)
+        self.assertEqual(list_folders(self.target_folder), ["lib"])
+
+    def test_failed_prune_rolls_the_deployment_back(self):
+        real_rename = os.rename
+
+        def failing_rename(source, destination):
+            if source.endswith("helper.py"):
+                raise OSError("rename failed")
+            real_rename(source, destination)
+
+        os.rename = failing_rename
+        try:
+            self.assertRaises(OSError, self.file_util.deploy_bundle, get_bundle_members({"a.py": "a = 2\n", "new/c.py": "c = 1\n"}), self.target_folder, True)
+        finally:
+            os.rename = real_rename
+        self.assertEqual(read_folder(self.target_folder), self.initial_files)
+        self.assertEqual(list_folders(self.target_folder), ["lib"])
+
+    def test_prune_requires_a_subdir(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("sub/b.py", "b = 1\n")
+        archive.seek(0)
+        dags_folder = self.plugin.airflow_dags_folder
+        dag_files = sorted(os.listdir(dags_folder))
+        response = self.client.post("/admin/rest_api/api?api=deploy_dag_bundle", data={"dag_bundle": (archive, "bundle.zip"), "prune": "on"}, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.get_data(as_text=True))["output"], "prune can only be used along with a subdir")
+        self.assertEqual(sorted(os.listdir(dags_folder)), dag_files)
+
+    def test_prune_of_a_subdir_keeps_the_rest_of_the_dags_folder(self):
+        dags_folder = self.plugin.airflow_dags_folder
+        dag_files = sorted(os.listdir(dags_folder))
+        for content in ["old = 1\n", "b = 1\n"]:
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("old.py" if content.startswith("old") else "b.py", content)
+            archive.seek(0)
+            response = self.client.post("/admin/rest_api/api?api=deploy_dag_bundle", data={"dag_bundle": (archive, "bundle.zip"), "subdir": "team_test", "prune": "on"}, content_type="multipart/form-data")
+            self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        output = json.loads(response.get_data(as_text=True))["output"]
+        self.assertEqual((output["added"], output["removed"]), (["b.py"], ["old.py"]))
+        self.assertEqual(sorted(os.listdir(os.path.join(dags_folder, "team_test"))), ["b.py"])
+        self.assertEqual(sorted([name for name in os.listdir(dags_folder) if name != "team_test"]), dag_files)
+        shutil.rmtree(os.path.join(dags_folder, "team_test"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# Tests of the jobs: the status files saved by concurrent threads, the admission tickets they take and the cancellation of
+# the background jobs along with the processes they started
+#
+# Usage: python -m unittest discover tests
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from plugin_loader import load_test_plugin
+
+
+class Ticket(object):
+
+    def __init__(self):
+        self.release_count = 0
+
+    def hand_over(self):
+        return self
+
+    def release(self):
+        self.release_count += 1
+
+
+class JobManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        plugin, app = load_test_plugin()
+        cls.job_manager_class = plugin.REST_API_Job_Manager
+
+    def setUp(self):
+        self.output_folder = tempfile.mkdtemp(prefix="rest_api_plugin_test_jobs_")
+        self.job_manager = self.job_manager_class(output_folder=self.output_folder, max_workers=2, history_size=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.output_folder)
+
+    def wait_until_finished(self, job_id, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.job_manager.get_job(job_id)
+            if job["status"] in self.job_manager.FINISHED_STATUSES and job_id not in self.job_manager.processes and job_id not in self.job_manager.tickets:
+                return job
+            time.sleep(0.01)
+        self.fail("The job '" + job_id + "' didn't finish")
+
+    def test_concurrent_saves_of_a_job(self):
+        job = self.job_manager.submit("test", ["true"], ticket=Ticket())
+        self.wait_until_finished(job["job_id"])
+        errors = []
+
+        def save():
+            try:
+                for _ in range(50):
+                    self.job_manager._save(dict(job))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(os.listdir(self.output_folder)), sorted([job["job_id"] + ".json", job["job_id"] + ".log"]))
+
+    def test_ticket_is_released_when_the_status_fails_to_be_saved(self):
+        ticket = Ticket()
+        job = self.job_manager.submit("test", ["sleep", "0.2"], background=True, ticket=ticket)
+        real_update = self.job_manager._update
+
+        def failing_update(job_id, **changes):
+            if "exit_code" in changes:
+                raise OSError("update failed")
+            real_update(job_id, **changes)
+
+        self.job_manager._update = failing_update
+        deadline = time.time() + 10
+        while ticket.release_count == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(ticket.release_count, 1)
+        self.assertNotIn(job["job_id"], self.job_manager.tickets)
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "requires /proc")
+    def test_cancel_of_a_background_job_terminates_its_process_group(self):
+        ticket = Ticket()
+        job = self.job_manager.submit("test", ["sh", "-c", "sleep 60 & echo $!; wait"], background=True, ticket=ticket)
+        deadline = time.time() + 10
+        output = self.job_manager.read_output(job["job_id"])["data"]
+        while not output.endswith("\n") and time.time() < deadline:
+            time.sleep(0.01)
+            output = self.job_manager.read_output(job["job_id"])["data"]
+        child_pid = int(output)
+        self.job_manager.cancel(job["job_id"])
+        job = self.wait_until_finished(job["job_id"])
+        self.assertEqual(job["status"], self.job_manager.CANCELLED)
+        self.assertEqual(ticket.release_count, 1)
+        deadline = time.time() + 10
+        while self.is_alive(child_pid) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.is_alive(child_pid))
+
+    # Whether the process exists and isn't a zombie waiting to be reaped
+    @staticmethod
+    def is_alive(pid):
+        try:
+            with open("/proc/" + str(pid) + "/stat") as stat_file:
+                return stat_file.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except (IOError, OSError):
+            return False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Tests of the decoding of the output of the CLI processes when its lines are read in chunks
+#
+# Usage: python -m unittest discover tests
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from plugin_loader import load_test_plugin
+
+OUTPUT = u"héllo wörld €€€ \U0001f600\n"
+
+
+class ProcessOutputTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin, app = load_test_plugin()
+
+    def setUp(self):
+        self.max_line_chunk_size = self.plugin.process_output_max_line_chunk_size
+        self.plugin.process_output_max_line_chunk_size = 3  # splits most of the multi-byte characters of the output
+
+    def tearDown(self):
+        self.plugin.process_output_max_line_chunk_size = self.max_line_chunk_size
+
+    def test_characters_split_between_chunks_of_a_process_output(self):
+        script = "import sys; output = sys.stdin.read().encode('utf-8') if sys.version_info[0] < 3 else sys.stdin.buffer.read(); getattr(sys.stdout, 'buffer', sys.stdout).write(output); getattr(sys.stderr, 'buffer', sys.stderr).write(output[:-2])"
+        process = subprocess.Popen([sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process.stdin.write(OUTPUT.encode("utf-8"))
+        process.stdin.close()
+        lines = list(self.plugin.REST_API.read_process_output_lines(process))
+        self.assertEqual(u"".join([line for stream_name, line in lines if stream_name == "stdout"]), OUTPUT)
+        # the output ending in the middle of a character is decoded with a replacement character
+        self.assertEqual(u"".join([line for stream_name, line in lines if stream_name == "stderr"]), OUTPUT[:-2] + u"�")
+
+    def test_characters_split_between_chunks_of_output_files(self):
+        folder = tempfile.mkdtemp(prefix="rest_api_plugin_test_output_")
+        try:
+            for stream_name in ["stdout", "stderr"]:
+                with open(os.path.join(folder, stream_name), "wb") as output_file:
+                    output_file.write(OUTPUT.encode("utf-8") * 2)
+            lines = list(self.plugin.REST_API.read_output_files_lines(os.path.join(folder, "stdout"), os.path.join(folder, "stderr")))
+        finally:
+            shutil.rmtree(folder)
+        for stream_name in ["stdout", "stderr"]:
+            self.assertEqual(u"".join([line for line_stream_name, line in lines if line_stream_name == stream_name]), OUTPUT * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# Tests of the pruning of the folder of the calls coalesced across processes
+#
+# Usage: python -m unittest discover tests
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from plugin_loader import load_test_plugin
+
+
+class RequestCoalescerPruneTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        plugin, app = load_test_plugin()
+        cls.coalescer_class = plugin.REST_API_Request_Coalescer
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="rest_api_plugin_test_coalescing_")
+        self.coalescer = self.coalescer_class(True, True, self.folder, 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def create_file(self, file_name, age):
+        file_path = os.path.join(self.folder, file_name)
+        open(file_path, "w").close()
+        os.utime(file_path, (time.time() - age, time.time() - age))
+
+    def test_prune_keeps_the_lock_files(self):
+        for file_name in ["old.lock", "old.json", ".old.tmp"]:
+            self.create_file(file_name, 3600)
+        for file_name in ["new.lock", "new.json", ".new.tmp"]:
+            self.create_file(file_name, 0)
+        self.coalescer._prune()
+        self.assertEqual(sorted(os.listdir(self.folder)), [".new.tmp", "new.json", "new.lock", "old.lock"])
+
+    def test_lock_file_of_a_call_is_kept_after_the_call(self):
+        lock_file_name = hashlib.sha1("key".encode("utf-8")).hexdigest() + ".lock"
+        self.create_file(lock_file_name, 3600)
+        self.assertEqual(self.coalescer.execute("key", lambda: {"output": 1}), ({"output": 1}, False))
+        self.assertEqual(sorted([file_name for file_name in os.listdir(self.folder) if not file_name.startswith(".")]), [lock_file_name[:-len(".lock")] + ".json", lock_file_name])
+
+
+if __name__ == "__main__":
+    unittest.main()
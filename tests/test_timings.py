@@ -0,0 +1,47 @@
+# Tests of the 'timings' of the responses
+#
+# Usage: python -m unittest discover tests
+import json
+import unittest
+
+from plugin_loader import load_test_plugin
+
+
+class TimingsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin, app = load_test_plugin()
+        cls.client = app.test_client()
+
+    # Get the response of the call along with the number of times a response was serialized
+    def get_response(self, query):
+        real_jsonify = self.plugin.jsonify
+        serialized_responses = []
+
+        def counting_jsonify(*args, **kwargs):
+            serialized_responses.append(args)
+            return real_jsonify(*args, **kwargs)
+
+        self.plugin.jsonify = counting_jsonify
+        try:
+            response = self.client.get("/admin/rest_api/api?" + query)
+        finally:
+            self.plugin.jsonify = real_jsonify
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return json.loads(response.get_data(as_text=True)), len(serialized_responses)
+
+    def test_response_with_timings_is_serialized_once(self):
+        response, serialization_count = self.get_response("api=version&timings=true")
+        self.assertEqual(serialization_count, 1)
+        self.assertIn("total", response["timings"])
+        self.assertNotIn("serialization", response["timings"])
+
+    def test_response_without_timings(self):
+        response, serialization_count = self.get_response("api=version")
+        self.assertEqual(serialization_count, 1)
+        self.assertNotIn("timings", response)
+
+
+if __name__ == "__main__":
+    unittest.main()